@@ -1,50 +1,439 @@
 # IGNORE THIS FOR NOW
 
-from flask import Flask, request, jsonify, make_response
-from firebase_admin import credentials, firestore, initialize_app
+from flask import Flask, Blueprint, current_app, g, has_app_context, has_request_context, request, jsonify, make_response, Response, stream_with_context
+from werkzeug.local import LocalProxy
 from datetime import timedelta
+import json
 import os
 import sys
+import time
 from dotenv import load_dotenv
 from flask_cors import CORS
-from google.cloud.firestore_v1 import FieldFilter
 
-from houseService.house_utils import create_house, delete_collection, get_house
-from userService.user_utils import upsert_user
-from choreService.chore_utils import get_chore_instances_by_user, upsert_chore, upsert_chore_instance, get_chore_instances_by_house, get_current_day_chore_instances_by_user
+from houseService.house_utils import create_house, upsert_house, save_house, JoinCodeTaken, delete_house, get_house, get_houses, get_house_by_join_code, stream_house_collection, get_house_snapshot, get_house_changes, delete_house_document, patch_house_document, patch_house, bulk_upsert, get_house_versions, bump_house_versions, house_etag, HOUSE_SUBCOLLECTIONS
+from userService.user_utils import upsert_user, patch_user
+from choreService.chore_utils import get_chore_instances_by_user, upsert_chore, upsert_chore_instance, write_chore_instances, delete_chore_instance, accept_swap, get_chore_instances_by_house, get_current_day_chore_instances_by_user, generate_instances_for_chore, list_chore_instances, get_chore_stats, PAGE_OPTIONS
+from utils.utils import MAX_BATCH_WRITES, normalize_dates, parse_date, stamp_updated
+from utils.cache import create_cache
+from utils.house_mirror import create_house_mirror
+from utils.firebase_utils import get_firestore_db
+from utils.metrics import Metrics, RequestMetrics, instrument
+from utils.encoding import OrjsonProvider, compact_json, negotiate_encoding, should_compress, compress, compress_stream, mark_compressed, COMPRESS_MIN_BYTES
+from utils.write_buffer import WriteBuffer
 
 
 # Load .env file variables
 load_dotenv()
 
-# Create app
-app = Flask(__name__)
-app.secret_key = os.getenv('SECRET_KEY')
-CORS(app)       # needed to send POST/GET requests from flutter
+# All routes are registered on this blueprint by create_app()
+api = Blueprint('api', __name__)
 
-# Configure session cookie settings
-app.config['SESSION_COOKIE_SECURE'] = True  # Ensure cookies are sent over HTTPS
-app.config['SESSION_COOKIE_HTTPONLY'] = True  # Prevent JavaScript access to cookies
-app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=1)  # Adjust session expiration as needed
-app.config['SESSION_REFRESH_EACH_REQUEST'] = True
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Can be 'Strict', 'Lax', or 'None'
 
-# Firebase Admin SDK setup
-cred = credentials.Certificate("firebase-auth.json")
-initialize_app(cred)
-db = firestore.client()
+def create_app(config=None):
+    """
+        Creates the Flask app. Nothing here touches Firebase: the Firestore
+        client is created on first use in each process (see
+        utils/firebase_utils.py), or injected with config['FIRESTORE_DB']
+        (e.g. a FakeFirestore in tests and benchmarks), so the app starts
+        quickly and can be created before gunicorn forks its workers.
+
+        Args:
+            config (dict): Optional Flask config overrides.
+    """
+    app = Flask(__name__)
+    app.secret_key = os.getenv('SECRET_KEY')
+    CORS(app)       # needed to send POST/GET requests from flutter
+
+    # Configure session cookie settings
+    app.config['SESSION_COOKIE_SECURE'] = True  # Ensure cookies are sent over HTTPS
+    app.config['SESSION_COOKIE_HTTPONLY'] = True  # Prevent JavaScript access to cookies
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=1)  # Adjust session expiration as needed
+    app.config['SESSION_REFRESH_EACH_REQUEST'] = True
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Can be 'Strict', 'Lax', or 'None'
+    # Add a Server-Timing header breaking down where each request's time went
+    app.config['SERVER_TIMING'] = os.getenv('SERVER_TIMING_ENABLED', '').lower() == 'true'
+    # Compress responses for clients that accept it (turn off if a proxy in
+    # front of the app already does). See utils/encoding.py.
+    app.config['COMPRESSION'] = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    app.config['COMPRESS_MIN_BYTES'] = int(os.getenv('COMPRESS_MIN_BYTES', COMPRESS_MIN_BYTES))
+    # Coalesce each document's upserts into at most one write per
+    # WRITE_BUFFER_SECONDS during edit bursts (0 turns it off). See
+    # utils/write_buffer.py.
+    app.config['WRITE_BUFFER_SECONDS'] = float(os.getenv('WRITE_BUFFER_SECONDS', 0))
+    app.json = OrjsonProvider(app)
+    if config:
+        app.config.update(config)
+    if app.config['WRITE_BUFFER_SECONDS'] > 0:
+        app.extensions['write_buffer'] = WriteBuffer(
+            lambda writes: flush_buffered_writes(app, writes), app.config['WRITE_BUFFER_SECONDS'])
+
+    app.register_blueprint(api)
+    return app
 
+
+def get_db():
+    """
+        Returns the Firestore client: app.config['FIRESTORE_DB'] if it is
+        set (e.g. by tests and benchmarks), otherwise this process's client.
+        During a request it is wrapped to count the request's Firestore
+        usage (see utils/metrics.py).
+    """
+    db = None
+    if has_app_context():
+        db = current_app.config.get('FIRESTORE_DB')
+    if db is None:
+        db = get_firestore_db()
+    if has_request_context() and 'request_metrics' in g:
+        return instrument(db, g.request_metrics)
+    return db
+
+# Resolved on every use, so nothing connects to Firestore at import time.
+# Routes pass get_db() rather than db to the service utils, which may use
+# the client from their own threads (outside of the app context).
 # houses is the primary db collection. users is the "holding area" for new users.
-HOUSES = db.collection('houses')
-USERS = db.collection('users')
+db = LocalProxy(get_db)
+HOUSES = LocalProxy(lambda: get_db().collection('houses'))
+USERS = LocalProxy(lambda: get_db().collection('users'))
+
+# URL names of the house subcollections that can be bulk upserted
+BULK_KINDS = {
+    'chores': 'chores',
+    'chore-instances': 'choreInstances',
+    'members': 'members',
+    'subgroups': 'subgroups',
+    'swaps': 'swaps'
+}
+
+# Read-through cache for the GET routes, keyed by ('houses', house_id, <collection>)
+# and ('users', user_id). See utils/cache.py for configuration.
+cache = create_cache()
+
+
+def cached_read(key, load):
+    """
+        Returns the cached value for key, calling load() on a miss.
+        Only successful reads (dicts) are cached, never error responses.
+    """
+    value = cache.get(key)
+    if value is None:
+        value = load()
+        if isinstance(value, dict):
+            cache.set(key, value)
+    return value
+
+# Per-route request latency and Firestore usage of this worker, served by
+# GET /metrics. See utils/metrics.py.
+metrics = Metrics()
+
+
+@api.before_app_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.request_metrics = RequestMetrics()
+
+
+@api.after_app_request
+def record_request_metrics(response):
+    """
+        Records the request in metrics once its response has been sent,
+        since streamed responses keep reading from Firestore until then,
+        and adds the Server-Timing header if SERVER_TIMING is enabled.
+    """
+    start, request_metrics = g.get('request_start'), g.get('request_metrics')
+    if start is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    method, status = request.method, response.status_code
+    if current_app.config.get('SERVER_TIMING'):
+        response.headers['Server-Timing'] = request_metrics.server_timing(time.perf_counter() - start)
+    response.call_on_close(
+        lambda: metrics.observe(route, method, status, time.perf_counter() - start, request_metrics))
+    return response
+
+
+@api.before_app_request
+def read_compact_option():
+    compact_json.set(request.args.get('compact', '').lower() == 'true')
+
+
+@api.after_app_request
+def compress_response(response):
+    """
+        Gzips (or brotli-compresses) the response body if COMPRESSION is
+        enabled, the client accepts it and the body is at least
+        COMPRESS_MIN_BYTES long. Streamed bodies are compressed as they
+        are sent.
+    """
+    if not current_app.config.get('COMPRESSION') or response.direct_passthrough or not should_compress(response):
+        return response
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config['COMPRESS_MIN_BYTES']:
+            return response
+        response.set_data(compress(data, encoding))
+    mark_compressed(response, encoding)
+    return response
+
+# Optional in-memory mirror of recently active houses, kept up to date by
+# Firestore listeners (HOUSE_MIRROR_ENABLED=true). See utils/house_mirror.py.
+mirror = create_house_mirror(db)
+
+
+# Streamed collections with at most this many documents are also cached
+STREAM_CACHE_LIMIT = 1000
+
+
+def read_house_collection(house_id, name):
+    """
+        Reads one of a house's subcollections from the house mirror if it
+        is mirrored, otherwise from the read cache. On a cache miss the
+        documents are streamed straight from Firestore into the response,
+        so memory use doesn't grow with the size of the collection.
+        Mirrored reads are tagged and answered with 304 like the others.
+    """
+    def load(etag):
+        if mirror is not None:
+            docs = mirror.get_collection(house_id, name)
+            if docs is not None:
+                return docs
+        key = ('houses', house_id, name, etag)
+        docs = cache.get(key)
+        if docs is not None:
+            return docs
+        docs = stream_house_collection(get_db(), house_id, name)
+        if isinstance(docs, tuple):
+            return docs
+        return Response(stream_with_context(stream_json_object(key, docs)), mimetype='application/json')
+    return conditional_read(house_id, [name], load)
+
+def conditional_read(house_id, names, load):
+    """
+        Serves a read of the given parts of a house ('house' and/or
+        subcollection names) with an ETag made from their write counters
+        (see house_utils.HOUSE_VERSIONS). If the client already has that
+        version (If-None-Match), answers 304 Not Modified without reading
+        anything else. Otherwise returns load(etag), which should cache
+        what it reads under keys that include the ETag, so a response is
+        never tagged with a newer version than its data.
+    """
+    try:
+        versions = cached_read(('houses', house_id, 'versions'), lambda: get_house_versions(get_db(), house_id))
+    except Exception as e:
+        print(f"Error getting the write counters of house {house_id}: {e}")
+        return load(None)
+    etag = house_etag(versions, names)
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(load(etag))
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    return response
+
+def stream_json_object(key, docs):
+    """
+        Yields a JSON object mapping document IDs to document data, one
+        document at a time. If the collection turns out to be small enough
+        it is cached under key once it has been sent.
+    """
+    collected = {}
+    yield '{'
+    try:
+        for i, doc in enumerate(docs):
+            data = doc.to_dict()
+            if collected is not None:
+                collected[doc.id] = data
+                if len(collected) > STREAM_CACHE_LIMIT:
+                    collected = None
+            yield ('' if i == 0 else ',') + json.dumps(doc.id) + ':' + current_app.json.dumps(data, separators=(',', ':'))
+    except Exception as e:
+        # the status line has already been sent, so all we can do is stop
+        print(f"Error streaming {key}: {e}")
+        return
+    yield '}'
+    if collected is not None:
+        cache.set(key, collected)
+
+def invalidate_house(house_id, *collections, bump=True):
+    """
+        Counts a write to the house document and/or subcollections written
+        to by a route (with no collections given, to all of them), which
+        changes their ETags and the cache keys of their reads, and drops
+        this worker's cached copy of the house's write counters. Pass
+        bump=False when the house was deleted.
+    """
+    names = collections or ['house'] + HOUSE_SUBCOLLECTIONS
+    if bump:
+        try:
+            bump_house_versions(get_db(), house_id, names)
+        except Exception as e:
+            print(f"Error counting writes to house {house_id}: {e}")
+    cache.delete(('houses', house_id, 'versions'))
+
+# Routes whose upserts the write buffer may queue, and routes that never
+# read or write house data
+BUFFERED_ROUTES = {'upsert_member_route', 'upsert_chore_instance_route', 'upsert_house_route'}
+HOUSELESS_ROUTES = {'home', 'readiness_route', 'metrics_route', 'cache_stats_route', 'get_user_route',
+                    'upsert_user_route', 'update_user_route'}
+
+
+def buffered_write(key, data, write, hold=True):
+    """
+        Queues data to be merged into the document key = (<kind>, <house ID>,
+        <document ID>) if this worker wrote it less than WRITE_BUFFER_SECONDS
+        ago, and returns None. Otherwise (or with hold=False) writes it now
+        with write() and returns its response.
+    """
+    buffer = current_app.extensions.get('write_buffer')
+    if buffer is None:
+        return write()
+    if hold and buffer.hold(key, data):
+        return None
+    if not hold:
+        buffer.flush(key[1])    # the document's queued write goes first
+    response = write()
+    if not isinstance(response, tuple):     # errors are (response, status)
+        # the response fills in fields the server chose, e.g. a house's joinCode
+        buffer.written(key, dict(data, **response.get_json()))
+    return response
+
+
+def flush_buffered_writes(app, writes):
+    """
+        Writes the upserts queued by the write buffer, coalesced per
+        document and merged into the documents: members in batches, chore
+        instances through write_chore_instances (so agendas and counters
+        follow them) and houses through save_house. Then counts the writes
+        to each house, as the routes would have.
+
+        Args:
+            app (Flask): The app the writes were queued by.
+            writes (list): [((<kind>, <house ID>, <document ID>), <data>)]
+    """
+    with app.app_context():
+        db = get_db()
+        HOUSES = db.collection('houses')
+        written = {}
+        members = [(key, data) for key, data in writes if key[0] == 'members']
+        for start in range(0, len(members), MAX_BATCH_WRITES):
+            batch = db.batch()
+            for (_, house_id, member_id), data in members[start:start + MAX_BATCH_WRITES]:
+                batch.set(HOUSES.document(house_id).collection('members').document(member_id),
+                          stamp_updated(data), merge=True)
+            try:
+                batch.commit()
+            except Exception as e:
+                print(f"Error writing buffered members: {e}")
+                continue
+            for (_, house_id, _), _ in members[start:start + MAX_BATCH_WRITES]:
+                written.setdefault(house_id, set()).add('members')
+
+        instances = {}
+        for (kind, house_id, _), data in writes:
+            if kind == 'choreInstances':
+                instances.setdefault(house_id, []).append(data)
+        for house_id, house_instances in instances.items():
+            try:
+                write_chore_instances(db, house_id, house_instances, merge=True)
+                written.setdefault(house_id, set()).add('choreInstances')
+            except Exception as e:
+                print(f"Error writing buffered chore instances of house {house_id}: {e}")
+
+        for (kind, house_id, _), data in writes:
+            if kind != 'house':
+                continue
+            try:
+                if save_house(db, data, merge=True) is not None:
+                    written.setdefault(house_id, set()).add('house')
+            except JoinCodeTaken as e:
+                print(f"Buffered write to house {house_id} dropped: join code {e} is already in use")
+            except Exception as e:
+                print(f"Error writing buffered house {house_id}: {e}")
+
+        for house_id, names in written.items():
+            invalidate_house(house_id, *names)
+
+
+def flush_writes_for(app, route, house_id, writes=False):
+    """
+        Flushes the write buffer's queued writes to house_id (or to every
+        house, if the route isn't about one house) before route runs, so
+        this worker's reads see them and its other writes to the house
+        land after them. Shared with asgi.py.
+        Pass writes=True if the route may write to the house, so later
+        buffered writes don't carry the fields it changed back.
+    """
+    buffer = app.extensions.get('write_buffer')
+    if buffer is None or route in BUFFERED_ROUTES or route in HOUSELESS_ROUTES:
+        return
+    if buffer.has_pending(house_id):
+        buffer.flush(house_id)
+    if writes:
+        buffer.forget(house_id)
+
+
+@api.before_app_request
+def flush_house_writes():
+    if current_app.extensions.get('write_buffer') is None:
+        return
+    body = request.get_json(silent=True) if request.is_json else None
+    house_id = (request.view_args or {}).get('house_id')
+    if house_id is None and isinstance(body, dict):
+        house_id = body.get('house_id')
+    flush_writes_for(current_app, (request.endpoint or '').rpartition('.')[2], house_id,
+                     writes=request.method != 'GET')
+
+
+# How long a successful /ready check is reused, and how long a check may
+# take before the worker is reported unavailable, in seconds
+READINESS_TTL_SECONDS = 10
+READINESS_TIMEOUT_SECONDS = 2
+ready_until = 0
 
 
 # /// Public Routes /// #
-@app.route('/')
+@api.route('/')
 def home():
     return "Hello, Divvy App Gateway!"
 
-@app.route('/upsert-member-<house_id>', methods=['POST'])
+@api.route('/ready', methods=['GET'])
+def readiness_route():
+    """
+        Readiness probe for the load balancer. Returns 200 once this
+        worker can reach Firestore, and 503 otherwise. A successful check
+        is reused for READINESS_TTL_SECONDS so probes don't each cost a
+        Firestore read.
+        Response example:
+            {'status': 'ready'}
+    """
+    global ready_until
+    if time.monotonic() < ready_until:
+        return jsonify({'status': 'ready'})
+    try:
+        HOUSES.select([]).limit(1).get(retry=None, timeout=READINESS_TIMEOUT_SECONDS)
+        ready_until = time.monotonic() + READINESS_TTL_SECONDS
+        return jsonify({'status': 'ready'})
+    except Exception as e:
+        print(f"Readiness check failed: {e}")
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
+
+@api.route('/metrics', methods=['GET'])
+def metrics_route():
+    """
+        Prometheus metrics of this worker process: requests and latency
+        histograms per route, and the Firestore reads, writes and deletes
+        each route has cost. See utils/metrics.py.
+    """
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@api.route('/upsert-member-<house_id>', methods=['POST'])
 def upsert_member_route(house_id):
     """
         Adds an existing user as a member to a house in the database's
@@ -69,31 +458,42 @@ def upsert_member_route(house_id):
     try:
         house_ref = HOUSES.document(house_id)
         member_id = data.get('id')
-        house_ref.collection('members').document(member_id).set(data)
-        return jsonify({'id': member_id})
+        member = normalize_dates(data)
+
+        def write():
+            house_ref.collection('members').document(member_id).set(stamp_updated(dict(member)))
+            invalidate_house(house_id, 'members')
+            return jsonify({'id': member_id})
+        return buffered_write(('members', house_id, member_id), member, write) or jsonify({'id': member_id})
     except Exception as e:
         print(f"Error creating/updating user: {e}")
         return jsonify({'error': 'Member could not be added: {e}'}), 400
 
-@app.route('/upsert-chore-instance-<house_id>', methods=['POST'])
+@api.route('/upsert-chore-instance-<house_id>', methods=['POST'])
 def upsert_chore_instance_route(house_id):
     """
         Creates a new chore instance under a house in the database's
-        house collection. If the chore instance already exists, then
-        non-empty fields will be updated instead.
+        house collection. If the chore instance already exists, it is
+        overwritten; to change only some of its fields, use
+        PATCH /update-chore-instances-<house_id>.
         The houseID field must be a valid house ID.
         The choreID field must a valid (super) chore ID of that house.
         The id field must be non-empty.
     """
     data = request.get_json()
-    return upsert_chore_instance(db, data, house_id)
 
-@app.route('/upsert-chore-<house_id>', methods=['POST'])
+    def write():
+        response = upsert_chore_instance(get_db(), data, house_id)
+        invalidate_house(house_id, 'choreInstances')
+        return response
+    return buffered_write(('choreInstances', house_id, data.get('id')), data, write) or jsonify({'id': data.get('id')})
+
+@api.route('/upsert-chore-<house_id>', methods=['POST'])
 def upsert_chore_route(house_id):
     """
         Creates a new chore under a house in the database's house
-        collection. If the chore already exists, then non-empty fields
-        will be updated instead.
+        collection. If the chore already exists, it is overwritten; to
+        change only some of its fields, use PATCH /update-chores-<house_id>.
         The houseID field must be a valid house ID.
         The id field must be non-empty.
         Request body example:
@@ -108,11 +508,75 @@ def upsert_chore_route(house_id):
                 'name': 'choreName',
                 'startDate': 'Thu, 01 May 2025 07:00:00 GMT'
             }
+        Add ?generateInstances=true to also create the chore's instances
+        for the coming weeks (see /generate-chore-instances-<house_id>).
+    """
+    data = request.get_json()
+    generate = request.args.get('generateInstances', '').lower() == 'true'
+    response = upsert_chore(get_db(), data, house_id, generate_instances=generate)
+    invalidate_house(house_id, 'chores', 'choreInstances')
+    return response
+
+@api.route('/generate-chore-instances-<house_id>', methods=['POST'])
+def generate_chore_instances_route(house_id):
+    """
+        Creates the chore instances of an existing chore for the coming
+        weeks, based on its frequencyPattern, frequencyDays and startDate.
+        Instances are assigned round-robin across the chore's assignees.
+        Days that already have an instance of the chore are skipped, so
+        this can be called again to roll the window forward.
+        The id field must be a valid chore ID of that house.
+        Request body example:
+            {'id': '12lcxzv', 'horizonDays': 28}
+    """
+    data = request.get_json()
+    response = generate_instances_for_chore(get_db(), data, house_id)
+    invalidate_house(house_id, 'choreInstances')
+    return response
+
+@api.route('/bulk-upsert-<any(chores, "chore-instances", members, subgroups, swaps):kind>-<house_id>', methods=['POST'])
+def bulk_upsert_route(kind, house_id):
+    """
+        Creates or overwrites many chores, chore instances, members,
+        subgroups or swaps of a house in one request. Documents are
+        written in atomic batches of up to 500.
+        Each document's id field must be non-empty.
+        Request body example (for /bulk-upsert-subgroups-<house_id>):
+            [
+                {'id': 'zxc0923n', 'name': 'Upstairs', 'members': ['zoiwern']},
+                {'id': 'pqo2093x', 'name': 'Downstairs', 'members': []}
+            ]
+        Response example:
+            {'written': 2, 'failed': 0,
+             'results': [{'id': 'zxc0923n', 'status': 'ok'}, {'id': 'pqo2093x', 'status': 'ok'}]}
+    """
+    data = request.get_json()
+    name = BULK_KINDS[kind]
+    response = bulk_upsert(get_db(), house_id, name, data)
+    invalidate_house(house_id, name)
+    return response
+
+@api.route('/update-<any(chores, "chore-instances", members, subgroups, swaps):kind>-<house_id>', methods=['PATCH'])
+def update_house_document_route(kind, house_id):
+    """
+        Changes only the given fields of a chore, chore instance, member,
+        subgroup or swap of a house, leaving its other fields as they are.
+        Known fields are type-checked (see FIELD_TYPES in utils/utils.py),
+        and any field can be set to null. Returns 404 if the document
+        doesn't exist.
+        The id field must be the ID of the document to change.
+        Request body example (for /update-chore-instances-<house_id>):
+            {'id': 'a0s9d8f', 'isDone': true}
+        Response example:
+            {'id': 'a0s9d8f', 'updated': ['isDone']}
     """
     data = request.get_json()
-    return upsert_chore(db, data, house_id)
+    name = BULK_KINDS[kind]
+    response = patch_house_document(get_db(), house_id, name, data)
+    invalidate_house(house_id, name)
+    return response
 
-@app.route('/get-user-chores', methods=['POST'])
+@api.route('/get-user-chores', methods=['POST'])
 def get_chore_by_user():
     """
         Get a list of a user's chore instances from their house in the database's house collection.
@@ -121,9 +585,13 @@ def get_chore_by_user():
         Request Example: Invoke-WebRequest -Uri http://127.0.0.1:5000/get-user-chores -Method Post -Headers @{'Content-Type'='application/json'} -Body '{ "user_id": "Iqha69gogtMJQuoWitSVgQFqI6V2", "house_id":  "ff76c4e3-64e7-4ca2-b4e6-0d7c700e05d4" }'
     """
     data = request.get_json()
-    return get_chore_instances_by_user(db, data)
+    if mirror is not None:
+        instances = mirror.get_collection(data.get('house_id'), 'choreInstances')
+        if instances is not None:
+            return [inst for inst in instances.values() if inst.get('assignee') == data.get('user_id')]
+    return get_chore_instances_by_user(get_db(), data)
 
-@app.route('/get-current-day-user-chores', methods=['POST'])
+@api.route('/get-current-day-user-chores', methods=['POST'])
 def get_current_day_chore_by_user():
     """
         Get a list of a user's chore instances from their house in the database's house collection for today.
@@ -132,74 +600,128 @@ def get_current_day_chore_by_user():
         Request Example: Invoke-WebRequest -Uri http://127.0.0.1:5000/get-current-day-user-chores -Method Post -Headers @{'Content-Type'='application/json'} -Body '{ "user_id": "Iqha69gogtMJQuoWitSVgQFqI6V2", "house_id":  "ff76c4e3-64e7-4ca2-b4e6-0d7c700e05d4" }'
     """
     data = request.get_json()
-    return get_current_day_chore_instances_by_user(db, data)
+    return get_current_day_chore_instances_by_user(get_db(), data)
 
-@app.route('/get-house-chores', methods=['POST'])
+@api.route('/get-house-chores', methods=['POST'])
 def get_chore_by_house():
     """
         Get a list of the chores in a house.
         Body:
         {  "house_id":  <house_id> }
+        The body may also contain the page options of
+        /get-house-<house_id>-chore-instances, e.g.
+        {  "house_id":  <house_id>, "limit": 50, "start_after": <id>, "fields": ["dueDate"] }
+        in which case the response is {"instances": [...], "nextStartAfter": <id or null>}
         Request Example: Invoke-WebRequest -Uri http://127.0.0.1:5000/get-house-chores -Method Post -Headers @{'Content-Type'='application/json'} -Body '{ "house_id":  "ff76c4e3-64e7-4ca2-b4e6-0d7c700e05d4" }'
     """
     data = request.get_json()
-    return get_chore_instances_by_house(db, data)
+    if mirror is not None and not any(key in data for key in PAGE_OPTIONS):
+        instances = mirror.get_collection(data.get('house_id'), 'choreInstances')
+        if instances is not None:
+            return list(instances.values())
+    return get_chore_instances_by_house(get_db(), data)
 
-@app.route('/upsert-subgroup-<house_id>', methods=['POST'])
+@api.route('/upsert-subgroup-<house_id>', methods=['POST'])
 def upsert_subgroup_route(house_id):
     """
         Creates a new subgroup under a house in the database's house
-        collection. If the subgroup already exists, then non-empty fields
-        will be updated instead.
+        collection. If the subgroup already exists, it is overwritten; to
+        change only some of its fields, use PATCH /update-subgroups-<house_id>.
     """
     try:
         data = request.get_json()
         house_ref = HOUSES.document(house_id)
         sub_ref = house_ref.collection('subgroups')
-        sub_ref.document(data.get('id')).set(data)
+        sub_ref.document(data.get('id')).set(stamp_updated(data))
+        invalidate_house(house_id, 'subgroups')
         return jsonify({'id': data.get('id')})
     except Exception as e:
         return jsonify({'error': 'Subgroup could not be added'}), 400
     
 
-@app.route('/upsert-swap-<house_id>', methods=['POST'])
+@api.route('/upsert-swap-<house_id>', methods=['POST'])
 def upsert_swap_route(house_id):
     """
         Creates a new swap under a house in the database's house
-        collection. If the swap already exists, then non-empty fields
-        will be updated instead.
+        collection. If the swap already exists, it is overwritten; to
+        change only some of its fields, use PATCH /update-swaps-<house_id>.
     """
     try:
         data = request.get_json()
         house_ref = HOUSES.document(house_id)
         swap_ref = house_ref.collection('swaps')
-        swap_ref.document(data.get('id')).set(data)
+        swap_ref.document(data.get('id')).set(stamp_updated(data))
+        invalidate_house(house_id, 'swaps')
         return jsonify({'id': data.get('id')}) 
     except Exception as e:
         return jsonify({'error': 'Swap could not be added'}), 400
 
 
-@app.route('/upsert-house', methods=['POST'])
+@api.route('/accept-swap-<house_id>', methods=['POST'])
+def accept_swap_route(house_id):
+    """
+        Accepts a pending swap: its chore instance (choreInstID) and the
+        one offered for it (offered) trade assignees and both get the
+        swap's ID as their swapID, all in one transaction.
+        The id field must be the ID of a pending swap of that house.
+    """
+    data = request.get_json()
+    response = accept_swap(get_db(), data, house_id)
+    invalidate_house(house_id, 'choreInstances', 'swaps')
+    return response
+
+
+@api.route('/upsert-house', methods=['POST'])
 def upsert_house_route():
     """
-        Updates house data. If the house already exists, then non-empty fields
-        will be updated instead.
+        Creates or overwrites a house document. To change only some of its
+        fields, use PATCH /update-house-<house_id>.
+        The house's join code is kept unique through the joinCodes
+        collection. If joinCode is omitted the house keeps its current code,
+        or gets a new one. Returns 409 if the code belongs to another house.
+        Response example:
+            {'id': <house_id>, 'joinCode': 'ZsmLvSVz53'}
     """
-    try:
-        data = request.get_json()
-        house_ref = HOUSES.document(data.get('id'))
-        house_ref.set(data)
-        return jsonify({'id': data.get('id')}) 
-    except Exception as e:
-        return jsonify({'error': 'House could not be updated'}), 400
+    data = request.get_json()
+    house_id = data.get('id')
+    key = ('house', house_id, house_id)
+
+    def write():
+        response = upsert_house(get_db(), data)
+        invalidate_house(house_id, 'house')
+        return response
+    buffer = current_app.extensions.get('write_buffer')
+    last = buffer.last(key) if buffer is not None else None
+    # a new join code is checked against the other houses' codes right away
+    hold = last is not None and data.get('joinCode') in (None, '', last.get('joinCode'))
+    response = buffered_write(key, data, write, hold=hold)
+    if response is None:
+        return jsonify({'id': house_id, 'joinCode': last.get('joinCode')})
+    return response
     
 
-@app.route('/upsert-user', methods=['POST'])
+@api.route('/update-house-<house_id>', methods=['PATCH'])
+def update_house_route(house_id):
+    """
+        Changes only the given fields of a house document. A new joinCode
+        is checked like in /upsert-house (409 if another house has it).
+        Returns 404 if the house doesn't exist.
+        Request body example:
+            {'name': 'The Burrow'}
+        Response example:
+            {'id': <house_id>, 'updated': ['name']}
+    """
+    data = request.get_json()
+    response = patch_house(get_db(), house_id, data)
+    invalidate_house(house_id, 'house')
+    return response
+
+@api.route('/upsert-user', methods=['POST'])
 def upsert_user_route():
     """
         Creates a new user in the database's user collection.
-        If the user already exists, then non-empty fields will be
-        updated instead.
+        If the user already exists, it is overwritten; to change only
+        some of its fields, use PATCH /update-user-<user_id>.
         The id field must be non-empty.
         Request body example:
             {'email': 'example@gmail.com',
@@ -209,9 +731,26 @@ def upsert_user_route():
             }
     """
     data = request.get_json()
-    return upsert_user(db, data)
+    response = upsert_user(get_db(), data)
+    cache.delete(('users', data.get('id')))
+    return response
 
-@app.route('/delete-user-<user_id>', methods=['POST'])
+@api.route('/update-user-<user_id>', methods=['PATCH'])
+def update_user_route(user_id):
+    """
+        Changes only the given fields of a user document. Returns 404 if
+        the user doesn't exist.
+        Request body example:
+            {'houseID': 'alskdjfl'}
+        Response example:
+            {'id': <user_id>, 'updated': ['houseID']}
+    """
+    data = request.get_json()
+    response = patch_user(get_db(), user_id, data)
+    cache.delete(('users', user_id))
+    return response
+
+@api.route('/delete-user-<user_id>', methods=['POST'])
 def delete_user_route(user_id):
     """
         Deletes a user in the database's user collection.
@@ -221,69 +760,65 @@ def delete_user_route(user_id):
     """
     user_ref = USERS.document(user_id)
     user_ref.delete()
+    cache.delete(('users', user_id))
     return jsonify({"id": str(user_id)}) 
 
-@app.route('/delete-chore-<house_id>', methods=['POST'])
+@api.route('/delete-chore-<house_id>', methods=['POST'])
 def delete_chore_route(house_id):
     """
         Deletes a chore in the database's house collection.
         The id field must be non-empty.
     """
     data = request.get_json()
-    house_ref = HOUSES.document(house_id)
-    chore_ref = house_ref.collection('chores').document(data.get('id'))
-    chore_ref.delete()
+    delete_house_document(get_db(), house_id, 'chores', data.get('id'))
+    invalidate_house(house_id, 'chores')
     return jsonify({"id": str(data.get('id'))}) 
 
-@app.route('/delete-chore-instance-<house_id>', methods=['POST'])
+@api.route('/delete-chore-instance-<house_id>', methods=['POST'])
 def delete_chore_instance_route(house_id):
     """
         Deletes a chore instance in the database's house collection.
         The id field must be non-empty.
     """
     data = request.get_json()
-    house_ref = HOUSES.document(house_id)
-    chore_ref = house_ref.collection('choreInstances').document(data.get('id'))
-    chore_ref.delete()
-    return jsonify({"id": str(data.get('id'))}) 
+    response = delete_chore_instance(get_db(), data, house_id)
+    invalidate_house(house_id, 'choreInstances')
+    return response
 
-@app.route('/delete-subgroup-<house_id>', methods=['POST'])
+@api.route('/delete-subgroup-<house_id>', methods=['POST'])
 def delete_subgroup_route(house_id):
     """
         Deletes a subgroup in the database's house collection.
         The id field must be non-empty.
     """
     data = request.get_json()
-    house_ref = HOUSES.document(house_id)
-    sub_ref = house_ref.collection('subgroups').document(data.get('id'))
-    sub_ref.delete()
+    delete_house_document(get_db(), house_id, 'subgroups', data.get('id'))
+    invalidate_house(house_id, 'subgroups')
     return jsonify({"id": str(data.get('id'))}) 
 
-@app.route('/delete-swap-<house_id>', methods=['POST'])
+@api.route('/delete-swap-<house_id>', methods=['POST'])
 def delete_swap_route(house_id):
     """
         Deletes a swap in the database's house collection.
         The id field must be non-empty.
     """
     data = request.get_json()
-    house_ref = HOUSES.document(house_id)
-    sub_ref = house_ref.collection('swaps').document(data.get('id'))
-    sub_ref.delete()
+    delete_house_document(get_db(), house_id, 'swaps', data.get('id'))
+    invalidate_house(house_id, 'swaps')
     return jsonify({"id": str(data.get('id'))}) 
 
-@app.route('/delete-member-<house_id>', methods=['POST'])
+@api.route('/delete-member-<house_id>', methods=['POST'])
 def delete_member_route(house_id):
     """
         Deletes a member in the database's house collection.
         The id field must be non-empty.
     """
     data = request.get_json()
-    house_ref = HOUSES.document(house_id)
-    sub_ref = house_ref.collection('members').document(data.get('id'))
-    sub_ref.delete()
+    delete_house_document(get_db(), house_id, 'members', data.get('id'))
+    invalidate_house(house_id, 'members')
     return jsonify({"id": str(data.get('id'))}) 
 
-@app.route('/add-house', methods=['POST'])
+@api.route('/add-house', methods=['POST'])
 def create_house_route():
     """
         Creates a new house in the database's houses collection.
@@ -293,181 +828,224 @@ def create_house_route():
                 'creator_user_id': 'u123'}
         If house_id already exists in the database, its data will be
         overwritten.
+        If joinCode is omitted, an unused join code is allocated. Returns
+        409 if the join code belongs to another house.
+        Response example:
+            {'id': <house_id>, 'joinCode': 'ZsmLvSVz53'}
     """
     data = request.get_json()
-    return create_house(db, data)
+    response = create_house(get_db(), data)
+    invalidate_house(data.get('id'), 'house')
+    return response
 
 
-@app.route('/delete-house-<house_id>', methods=['POST'])
+@api.route('/delete-house-<house_id>', methods=['POST'])
 def delete_house_route(house_id):
     """
         Deletes a house in the database's House collection.
-        Deletes all subcollections within.
+        Deletes all subcollections within, in parallel and in batches.
+        If the delete is interrupted, calling this again resumes it.
         The id field must be non-empty.
+        Request body example:
+            {}
+            or, to only report how many documents would be deleted,
+            {'dryRun': true}
     """
-    house_ref = HOUSES.document(house_id)
-    members_ref = house_ref.collection('members')
-    delete_collection(members_ref)
-    chore_inst_ref = house_ref.collection('choreInstances')
-    delete_collection(chore_inst_ref)
-    subgroups_ref = house_ref.collection('subgroups')
-    delete_collection(subgroups_ref)
-    chores_ref = house_ref.collection('chores')
-    delete_collection(chores_ref)
-    swaps_ref = house_ref.collection('swaps')
-    delete_collection(swaps_ref)
-    # finally, delete house
-    house_ref.delete()
-    return jsonify({"id": str(house_id)}) 
-
-@app.route('/get-house-<house_id>', methods=['GET'])
+    data = request.get_json(silent=True) or {}
+    response = delete_house(get_db(), house_id, dry_run=bool(data.get('dryRun')))
+    invalidate_house(house_id, bump=False)
+    return response
+
+@api.route('/get-house-<house_id>', methods=['GET'])
 def get_house_route(house_id):
     """
         Retrieves a house document from the database's houses collection.
         If the ID does not exist in the database, returns None.
     """
-    return get_house(db, house_id)
+    def load(etag):
+        house = mirror.get_house(house_id) if mirror is not None else None
+        if house is not None:
+            return house
+        return cached_read(('houses', house_id, 'house', etag), lambda: get_house(get_db(), house_id))
+    return conditional_read(house_id, ['house'], load)
+
+@api.route('/get-houses', methods=['POST'])
+def get_houses_route():
+    """
+        Retrieves several houses in one batched read, e.g. for a user's
+        dashboard. Takes house_ids, or user_id to read the houses the user
+        is a member of. With include_agenda, also returns user_id's chore
+        instances due today in each house.
+        Body:
+        { "house_ids": [<house_id>, ...], "user_id": <user_id>, "include_agenda": true }
+        Response example:
+            {'houses': {<house_id>: {...}}, 'notFound': [],
+             'agendas': {<house_id>: [{...}]}}
+    """
+    data = request.get_json(silent=True) or {}
+    return get_houses(get_db(), data.get('house_ids'), data.get('user_id'), bool(data.get('include_agenda')))
 
-@app.route('/get-house-join-<join_code>', methods=['GET'])
+@api.route('/get-house-join-<join_code>', methods=['GET'])
 def get_house_join_route(join_code):
     """
         Retrieves a house document from the database's houses collection with
         the matching join code.
     """
-    house_query = HOUSES.where(filter=FieldFilter("joinCode", "==", join_code))
-    house_docs = house_query.get()
-    if house_docs:
-        return house_docs[0].to_dict()
-    else:
-        return jsonify({'error': 'House with code {join_code} not found'}), 400
+    return get_house_by_join_code(get_db(), join_code)
 
-@app.route('/get-user-<user_id>', methods=['GET'])
+@api.route('/get-user-<user_id>', methods=['GET'])
 def get_user_route(user_id):
     """
         Retrieves a user's document from the database's users collection.
         If the user ID does not exist in the database, returns None.
     """
-    user_ref = USERS.document(user_id)
-    user = user_ref.get()
-    if user.exists:
-        return user.to_dict()
-    else:
+    def load():
+        user = USERS.document(user_id).get()
+        if user.exists:
+            return user.to_dict()
         return jsonify({'error': 'User with ID {user_id} not found'}), 400
+    return cached_read(('users', user_id), load)
 
-@app.route('/get-house-<house_id>-chores', methods=['GET'])
+@api.route('/get-house-<house_id>-chores', methods=['GET'])
 def get_house_chores_route(house_id):
     """
         Retrieves a house's chores collection.
         Returns None if house_id is not in the database.
     """
-    house_ref = HOUSES.document(house_id)
-    house = house_ref.get()
-    if not house.exists:
-        return jsonify({'error': 'House does not exist'}), 400
-    chores = house_ref.collection('chores').stream()
-    chore_list = {}
-    for chore in chores:
-        chore_list[chore.id] = chore.to_dict()
-
-    return chore_list
+    return read_house_collection(house_id, 'chores')
 
-@app.route('/get-house-<house_id>-swaps', methods=['GET'])
+@api.route('/get-house-<house_id>-swaps', methods=['GET'])
 def get_house_swaps_route(house_id):
     """
         Retrieves a house's swaps collection.
         Returns None if house_id is not in the database.
     """
-    house_ref = HOUSES.document(house_id)
-    house = house_ref.get()
-    if not house.exists:
-        return jsonify({'error': 'House does not exist'}), 400
-    swaps = house_ref.collection('swaps').stream()
-    swaps_list = {}
-    for swap in swaps:
-        swaps_list[swap.id] = swap.to_dict()
+    return read_house_collection(house_id, 'swaps')
 
-    return swaps_list
-
-@app.route('/get-house-<house_id>-chore-instances', methods=['GET'])
+@api.route('/get-house-<house_id>-chore-instances', methods=['GET'])
 def get_house_chore_instances_routes(house_id):
     """
         Retrieves a house's chore instances collection.
         Returns None if house_id is not in the database.
+        Any of these query parameters return a single page instead:
+            limit: page size (at most 500)
+            start_after: the nextStartAfter of the previous page
+            isDone, assignee, choreID: only return matching instances
+            dueAfter, dueBefore: only return instances due in this range
+            fields: comma-separated fields to return, e.g. fields=dueDate,isDone
+        Request example:
+            /get-house-<house_id>-chore-instances?assignee=<user_id>&isDone=false&limit=50
+        Paged response: {'choreInstances': {<id>: {...}, ...}, 'nextStartAfter': <id or null>}
     """
-    house_ref = HOUSES.document(house_id)
-    house = house_ref.get()
-    if not house.exists:
-        return jsonify({'error': 'House does not exist'}), 400
-    choreInstances = house_ref.collection('choreInstances').stream()
-    chore_instance_list = {
-
-    }
-    for instance in choreInstances:
-        chore_instance_list[instance.id] = instance.to_dict()
-
-    return chore_instance_list
+    if any(key in request.args for key in PAGE_OPTIONS):
+        try:
+            page, next_start_after = list_chore_instances(get_db(), house_id, request.args.to_dict())
+        except ValueError as e:
+            return jsonify({'error': f'Invalid page options: {e}'}), 400
+        return {'choreInstances': page, 'nextStartAfter': next_start_after}
+    return read_house_collection(house_id, 'choreInstances')
 
-@app.route('/get-house-<house_id>-members', methods=['GET'])
+@api.route('/get-house-<house_id>-members', methods=['GET'])
 def get_house_members_routes(house_id):
     """
         Retrieves a house's members collection.
         Returns None if house_id is not in the database.
     """
-    house_ref = HOUSES.document(house_id)
-    house = house_ref.get()
-    if not house.exists:
-        return jsonify({'error': 'House does not exist'}), 400
-    members = house_ref.collection('members').stream()
-    members_list = {
-
-    }
-    for member in members:
-        members_list[member.id] = member.to_dict()
-
-    return members_list
+    return read_house_collection(house_id, 'members')
 
-@app.route('/get-house-<house_id>-subgroups', methods=['GET'])
+@api.route('/get-house-<house_id>-subgroups', methods=['GET'])
 def get_house_subgroups_routes(house_id):
     """
         Retrieves a house's subgroups collection.
         Returns None if house_id is not in the database.
     """
-    house_ref = HOUSES.document(house_id)
-    house = house_ref.get()
-    if not house.exists:
-        return jsonify({'error': 'House does not exist'}), 400
-    subgroups = house_ref.collection('subgroups').stream()
-    subgroups_list = {
+    return read_house_collection(house_id, 'subgroups')
 
-    }
-    for subgroup in subgroups:
-        subgroups_list[subgroup.id] = subgroup.to_dict()
+@api.route('/get-house-<house_id>-snapshot', methods=['GET'])
+def get_house_snapshot_route(house_id):
+    """
+        Retrieves a house document together with its chores, chore
+        instances, members, subgroups and swaps collections in a single
+        request. Subcollections are read concurrently.
+        Returns an error if house_id is not in the database.
+    """
+    def load(etag):
+        if mirror is not None:
+            collections = {name: mirror.get_collection(house_id, name) for name in HOUSE_SUBCOLLECTIONS}
+            if all(docs is not None for docs in collections.values()):
+                return dict(collections, house=mirror.get_house(house_id))
+        return cached_read(('houses', house_id, 'snapshot', etag), lambda: get_house_snapshot(get_db(), house_id))
+    return conditional_read(house_id, ['house'] + HOUSE_SUBCOLLECTIONS, load)
+
+@api.route('/sync-<house_id>', methods=['GET'])
+def sync_house_route(house_id):
+    """
+        Returns the house and the documents of its chores, chore
+        instances, members, subgroups and swaps collections written since
+        the cursor returned by the client's previous sync, along with the
+        IDs of the documents deleted since. Without since (or when since
+        is older than deletes are kept for), every document is returned
+        and full is true. Returns an error if house_id is not in the database.
+        Request example:
+            /sync-<house_id>?since=2025-07-04T18:59:59.123456Z
+        Response: {'house': {...}, 'full': false, 'cursor': '2025-07-04T19:02:11.532015Z',
+                   'changes': {'choreInstances': {<id>: {...}}, 'chores': {}, ...},
+                   'deleted': {'swaps': [<id>], 'chores': [], ...}}
+    """
+    since = request.args.get('since')
+    if since:
+        since = parse_date(since)
+        if since is None:
+            return jsonify({'error': 'Invalid since cursor'}), 400
+    return get_house_changes(get_db(), house_id, since or None)
 
-    return subgroups_list
+@api.route('/get-house-<house_id>-stats', methods=['GET'])
+def get_house_stats_route(house_id):
+    """
+        Retrieves the house's chore completion counters (completed, on
+        time and late) per member and per subgroup, with each one's
+        onTimePct. The counters are kept up to date as chore instances
+        are written, so this is a single document read.
+    """
+    return get_chore_stats(get_db(), house_id)
 
-@app.route('/get-house-<house_id>-subgroup-<subgroup_id>', methods=['GET'])
+@api.route('/get-house-<house_id>-subgroup-<subgroup_id>', methods=['GET'])
 def get_house_subgroup_route(house_id, subgroup_id):
     """
         Retrieves a subgroup from a house.
         Returns None if house_id or subgroup_id is not in the database. 
     """
 
-    try:
-        house_ref = HOUSES.document(house_id)
-        house = house_ref.get()
-        if not house.exists:
-            return jsonify({'error': 'House does not exist'}), 400
-        subgroup_ref = house_ref.collection('subgroups').document(subgroup_id)
-        subgroup = subgroup_ref.get()
-        if subgroup.exists:
-            return subgroup.to_dict()
-        return jsonify({'error': 'Subgroup not found'}), 400
-    except Exception as e:
-        return jsonify({'error': 'Subgroup not found'}), 400
+    def load(etag):
+        try:
+            house_ref = HOUSES.document(house_id)
+            house = house_ref.get()
+            if not house.exists:
+                return jsonify({'error': 'House does not exist'}), 400
+            subgroup_ref = house_ref.collection('subgroups').document(subgroup_id)
+            subgroup = subgroup_ref.get()
+            if subgroup.exists:
+                return subgroup.to_dict()
+            return jsonify({'error': 'Subgroup not found'}), 400
+        except Exception as e:
+            return jsonify({'error': 'Subgroup not found'}), 400
+    return conditional_read(house_id, ['subgroups'], load)
     
+@api.route('/cache-stats', methods=['GET'])
+def cache_stats_route():
+    """
+        Returns the read cache's hit/miss counters and size, and the
+        number of houses and documents in the house mirror if it's enabled.
+    """
+    stats = cache.stats()
+    if mirror is not None:
+        stats['mirror'] = mirror.stats()
+    return jsonify(stats)
+
 # /// END Public Routes /// #
 
-# Run the app
+# Run the app with Flask's development server. In production, use
+# gunicorn with wsgi.py (see gunicorn.conf.py).
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
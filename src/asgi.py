@@ -0,0 +1,396 @@
+from quart import Quart, request, jsonify, make_response, Response
+from quart.wrappers.response import DataBody, IterableBody
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from werkzeug.exceptions import HTTPException
+import asyncio
+import contextvars
+import json
+import time
+
+from app import create_app, cache, metrics, mirror, flush_writes_for, STREAM_CACHE_LIMIT
+from houseService import house_async_utils, house_utils
+from choreService import chore_async_utils, chore_utils
+from choreService.chore_utils import PAGE_OPTIONS
+from houseService.house_utils import HOUSE_SUBCOLLECTIONS, house_etag
+from utils.utils import lazy_import
+from utils.firebase_utils import init_firebase, get_firestore_db
+from utils.metrics import RequestMetrics, instrument
+from utils.encoding import OrjsonProvider, compact_json, negotiate_encoding, should_compress, compress, compress_async_stream, mark_compressed
+
+firestore_async = lazy_import('firebase_admin.firestore_async')
+
+# /// Async Serving Mode /// #
+    # ASGI entry point in which the read routes run on firestore.AsyncClient,
+    # so one worker can keep many requests in flight while they wait on
+    # Firestore instead of tying up a thread each. Every other route is
+    # handed to the Flask app in app.py, which runs it on a thread pool,
+    # so writes behave exactly as they do in the WSGI deployment and share
+    # its read cache and house mirror (invalidations included).
+    #
+    # Run (from ./src):
+    #     uvicorn asgi:asgi_app --host 0.0.0.0 --port 5000 --workers 2
+    # or, in production,
+    #     SERVER_MODE=asgi gunicorn -c gunicorn.conf.py asgi:asgi_app
+
+async_app = Quart(__name__)
+async_app.json = OrjsonProvider(async_app)
+
+# Largest request body forwarded to the Flask app (e.g. bulk upserts)
+MAX_WSGI_BODY_BYTES = 32 * 1024 * 1024
+
+# Firestore usage of the async request being handled, set by RouteDispatcher
+current_request_metrics = contextvars.ContextVar('current_request_metrics', default=None)
+
+
+def get_db():
+    """
+        Returns the async Firestore client, creating it on first use so it
+        is bound to the worker's event loop. Tests and benchmarks can set
+        async_app.config['FIRESTORE_DB'] to use another client. During a
+        request it is wrapped to count the request's Firestore usage.
+    """
+    db = async_app.config.get('FIRESTORE_DB')
+    if db is None:
+        init_firebase()
+        db = async_app.config['FIRESTORE_DB'] = firestore_async.client()
+    request_metrics = current_request_metrics.get()
+    if request_metrics is not None:
+        return instrument(db, request_metrics)
+    return db
+
+
+async def run_sync(function, *args):
+    """
+        Runs a chore_utils function that needs a transaction (which the
+        async routes don't use) on a thread, with the sync Firestore
+        client, counting its usage towards the request.
+    """
+    db = flask_app.config.get('FIRESTORE_DB') or get_firestore_db()
+    request_metrics = current_request_metrics.get()
+    if request_metrics is not None:
+        db = instrument(db, request_metrics)
+    return await asyncio.to_thread(function, db, *args)
+
+
+@async_app.after_request
+async def add_cors_headers(response):
+    # same policy as CORS(app) in app.py. Preflight (OPTIONS) requests are
+    # answered by flask_cors, see RouteDispatcher.
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+@async_app.before_request
+async def read_compact_option():
+    compact_json.set(request.args.get('compact', '').lower() == 'true')
+
+
+@async_app.before_request
+async def flush_house_writes():
+    """
+        Flushes the Flask app's buffered writes to the house being read
+        first, as app.py does (see flush_writes_for).
+    """
+    if flask_app.extensions.get('write_buffer') is None:
+        return
+    body = await request.get_json(silent=True) if request.is_json else None
+    house_id = (request.view_args or {}).get('house_id')
+    if house_id is None and isinstance(body, dict):
+        house_id = body.get('house_id')
+    await asyncio.to_thread(flush_writes_for, flask_app, request.endpoint, house_id)
+
+
+@async_app.after_request
+async def compress_response(response):
+    """
+        Async compress_response (see app.py), configured by the Flask
+        app's COMPRESSION and COMPRESS_MIN_BYTES.
+    """
+    if not flask_app.config.get('COMPRESSION') or not should_compress(response):
+        return response
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    if isinstance(response.response, DataBody):
+        data = await response.get_data()
+        if len(data) < flask_app.config['COMPRESS_MIN_BYTES']:
+            return response
+        response.set_data(compress(data, encoding))
+    else:
+        response.response = IterableBody(compress_async_stream(response.response, encoding))
+        response.headers.pop('Content-Length', None)
+    mark_compressed(response, encoding)
+    return response
+
+
+async def cached_read(key, load):
+    """
+        Async cached_read (see app.py): returns the cached value for key,
+        awaiting load() on a miss.
+    """
+    value = cache.get(key)
+    if value is None:
+        value = await load()
+        if isinstance(value, dict):
+            cache.set(key, value)
+    return value
+
+
+async def read_house_collection(house_id, name):
+    """
+        Async read_house_collection (see app.py): house mirror, then read
+        cache, then a response streamed from Firestore.
+    """
+    async def load(etag):
+        if mirror is not None:
+            docs = mirror.get_collection(house_id, name)
+            if docs is not None:
+                return docs
+        key = ('houses', house_id, name, etag)
+        docs = cache.get(key)
+        if docs is not None:
+            return docs
+        docs = await house_async_utils.stream_house_collection(get_db(), house_id, name)
+        if isinstance(docs, tuple):
+            return docs
+        return Response(stream_json_object(key, docs), mimetype='application/json')
+    return await conditional_read(house_id, [name], load)
+
+
+async def conditional_read(house_id, names, load):
+    """
+        Async conditional_read (see app.py): 304 Not Modified if the
+        client has the current version of the given parts of the house,
+        otherwise await load(etag), tagged with that version.
+    """
+    try:
+        versions = await cached_read(('houses', house_id, 'versions'),
+                                     lambda: house_async_utils.get_house_versions(get_db(), house_id))
+    except Exception as e:
+        print(f"Error getting the write counters of house {house_id}: {e}")
+        return await load(None)
+    etag = house_etag(versions, names)
+    if request.if_none_match.contains_weak(etag):
+        response = await make_response('', 304)
+    else:
+        response = await make_response(await load(etag))
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    return response
+
+
+async def stream_json_object(key, docs):
+    """
+        Async stream_json_object (see app.py).
+    """
+    collected = {}
+    yield '{'
+    try:
+        i = 0
+        async for doc in docs:
+            data = doc.to_dict()
+            if collected is not None:
+                collected[doc.id] = data
+                if len(collected) > STREAM_CACHE_LIMIT:
+                    collected = None
+            yield ('' if i == 0 else ',') + json.dumps(doc.id) + ':' + async_app.json.dumps(data, separators=(',', ':'))
+            i += 1
+    except Exception as e:
+        print(f"Error streaming {key}: {e}")
+        return
+    yield '}'
+    if collected is not None:
+        cache.set(key, collected)
+
+
+# /// Async Routes /// #
+    # Same paths, request bodies and responses as the routes in app.py
+
+@async_app.route('/')
+async def home():
+    return "Hello, Divvy App Gateway!"
+
+@async_app.route('/get-user-chores', methods=['POST'])
+async def get_chore_by_user():
+    data = await request.get_json()
+    if mirror is not None:
+        instances = mirror.get_collection(data.get('house_id'), 'choreInstances')
+        if instances is not None:
+            return [inst for inst in instances.values() if inst.get('assignee') == data.get('user_id')]
+    return await chore_async_utils.get_chore_instances_by_user(get_db(), data)
+
+@async_app.route('/get-current-day-user-chores', methods=['POST'])
+async def get_current_day_chore_by_user():
+    data = await request.get_json()
+    instances = await chore_async_utils.get_current_day_chore_instances_by_user(get_db(), data)
+    if instances is None:
+        # first read of today's agenda: build it in a transaction
+        instances = await run_sync(chore_utils.get_current_day_chore_instances_by_user, data)
+    return instances
+
+@async_app.route('/get-house-chores', methods=['POST'])
+async def get_chore_by_house():
+    data = await request.get_json()
+    if mirror is not None and not any(key in data for key in PAGE_OPTIONS):
+        instances = mirror.get_collection(data.get('house_id'), 'choreInstances')
+        if instances is not None:
+            return list(instances.values())
+    return await chore_async_utils.get_chore_instances_by_house(get_db(), data)
+
+@async_app.route('/get-house-<house_id>', methods=['GET'])
+async def get_house_route(house_id):
+    async def load(etag):
+        house = mirror.get_house(house_id) if mirror is not None else None
+        if house is not None:
+            return house
+        return await cached_read(('houses', house_id, 'house', etag),
+                                 lambda: house_async_utils.get_house(get_db(), house_id))
+    return await conditional_read(house_id, ['house'], load)
+
+@async_app.route('/get-houses', methods=['POST'])
+async def get_houses_route():
+    data = await request.get_json(silent=True) or {}
+    user_id = data.get('user_id')
+    result = await house_async_utils.get_houses(get_db(), data.get('house_ids'), user_id, bool(data.get('include_agenda')))
+    if isinstance(result, dict) and 'agendas' in result:
+        for house_id, instances in result['agendas'].items():
+            if instances is None:
+                # first read of today's agenda: build it in a transaction
+                result['agendas'][house_id] = chore_utils.agenda_instances(
+                    await run_sync(chore_utils.build_agenda, house_id, user_id))
+    return result
+
+@async_app.route('/get-house-join-<join_code>', methods=['GET'])
+async def get_house_join_route(join_code):
+    return await house_async_utils.get_house_by_join_code(
+        get_db(), join_code, lambda house_id, code: run_sync(house_utils.backfill_join_code, house_id, code))
+
+@async_app.route('/get-user-<user_id>', methods=['GET'])
+async def get_user_route(user_id):
+    async def load():
+        user = await get_db().collection('users').document(user_id).get()
+        if user.exists:
+            return user.to_dict()
+        return jsonify({'error': 'User with ID {user_id} not found'}), 400
+    return await cached_read(('users', user_id), load)
+
+@async_app.route('/get-house-<house_id>-chores', methods=['GET'])
+async def get_house_chores_route(house_id):
+    return await read_house_collection(house_id, 'chores')
+
+@async_app.route('/get-house-<house_id>-swaps', methods=['GET'])
+async def get_house_swaps_route(house_id):
+    return await read_house_collection(house_id, 'swaps')
+
+@async_app.route('/get-house-<house_id>-chore-instances', methods=['GET'])
+async def get_house_chore_instances_routes(house_id):
+    if any(key in request.args for key in PAGE_OPTIONS):
+        try:
+            page, next_start_after = await chore_async_utils.list_chore_instances(
+                get_db(), house_id, request.args.to_dict())
+        except ValueError as e:
+            return jsonify({'error': f'Invalid page options: {e}'}), 400
+        return {'choreInstances': page, 'nextStartAfter': next_start_after}
+    return await read_house_collection(house_id, 'choreInstances')
+
+@async_app.route('/get-house-<house_id>-members', methods=['GET'])
+async def get_house_members_routes(house_id):
+    return await read_house_collection(house_id, 'members')
+
+@async_app.route('/get-house-<house_id>-subgroups', methods=['GET'])
+async def get_house_subgroups_routes(house_id):
+    return await read_house_collection(house_id, 'subgroups')
+
+@async_app.route('/get-house-<house_id>-snapshot', methods=['GET'])
+async def get_house_snapshot_route(house_id):
+    async def load(etag):
+        if mirror is not None:
+            collections = {name: mirror.get_collection(house_id, name) for name in HOUSE_SUBCOLLECTIONS}
+            if all(docs is not None for docs in collections.values()):
+                return dict(collections, house=mirror.get_house(house_id))
+        return await cached_read(('houses', house_id, 'snapshot', etag),
+                                 lambda: house_async_utils.get_house_snapshot(get_db(), house_id))
+    return await conditional_read(house_id, ['house'] + HOUSE_SUBCOLLECTIONS, load)
+
+@async_app.route('/get-house-<house_id>-stats', methods=['GET'])
+async def get_house_stats_route(house_id):
+    try:
+        stats = await chore_async_utils.get_chore_stats(get_db(), house_id)
+        if stats is None:
+            # first read of the house's counters: build them in a transaction
+            stats = chore_utils.with_on_time_pct(await run_sync(chore_utils.build_chore_stats, house_id))
+        return stats
+    except Exception as e:
+        print(f"Error getting chore stats for house {house_id}: {e}")
+        return jsonify({'error': 'Could not get chore stats'}), 500
+
+@async_app.route('/get-house-<house_id>-subgroup-<subgroup_id>', methods=['GET'])
+async def get_house_subgroup_route(house_id, subgroup_id):
+    return await conditional_read(house_id, ['subgroups'],
+                                  lambda etag: house_async_utils.get_subgroup(get_db(), house_id, subgroup_id))
+
+# /// END Async Routes /// #
+
+
+class RouteDispatcher:
+    """
+    ASGI app that serves requests matching an async route with the Quart
+    app, and hands everything else to the Flask app. Requests served by
+    the Quart app are recorded in app.py's metrics here (the Flask app
+    records its own).
+    """
+
+    def __init__(self, async_app, wsgi_app):
+        self.async_app = async_app
+        self.flask_app = wsgi_app
+        self.wsgi_app = AsyncioWSGIMiddleware(wsgi_app, max_body_size=MAX_WSGI_BODY_BYTES)
+        self._routes = async_app.url_map.bind('localhost')
+
+    def match(self, path, method):
+        """
+            Returns the async route (URL rule) serving the request, or None.
+        """
+        if method == 'OPTIONS':
+            return None
+        try:
+            return self._routes.match(path, method=method, return_rule=True)[0].rule
+        except HTTPException:
+            return None
+
+    def is_async(self, path, method):
+        return self.match(path, method) is not None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.async_app(scope, receive, send)
+        route = self.match(scope['path'], scope['method'])
+        if route is None:
+            return await self.wsgi_app(scope, receive, send)
+
+        start = time.perf_counter()
+        request_metrics = RequestMetrics()
+        server_timing = self.flask_app.config.get('SERVER_TIMING')
+        status = None
+
+        async def send_and_record(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if server_timing:
+                    header = request_metrics.server_timing(time.perf_counter() - start)
+                    message = dict(message, headers=list(message.get('headers', [])) + [(b'server-timing', header.encode())])
+            await send(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                metrics.observe(route, scope['method'], status, time.perf_counter() - start, request_metrics)
+
+        # Quart copies the context into the tasks handling the request
+        token = current_request_metrics.set(request_metrics)
+        try:
+            return await self.async_app(scope, receive, send_and_record)
+        finally:
+            current_request_metrics.reset(token)
+
+
+flask_app = create_app()
+asgi_app = RouteDispatcher(async_app, flask_app)
@@ -0,0 +1,601 @@
+import argparse
+import asyncio
+import datetime
+import importlib
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.fake_firestore import FakeFirestore
+from utils.utils import MAX_BATCH_WRITES, format_date
+
+# /// Route Benchmarks /// #
+    # Drives every route in app.py against the in-memory Firestore in
+    # utils/fake_firestore.py, filled with synthetic houses of a
+    # configurable size, and reports requests per second, p50/p95/p99
+    # latency, response size and Firestore round trips per route.
+    # Nothing touches the network: Firestore's latency is simulated by
+    # sleeping --latency-ms on every round trip.
+    #
+    # --mode asgi runs the same requests against the async serving mode
+    # (asgi.py) instead, with --concurrency requests in flight on one
+    # event loop.
+    #
+    # Save a run with --json and compare later runs against it with
+    # --baseline to catch regressions; the exit code is 1 if any route's
+    # p95 got more than --tolerance slower.
+    #
+    # --cold-start instead times how long a fresh process takes to import
+    # app.py and serve its first request, against COLD_START_BUDGET_SECONDS.
+    #
+    # Usage (from ./src):
+    #     python -m benchmarks.bench_routes [--houses 5] [--members 6] [--chores 20]
+    #         [--instances 500] [--requests 200] [--concurrency 8] [--latency-ms 5]
+    #         [--mode wsgi|asgi] [--routes get-house,get-house-snapshot]
+    #         [--json out.json] [--baseline out.json]
+    #     python -m benchmarks.bench_routes --cold-start
+
+# A new worker must import app.py and serve its first request within this
+# many seconds (currently ~0.15s, nearly all of it importing Flask)
+COLD_START_BUDGET_SECONDS = 0.5
+
+# Run in a fresh interpreter by measure_cold_start
+COLD_START_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+create_app().test_client().get('/')
+print(json.dumps({'seconds': time.perf_counter() - start,
+                  'firestoreImported': 'firebase_admin' in sys.modules or 'google.cloud.firestore_v1' in sys.modules}))
+'''
+
+BENCH_NAMESPACE = uuid.UUID('6f1c0d43-36a5-4f57-9c3e-8a3f5f0a6c11')
+
+# A benchmarked request. `endpoint` is the view function's name in app.py and
+# request(fixture, i) returns the (path, json body) of the i-th request.
+Route = namedtuple('Route', ['name', 'endpoint', 'method', 'request'])
+
+
+def _id(*parts):
+    return str(uuid.uuid5(BENCH_NAMESPACE, '-'.join(str(part) for part in parts)))
+
+
+class Fixture:
+    """
+    The synthetic houses and users the benchmarked requests refer to.
+    """
+
+    def __init__(self, houses, users, disposable_houses):
+        self.houses = houses
+        self.users = users
+        self.disposable_houses = disposable_houses
+
+    def house(self, i):
+        return self.houses[i % len(self.houses)]
+
+
+def seed_house(db, house_id, members=6, chores=20, instances=500, now=None):
+    """
+    Writes a synthetic house: its members, subgroups, weekly chores, chore
+    instances spread over two weeks either side of today, and swaps.
+
+    Returns:
+        dict: The IDs written, {'id', 'joinCode', 'members', 'subgroups', 'chores', 'instances', 'swaps'}
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    today = datetime.datetime.combine(now.date(), datetime.time(12), tzinfo=datetime.timezone.utc)
+    house_ref = db.collection('houses').document(house_id)
+    member_ids = [_id(house_id, 'member', i) for i in range(members)]
+    subgroup_ids = [_id(house_id, 'subgroup', i) for i in range(max(1, members // 3))]
+    chore_ids = [_id(house_id, 'chore', i) for i in range(chores)]
+    join_code = uuid.uuid5(BENCH_NAMESPACE, house_id).hex[:10]
+    docs = [
+        (house_ref, {'id': house_id, 'name': f'House {house_id[:8]}', 'members': member_ids,
+                     'dateCreated': today - datetime.timedelta(days=90), 'imageID': 'house1', 'joinCode': join_code}),
+        (db.collection('joinCodes').document(join_code), {'code': join_code, 'houseID': house_id})
+    ]
+    for i, member_id in enumerate(member_ids):
+        docs.append((house_ref.collection('members').document(member_id), {
+            'id': member_id, 'name': f'Member {i}', 'email': f'member{i}@divvy.com', 'onTimePct': '80',
+            'profilePicture': 'lightGreen', 'chores': chore_ids[i::members],
+            'subgroups': [subgroup_ids[i % len(subgroup_ids)]], 'dateJoined': today - datetime.timedelta(days=60)
+        }))
+    for i, subgroup_id in enumerate(subgroup_ids):
+        docs.append((house_ref.collection('subgroups').document(subgroup_id), {
+            'id': subgroup_id, 'name': f'Subgroup {i}', 'members': member_ids[i::len(subgroup_ids)]
+        }))
+    for i, chore_id in enumerate(chore_ids):
+        docs.append((house_ref.collection('chores').document(chore_id), {
+            'id': chore_id, 'name': f'Chore {i}', 'description': 'A useful desc.', 'emoji': '🧹',
+            'assignees': [member_ids[i % members], member_ids[(i + 1) % members]],
+            'frequencyPattern': 'weekly', 'frequencyDays': [str(i % 7 + 1)],
+            'startDate': today - datetime.timedelta(days=28)
+        }))
+    instance_ids = []
+    for i in range(instances):
+        instance_id = _id(house_id, 'instance', i)
+        instance_ids.append(instance_id)
+        due = today + datetime.timedelta(days=i % 29 - 14)
+        docs.append((house_ref.collection('choreInstances').document(instance_id), {
+            'id': instance_id, 'choreID': chore_ids[i % chores], 'assignee': member_ids[i % members],
+            'dueDate': due, 'isDone': due < today, 'doneOnTime': due < today and i % 4 != 0, 'swapID': ''
+        }))
+    swap_ids = [_id(house_id, 'swap', i) for i in range(min(instances, members))]
+    for i, swap_id in enumerate(swap_ids):
+        docs.append((house_ref.collection('swaps').document(swap_id), {
+            'id': swap_id, 'choreID': chore_ids[i % chores], 'choreInstID': instance_ids[i],
+            'from': member_ids[i % members], 'to': member_ids[(i + 1) % members],
+            'status': 'pending', 'offered': instance_ids[(i + 1) % instances]
+        }))
+
+    for start in range(0, len(docs), MAX_BATCH_WRITES):
+        batch = db.batch()
+        for ref, data in docs[start:start + MAX_BATCH_WRITES]:
+            batch.set(ref, data)
+        batch.commit()
+    return {'id': house_id, 'joinCode': join_code, 'members': member_ids, 'subgroups': subgroup_ids,
+            'chores': chore_ids, 'instances': instance_ids, 'swaps': swap_ids}
+
+
+def seed(db, houses=5, members=6, chores=20, instances=500, disposable_houses=0):
+    """
+    Fills db with synthetic houses and one user per member, plus small
+    disposable houses for the routes that can only be called once per
+    house or swap (accept-swap and delete-house).
+
+    Returns:
+        Fixture: The IDs of everything written.
+    """
+    seeded = [seed_house(db, _id('house', i), members, chores, instances) for i in range(houses)]
+    users = []
+    for house in seeded:
+        for member_id in house['members']:
+            db.collection('users').document(member_id).set({
+                'id': member_id, 'email': f'{member_id[:8]}@divvy.com', 'houseID': house['id'], 'name': 'Member'
+            })
+            users.append(member_id)
+    disposable = [seed_house(db, _id('disposable', i), 2, 2, 10) for i in range(disposable_houses)]
+    return Fixture(seeded, users, disposable)
+
+
+def _member(house, i):
+    return house['members'][i % len(house['members'])]
+
+
+def _instance(house, i):
+    return house['instances'][i % len(house['instances'])]
+
+
+def _user_chores(fixture, i):
+    house = fixture.house(i)
+    return {'user_id': _member(house, i), 'house_id': house['id']}
+
+
+def _today():
+    return format_date(datetime.datetime.now(datetime.timezone.utc))
+
+
+def _an_hour_ago():
+    return (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def _get(path):
+    return lambda fixture, i: (path(fixture.house(i), i), None)
+
+
+def _post(path, body):
+    return lambda fixture, i: (path(fixture.house(i), i), body(fixture.house(i), i))
+
+
+# Reads come first and deletes last, so reads see the seeded data
+ROUTES = [
+    Route('home', 'home', 'GET', lambda fixture, i: ('/', None)),
+    Route('ready', 'readiness_route', 'GET', lambda fixture, i: ('/ready', None)),
+    Route('metrics', 'metrics_route', 'GET', lambda fixture, i: ('/metrics', None)),
+    Route('get-house', 'get_house_route', 'GET', _get(lambda h, i: f"/get-house-{h['id']}")),
+    Route('get-house-join', 'get_house_join_route', 'GET', _get(lambda h, i: f"/get-house-join-{h['joinCode']}")),
+    Route('get-user', 'get_user_route', 'GET', lambda fixture, i: (f"/get-user-{fixture.users[i % len(fixture.users)]}", None)),
+    Route('get-house-chores-collection', 'get_house_chores_route', 'GET', _get(lambda h, i: f"/get-house-{h['id']}-chores")),
+    Route('get-house-swaps', 'get_house_swaps_route', 'GET', _get(lambda h, i: f"/get-house-{h['id']}-swaps")),
+    Route('get-house-chore-instances', 'get_house_chore_instances_routes', 'GET',
+          _get(lambda h, i: f"/get-house-{h['id']}-chore-instances")),
+    Route('get-house-chore-instances-page', 'get_house_chore_instances_routes', 'GET',
+          _get(lambda h, i: f"/get-house-{h['id']}-chore-instances?assignee={_member(h, i)}&isDone=false&limit=50")),
+    Route('get-house-members', 'get_house_members_routes', 'GET', _get(lambda h, i: f"/get-house-{h['id']}-members")),
+    Route('get-house-subgroups', 'get_house_subgroups_routes', 'GET', _get(lambda h, i: f"/get-house-{h['id']}-subgroups")),
+    Route('get-house-subgroup', 'get_house_subgroup_route', 'GET',
+          _get(lambda h, i: f"/get-house-{h['id']}-subgroup-{h['subgroups'][i % len(h['subgroups'])]}")),
+    Route('get-house-snapshot', 'get_house_snapshot_route', 'GET', _get(lambda h, i: f"/get-house-{h['id']}-snapshot")),
+    Route('get-house-stats', 'get_house_stats_route', 'GET', _get(lambda h, i: f"/get-house-{h['id']}-stats")),
+    Route('sync-full', 'sync_house_route', 'GET', _get(lambda h, i: f"/sync-{h['id']}")),
+    Route('sync-delta', 'sync_house_route', 'GET', _get(lambda h, i: f"/sync-{h['id']}?since={_an_hour_ago()}")),
+    Route('get-user-chores', 'get_chore_by_user', 'POST', lambda fixture, i: ('/get-user-chores', _user_chores(fixture, i))),
+    Route('get-current-day-user-chores', 'get_current_day_chore_by_user', 'POST',
+          lambda fixture, i: ('/get-current-day-user-chores', _user_chores(fixture, i))),
+    Route('get-house-chores', 'get_chore_by_house', 'POST', _post(lambda h, i: '/get-house-chores', lambda h, i: {'house_id': h['id']})),
+    Route('get-house-chores-page', 'get_chore_by_house', 'POST',
+          _post(lambda h, i: '/get-house-chores', lambda h, i: {'house_id': h['id'], 'limit': 50, 'isDone': False})),
+    Route('get-houses', 'get_houses_route', 'POST', lambda fixture, i: (
+        '/get-houses', {'house_ids': [house['id'] for house in fixture.houses]})),
+    Route('get-houses-agenda', 'get_houses_route', 'POST', lambda fixture, i: (
+        '/get-houses', {'user_id': _member(fixture.house(i), i), 'include_agenda': True})),
+    Route('cache-stats', 'cache_stats_route', 'GET', lambda fixture, i: ('/cache-stats', None)),
+    Route('upsert-member', 'upsert_member_route', 'POST', _post(
+        lambda h, i: f"/upsert-member-{h['id']}",
+        lambda h, i: {'id': _member(h, i), 'name': f'Member {i}', 'email': 'member@divvy.com', 'onTimePct': '80',
+                      'profilePicture': 'lightGreen', 'chores': [], 'subgroups': [], 'dateJoined': _today()})),
+    # one member edited over and over, as while a user edits their profile
+    # (coalesced with WRITE_BUFFER_SECONDS set)
+    Route('upsert-member-burst', 'upsert_member_route', 'POST', _post(
+        lambda h, i: f"/upsert-member-{h['id']}",
+        lambda h, i: {'id': h['members'][0], 'name': f'Member {i}', 'email': 'member@divvy.com', 'onTimePct': '80',
+                      'profilePicture': 'lightGreen', 'chores': [], 'subgroups': [], 'dateJoined': _today()})),
+    Route('upsert-chore-instance', 'upsert_chore_instance_route', 'POST', _post(
+        lambda h, i: f"/upsert-chore-instance-{h['id']}",
+        lambda h, i: {'id': _instance(h, i), 'choreID': h['chores'][i % len(h['chores'])], 'assignee': _member(h, i),
+                      'dueDate': _today(), 'isDone': i % 2 == 0, 'doneOnTime': i % 2 == 0, 'swapID': ''})),
+    Route('update-chore-instance', 'update_house_document_route', 'PATCH', _post(
+        lambda h, i: f"/update-chore-instances-{h['id']}", lambda h, i: {'id': _instance(h, i), 'isDone': i % 2 == 0})),
+    Route('update-member', 'update_house_document_route', 'PATCH', _post(
+        lambda h, i: f"/update-members-{h['id']}", lambda h, i: {'id': _member(h, i), 'name': f'Member {i}'})),
+    Route('upsert-chore', 'upsert_chore_route', 'POST', _post(
+        lambda h, i: f"/upsert-chore-{h['id']}",
+        lambda h, i: {'id': h['chores'][i % len(h['chores'])], 'name': f'Chore {i}', 'description': 'A useful desc.',
+                      'emoji': '🧹', 'assignees': h['members'][:2], 'frequencyPattern': 'weekly',
+                      'frequencyDays': ['3'], 'startDate': _today()})),
+    Route('generate-chore-instances', 'generate_chore_instances_route', 'POST', _post(
+        lambda h, i: f"/generate-chore-instances-{h['id']}",
+        lambda h, i: {'id': h['chores'][i % len(h['chores'])], 'horizonDays': 14})),
+    Route('bulk-upsert-subgroups', 'bulk_upsert_route', 'POST', _post(
+        lambda h, i: f"/bulk-upsert-subgroups-{h['id']}",
+        lambda h, i: [{'id': subgroup_id, 'name': f'Subgroup {i}', 'members': h['members'][:2]}
+                      for subgroup_id in h['subgroups']])),
+    Route('upsert-subgroup', 'upsert_subgroup_route', 'POST', _post(
+        lambda h, i: f"/upsert-subgroup-{h['id']}",
+        lambda h, i: {'id': h['subgroups'][i % len(h['subgroups'])], 'name': f'Subgroup {i}', 'members': h['members'][:2]})),
+    Route('upsert-swap', 'upsert_swap_route', 'POST', _post(
+        lambda h, i: f"/upsert-swap-{h['id']}",
+        lambda h, i: {'id': h['swaps'][i % len(h['swaps'])], 'choreID': h['chores'][0], 'choreInstID': _instance(h, i),
+                      'from': _member(h, i), 'to': _member(h, i + 1), 'status': 'pending', 'offered': _today()})),
+    Route('accept-swap', 'accept_swap_route', 'POST', lambda fixture, i: (
+        f"/accept-swap-{fixture.disposable_houses[i % len(fixture.disposable_houses)]['id']}",
+        {'id': fixture.disposable_houses[i % len(fixture.disposable_houses)]['swaps'][0]})),
+    Route('upsert-house', 'upsert_house_route', 'POST', _post(
+        lambda h, i: '/upsert-house',
+        lambda h, i: {'id': h['id'], 'name': f'House {i}', 'members': h['members'], 'imageID': 'house1',
+                      'joinCode': h['joinCode']})),
+    Route('update-house', 'update_house_route', 'PATCH', _post(
+        lambda h, i: f"/update-house-{h['id']}", lambda h, i: {'name': f'House {i}'})),
+    Route('add-house', 'create_house_route', 'POST', lambda fixture, i: ('/add-house', {
+        'id': _id('new-house', i), 'name': f'New House {i}', 'members': [fixture.users[0]],
+        'dateCreated': _today(), 'imageID': 'house1'})),
+    Route('upsert-user', 'upsert_user_route', 'POST', lambda fixture, i: ('/upsert-user', {
+        'id': fixture.users[i % len(fixture.users)], 'email': 'member@divvy.com',
+        'houseID': fixture.house(i)['id'], 'name': f'Member {i}'})),
+    Route('update-user', 'update_user_route', 'PATCH', lambda fixture, i: (
+        f"/update-user-{fixture.users[i % len(fixture.users)]}", {'name': f'Member {i}'})),
+    Route('delete-chore-instance', 'delete_chore_instance_route', 'POST', _post(
+        lambda h, i: f"/delete-chore-instance-{h['id']}", lambda h, i: {'id': _instance(h, i)})),
+    Route('delete-swap', 'delete_swap_route', 'POST', _post(
+        lambda h, i: f"/delete-swap-{h['id']}", lambda h, i: {'id': h['swaps'][i % len(h['swaps'])]})),
+    Route('delete-chore', 'delete_chore_route', 'POST', _post(
+        lambda h, i: f"/delete-chore-{h['id']}", lambda h, i: {'id': h['chores'][i % len(h['chores'])]})),
+    Route('delete-subgroup', 'delete_subgroup_route', 'POST', _post(
+        lambda h, i: f"/delete-subgroup-{h['id']}", lambda h, i: {'id': h['subgroups'][i % len(h['subgroups'])]})),
+    Route('delete-member', 'delete_member_route', 'POST', _post(
+        lambda h, i: f"/delete-member-{h['id']}", lambda h, i: {'id': _member(h, i)})),
+    Route('delete-user', 'delete_user_route', 'POST', lambda fixture, i: (
+        f"/delete-user-{fixture.users[i % len(fixture.users)]}", {})),
+    Route('delete-house', 'delete_house_route', 'POST', lambda fixture, i: (
+        f"/delete-house-{fixture.disposable_houses[i % len(fixture.disposable_houses)]['id']}", {})),
+]
+
+
+def load_app(db):
+    """
+    Creates the Flask app with db as its Firestore client.
+
+    Returns:
+        Flask: The app.
+    """
+    import app as app_module
+    from houseService.house_utils import join_code_cache
+    app_module.cache.clear()
+    join_code_cache.clear()
+    return app_module.create_app({'FIRESTORE_DB': db})
+
+
+def load_asgi(db):
+    """
+    Loads asgi.py with its Flask app using db (see load_app), and its
+    async routes using db's AsyncClient stand-in.
+
+    Returns:
+        module: The asgi module.
+    """
+    load_app(db)
+    module = importlib.reload(sys.modules['asgi']) if 'asgi' in sys.modules else importlib.import_module('asgi')
+    module.flask_app.config['FIRESTORE_DB'] = db
+    module.async_app.config['FIRESTORE_DB'] = db.async_client()
+    return module
+
+
+def measure_cold_start(runs=5):
+    """
+    Times COLD_START_SCRIPT in fresh interpreters, i.e. what a new worker
+    spends before it can answer its first request. Interpreter startup
+    itself isn't included.
+
+    Returns:
+        dict: {'median': <seconds>, 'max': <seconds>, 'firestoreImported': <bool>}
+    """
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    measurements = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], cwd=src,
+                                capture_output=True, text=True, check=True).stdout
+        measurements.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = [m['seconds'] for m in measurements]
+    return {
+        'median': statistics.median(seconds),
+        'max': max(seconds),
+        'firestoreImported': any(m['firestoreImported'] for m in measurements)
+    }
+
+
+async def asgi_request(asgi_app, method, path, body=None, headers=None):
+    """
+    Sends one HTTP request straight to an ASGI app, with any extra headers
+    ({name: value}).
+
+    Returns:
+        tuple: (status code, response body bytes)
+    """
+    path, _, query = path.partition('?')
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+        'headers': [(b'host', b'localhost'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(payload)).encode())]
+                   + [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    }
+    done = asyncio.Event()
+    sent = [False]
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        if not sent[0]:
+            sent[0] = True
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+            if not message.get('more_body'):
+                done.set()
+
+    await asgi_app(scope, receive, send)
+    done.set()
+    return response['status'], b''.join(response['body'])
+
+
+def uncovered_endpoints(flask_app, routes=ROUTES):
+    """
+    Returns the endpoints of the app that no benchmark route exercises.
+    """
+    covered = {route.endpoint for route in routes}
+    return sorted(endpoint for endpoint in flask_app.view_functions
+                  if endpoint != 'static' and endpoint.split('.')[-1] not in covered)
+
+
+def percentile(sorted_values, pct):
+    """
+    Returns the nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def request_options(path, encoding=None, compact=False):
+    """
+    Applies the --accept-encoding and --compact options to a request.
+
+    Returns:
+        tuple: (path, headers)
+    """
+    if compact:
+        path += ('&' if '?' in path else '?') + 'compact=true'
+    return path, {'Accept-Encoding': encoding} if encoding else {}
+
+
+def run_route(flask_app, db, route, fixture, requests=200, concurrency=8, encoding=None, compact=False):
+    """
+    Sends requests requests for one route from concurrency threads,
+    accepting the given Accept-Encoding and asking for compact JSON if
+    compact is set. avgBytes counts response bodies as sent, i.e.
+    compressed if they were.
+
+    Returns:
+        dict: {'route', 'requests', 'errors', 'reqPerSec', 'p50Ms', 'p95Ms', 'p99Ms', 'avgBytes', 'cpuMsPerRequest', 'rpcsPerRequest'}
+    """
+    local = threading.local()
+
+    def call(i):
+        if not hasattr(local, 'client'):
+            local.client = flask_app.test_client()
+        path, body = route.request(fixture, i)
+        path, headers = request_options(path, encoding, compact)
+        start = time.perf_counter()
+        response = local.client.open(path, method=route.method, json=body, headers=headers)
+        size = len(response.get_data())   # drains streamed responses
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            print(f"{route.name}: {response.status_code} from {path}")
+        return elapsed, size, response.status_code
+
+    db.reset_stats()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    return summarize(route, db, results, time.perf_counter() - start, time.process_time() - cpu_start)
+
+
+async def run_route_async(asgi_app, db, route, fixture, requests=200, concurrency=8, encoding=None, compact=False):
+    """
+    Sends requests requests for one route to an ASGI app, with at most
+    concurrency of them in flight.
+
+    Returns:
+        dict: See run_route.
+    """
+    in_flight = asyncio.Semaphore(concurrency)
+
+    async def call(i):
+        path, body = route.request(fixture, i)
+        path, headers = request_options(path, encoding, compact)
+        async with in_flight:
+            start = time.perf_counter()
+            status, data = await asgi_request(asgi_app, route.method, path, body, headers)
+            elapsed = time.perf_counter() - start
+        if status >= 400:
+            print(f"{route.name}: {status} from {path}")
+        return elapsed, len(data), status
+
+    db.reset_stats()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    results = await asyncio.gather(*(call(i) for i in range(requests)))
+    return summarize(route, db, results, time.perf_counter() - start, time.process_time() - cpu_start)
+
+
+def summarize(route, db, results, wall, cpu=0.0):
+    """
+    Summarizes the (seconds, response bytes, status) results of one route,
+    which took wall seconds and used cpu seconds of CPU time (of the whole
+    process, so including the clients and the in-memory Firestore).
+    """
+    requests = len(results)
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in results)
+    return {
+        'route': route.name,
+        'requests': requests,
+        'errors': sum(1 for _, _, status in results if status >= 400),
+        'reqPerSec': round(requests / wall, 1) if wall else 0.0,
+        'p50Ms': round(percentile(latencies, 50), 2),
+        'p95Ms': round(percentile(latencies, 95), 2),
+        'p99Ms': round(percentile(latencies, 99), 2),
+        'avgBytes': round(sum(size for _, size, _ in results) / requests),
+        'cpuMsPerRequest': round(cpu * 1000 / requests, 2),
+        'rpcsPerRequest': round(db.stats['rpcs'] / requests, 2)
+    }
+
+
+def run_benchmark(houses=5, members=6, chores=20, instances=500, requests=200, concurrency=8,
+                  latency_ms=5.0, route_names=None, db=None, mode='wsgi', encoding=None, compact=False):
+    """
+    Seeds an in-memory Firestore, loads app.py (or asgi.py, with
+    mode='asgi') against it and benchmarks the selected routes (default:
+    all of them) in ROUTES order, accepting the given Accept-Encoding and
+    asking for compact JSON if compact is set.
+
+    Returns:
+        list: One run_route result per route.
+    """
+    routes = [route for route in ROUTES if not route_names or route.name in route_names]
+    db = db or FakeFirestore()
+    db.latency = 0
+    needs_disposable = any(route.endpoint in ('accept_swap_route', 'delete_house_route') for route in routes)
+    fixture = seed(db, houses, members, chores, instances, requests if needs_disposable else 0)
+    flask_app = load_app(db)
+    missing = uncovered_endpoints(flask_app)
+    if missing:
+        print(f"Warning: no benchmark for {', '.join(missing)}")
+    db.latency = latency_ms / 1000
+    if mode == 'asgi':
+        asgi_app = load_asgi(db).asgi_app
+
+        async def run_all():
+            return [await run_route_async(asgi_app, db, route, fixture, requests, concurrency, encoding, compact)
+                    for route in routes]
+        return asyncio.run(run_all())
+    return [run_route(flask_app, db, route, fixture, requests, concurrency, encoding, compact) for route in routes]
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Returns the routes whose p95 latency is more than tolerance slower than in baseline.
+    """
+    previous = {result['route']: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result['route'])
+        if before and before['p95Ms'] and result['p95Ms'] > before['p95Ms'] * (1 + tolerance):
+            regressions.append(f"{result['route']}: p95 {before['p95Ms']}ms -> {result['p95Ms']}ms")
+    return regressions
+
+
+def print_results(results):
+    columns = ['route', 'requests', 'errors', 'reqPerSec', 'p50Ms', 'p95Ms', 'p99Ms', 'avgBytes', 'cpuMsPerRequest', 'rpcsPerRequest']
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print('  '.join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print('  '.join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every route against an in-memory Firestore.')
+    parser.add_argument('--houses', type=int, default=5, help='synthetic houses to seed')
+    parser.add_argument('--members', type=int, default=6, help='members per house')
+    parser.add_argument('--chores', type=int, default=20, help='chores per house')
+    parser.add_argument('--instances', type=int, default=500, help='chore instances per house')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='simulated latency of each Firestore round trip')
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'], default='wsgi', help='serve with app.py or asgi.py')
+    parser.add_argument('--accept-encoding', help="Accept-Encoding header to send, e.g. 'gzip' or 'br, gzip'")
+    parser.add_argument('--compact', action='store_true', help='ask for compact JSON (?compact=true)')
+    parser.add_argument('--routes', help='comma-separated route names to run (default: all)')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--baseline', help='results file of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 slowdown against the baseline')
+    parser.add_argument('--cold-start', action='store_true', help='only measure the cold start time')
+    args = parser.parse_args(argv)
+
+    if args.cold_start:
+        cold_start = measure_cold_start()
+        print(f"cold start: median {cold_start['median'] * 1000:.0f}ms, max {cold_start['max'] * 1000:.0f}ms "
+              f"(budget {COLD_START_BUDGET_SECONDS * 1000:.0f}ms), Firestore imported: {cold_start['firestoreImported']}")
+        return 1 if cold_start['median'] > COLD_START_BUDGET_SECONDS else 0
+
+    results = run_benchmark(args.houses, args.members, args.chores, args.instances, args.requests,
+                            args.concurrency, args.latency_ms, args.routes.split(',') if args.routes else None,
+                            mode=args.mode, encoding=args.accept_encoding, compact=args.compact)
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+
+# Bad practice but tests won't work without it because Python Modules
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from benchmarks.bench_routes import ROUTES, run_benchmark, percentile, compare, measure_cold_start
+
+
+class TestBenchmarks(unittest.TestCase):
+    """
+    Runs every benchmark once on a tiny house, so a route that starts
+    failing (or a new route without a benchmark) breaks the build.
+    """
+
+    def test_every_route_runs_without_errors(self):
+        results = run_benchmark(houses=1, members=3, chores=3, instances=20, requests=3,
+                                concurrency=2, latency_ms=0)
+
+        self.assertEqual([result['route'] for result in results], [route.name for route in ROUTES])
+        for result in results:
+            self.assertEqual(result['errors'], 0, result['route'])
+
+    def test_every_route_runs_in_asgi_mode(self):
+        results = run_benchmark(houses=1, members=3, chores=3, instances=20, requests=3,
+                                concurrency=2, latency_ms=0, mode='asgi')
+
+        for result in results:
+            self.assertEqual(result['errors'], 0, result['route'])
+
+    def test_every_endpoint_has_a_benchmark(self):
+        from benchmarks.bench_routes import load_app, uncovered_endpoints
+        from utils.fake_firestore import FakeFirestore
+        self.assertEqual(uncovered_endpoints(load_app(FakeFirestore())), [])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_compare_flags_slower_routes(self):
+        baseline = [{'route': 'get-house', 'p95Ms': 10.0}, {'route': 'get-user', 'p95Ms': 10.0}]
+        results = [{'route': 'get-house', 'p95Ms': 11.0}, {'route': 'get-user', 'p95Ms': 13.0}]
+        self.assertEqual(compare(results, baseline, tolerance=0.2), ['get-user: p95 10.0ms -> 13.0ms'])
+
+    def test_cold_start_defers_firestore(self):
+        # the time itself is checked by --cold-start, since CI runners are too noisy for a budget
+        self.assertFalse(measure_cold_start(runs=1)['firestoreImported'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@ import sys
 sys.path.append('../')
 import unittest
 from unittest.mock import MagicMock, patch
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
 import sys
@@ -21,9 +21,28 @@ from choreService.chore_utils import (
     upsert_chore_instance,
     get_chore_instances_by_user,
     get_chore_instances_by_house,
-    get_current_day_chore_instances_by_user
+    get_current_day_chore_instances_by_user,
+    get_chore_occurrences,
+    generate_chore_instances,
+    write_chore_instances,
+    list_chore_instances,
+    delete_chore_instance,
+    current_day_query,
+    agenda_id,
+    build_chore_stats,
+    get_chore_stats,
+    accept_swap,
+    mark_overdue_instances,
+    roll_over_chores,
+    AGENDA_CHUNK_SIZE
 )
+from choreService import chore_async_utils
+from houseService.house_utils import bulk_upsert
+from utils.recompute_stats import recompute_all_stats
+from utils.utils import format_date
+from utils.fake_firestore import FakeFirestore
 from flask import Flask
+import asyncio
 
 
 class TestChoreService(unittest.TestCase):
@@ -54,18 +73,30 @@ class TestChoreService(unittest.TestCase):
 
     @patch('choreService.chore_utils.jsonify')
     def test_upsert_chore_instance_success(self, mock_jsonify):
+        db = FakeFirestore()
         data = {'id': 'inst1', 'choreID': 'ch1'}
         mock_jsonify.side_effect = lambda x: x  # return argument for easy checking
 
-        result = upsert_chore_instance(self.mock_db, data, 'house1')
+        result = upsert_chore_instance(db, data, 'house1')
 
-        self.mock_db.collection.assert_called_with('houses')
-        self.mock_houses_collection.document.assert_called_with('house1')
-        self.mock_house_doc.collection.assert_called_with('choreInstances')
-        self.mock_chore_instances_collection.document.assert_called_with('inst1')
-        self.mock_chore_instance_doc.set.assert_called_with(data)
+        stored = db.collection('houses').document('house1').collection('choreInstances').document('inst1').get().to_dict()
+        self.assertIsInstance(stored.pop('updatedAt'), datetime)
+        self.assertEqual(stored, data)
         self.assertEqual(result, {'id': 'inst1'})
 
+    @patch('choreService.chore_utils.jsonify')
+    def test_upsert_chore_instance_stores_due_date_as_timestamp(self, mock_jsonify):
+        db = FakeFirestore()
+        data = {'id': 'inst1', 'choreID': 'ch1', 'dueDate': 'Fri, 04 Jul 2025 18:59:59 GMT'}
+        mock_jsonify.side_effect = lambda x: x
+
+        upsert_chore_instance(db, data, 'house1')
+
+        stored = db.collection('houses').document('house1').collection('choreInstances').document('inst1').get()
+        self.assertEqual(stored.get('dueDate'), datetime(2025, 7, 4, 18, 59, 59, tzinfo=timezone.utc))
+        # the caller's data is left as it was
+        self.assertEqual(data['dueDate'], 'Fri, 04 Jul 2025 18:59:59 GMT')
+
     @patch('choreService.chore_utils.jsonify')
     def test_upsert_chore_instance_failure(self, mock_jsonify):
         data = {'id': 'inst1'}
@@ -87,7 +118,7 @@ class TestChoreService(unittest.TestCase):
         self.mock_houses_collection.document.assert_called_with('house1')
         self.mock_house_doc.collection.assert_called_with('chores')
         self.mock_chores_collection.document.assert_called_with('ch1')
-        self.mock_chore_doc.set.assert_called_with(data)
+        self.mock_chore_doc.set.assert_called_with(dict(data, updatedAt=firestore.SERVER_TIMESTAMP))
         self.assertEqual(result, {'id': 'ch1'})
 
     def test_get_chore_instances_by_user_success(self):
@@ -164,67 +195,496 @@ class TestChoreService(unittest.TestCase):
         result = get_chore_instances_by_house(self.mock_db, data)
         self.assertEqual(result, [])
 
-    @patch('choreService.chore_utils.datetime')
-    def test_get_current_day_chore_instances_by_user_success(self, mock_datetime):
-        fixed_now = datetime(2025, 5, 31, 10, 30, 0, tzinfo=timezone.utc)
-        mock_datetime.now.return_value = fixed_now
-        mock_datetime.datetime = MagicMock(side_effect=lambda *args, **kwargs: datetime(*args, **kwargs))
-        mock_datetime.datetime.now.return_value = fixed_now
-        mock_datetime.timezone = timezone
-
+    def test_get_current_day_chore_instances_by_user_success(self):
+        db = FakeFirestore()
+        instances = db.collection('houses').document('house_daily').collection('choreInstances')
+        now = datetime.now(timezone.utc)
+        instances.document('inst_today').set({'id': 'inst_today', 'assignee': 'user_today', 'dueDate': now})
+        instances.document('inst_yesterday').set(
+            {'id': 'inst_yesterday', 'assignee': 'user_today', 'dueDate': now - timedelta(days=1)})
+        instances.document('inst_tomorrow').set(
+            {'id': 'inst_tomorrow', 'assignee': 'user_today', 'dueDate': now + timedelta(days=1)})
+        instances.document('inst_other').set({'id': 'inst_other', 'assignee': 'someone_else', 'dueDate': now})
+        data = {'user_id': 'user_today', 'house_id': 'house_daily'}
+
+        result = get_current_day_chore_instances_by_user(db, data)
+
+        self.assertEqual(result, [{'id': 'inst_today', 'assignee': 'user_today', 'dueDate': now}])
+        agenda = db.collection('houses').document('house_daily').collection('agendas').document(
+            agenda_id('user_today', now)).get()
+        self.assertEqual(list(agenda.to_dict()['instances']), ['inst_today'])
+
+        # later reads are a single document read
+        db.reset_stats()
+        self.assertEqual(get_current_day_chore_instances_by_user(db, data), result)
+        self.assertEqual(db.stats['reads'], 1)
+
+    def test_current_day_query_filters_by_timestamp(self):
+        current_day_query(self.mock_chore_instances_collection, 'u1')
+
+        assignee_filter = self.mock_chore_instances_collection.where.call_args.kwargs['filter']
+        start_filter = self.mock_chore_instances_collection.where.return_value.where.call_args.kwargs['filter']
+        end_filter = self.mock_chore_instances_collection.where.return_value.where.return_value.where.call_args.kwargs['filter']
+        self.assertEqual((assignee_filter.field_path, assignee_filter.value), ('assignee', 'u1'))
+        self.assertEqual((start_filter.field_path, start_filter.op_string), ('dueDate', '>='))
+        self.assertEqual((end_filter.field_path, end_filter.op_string), ('dueDate', '<='))
+        self.assertIsInstance(start_filter.value, datetime)
+        self.assertEqual(end_filter.value - start_filter.value, timedelta(days=1, microseconds=-1))
+
+    def test_get_current_day_chore_instances_by_user_failure(self):
         data = {
-            'user_id': 'user_today',
-            'house_id': 'house_daily'
+            'user_id': 'user_fail',
+            'house_id': 'house_fail'
         }
 
-        due_today_str = datetime(2025, 5, 31, 15, 0, 0, tzinfo=timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
-        mock_doc_today = MagicMock()
-        mock_doc_today.to_dict.return_value = {'id': 'inst_today', 'assignee': 'user_today', 'dueDate': due_today_str}
-
-        due_yesterday_str = datetime(2025, 5, 30, 10, 0, 0, tzinfo=timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
-        mock_doc_yesterday = MagicMock()
-        mock_doc_yesterday.to_dict.return_value = {'id': 'inst_yesterday', 'assignee': 'user_today', 'dueDate': due_yesterday_str}
-
-        due_tomorrow_str = datetime(2025, 6, 1, 9, 0, 0, tzinfo=timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
-        mock_doc_tomorrow = MagicMock()
-        mock_doc_tomorrow.to_dict.return_value = {'id': 'inst_tomorrow', 'assignee': 'user_today', 'dueDate': due_tomorrow_str}
-
-        mock_query_where_assignee = MagicMock()
-        mock_query_where_start_date = MagicMock()
-        mock_query_final = MagicMock()
-
-        self.mock_chore_instances_collection.where.return_value = mock_query_where_assignee
-        mock_query_where_assignee.where.return_value = mock_query_where_start_date
-        mock_query_where_start_date.where.return_value = mock_query_final
-
-        mock_query_final.get.return_value = [mock_doc_today]
+        self.mock_db.collection.side_effect = Exception("Firestore Connection Error")
 
         result = get_current_day_chore_instances_by_user(self.mock_db, data)
 
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]['id'], 'inst_today')
-        self.assertEqual(result[0]['assignee'], 'user_today')
-        self.assertEqual(result[0]['dueDate'], due_today_str)
-
-
-    @patch('choreService.chore_utils.datetime')
-    def test_get_current_day_chore_instances_by_user_failure(self, mock_datetime):
-        fixed_now = datetime(2025, 5, 31, 10, 30, 0, tzinfo=timezone.utc)
-        mock_datetime.now.return_value = fixed_now
-        mock_datetime.datetime = MagicMock(side_effect=lambda *args, **kwargs: datetime(*args, **kwargs))
-        mock_datetime.datetime.now.return_value = fixed_now
-        mock_datetime.timezone = timezone
+        self.assertEqual(result, [])
 
-        data = {
-            'user_id': 'user_fail',
-            'house_id': 'house_fail'
+    def test_agenda_follows_chore_instance_writes(self):
+        db = FakeFirestore()
+        agendas = db.collection('houses').document('house1').collection('agendas')
+        today = datetime.now(timezone.utc)
+        tomorrow = today + timedelta(days=1)
+        for user in ['a', 'b']:
+            get_current_day_chore_instances_by_user(db, {'house_id': 'house1', 'user_id': user})
+        instance = {'id': 'inst1', 'choreID': 'ch1', 'assignee': 'a', 'dueDate': format_date(today)}
+
+        with Flask(__name__).app_context():
+            upsert_chore_instance(db, instance, 'house1')
+            self.assertEqual(list(agendas.document(agenda_id('a', today)).get().to_dict()['instances']), ['inst1'])
+
+            # reassigning moves it to the other member's agenda
+            upsert_chore_instance(db, dict(instance, assignee='b'), 'house1')
+            self.assertEqual(agendas.document(agenda_id('a', today)).get().to_dict()['instances'], {})
+            self.assertEqual(list(agendas.document(agenda_id('b', today)).get().to_dict()['instances']), ['inst1'])
+
+            # agendas that haven't been read aren't created
+            upsert_chore_instance(db, dict(instance, assignee='b', dueDate=format_date(tomorrow)), 'house1')
+            self.assertEqual(agendas.document(agenda_id('b', today)).get().to_dict()['instances'], {})
+            self.assertFalse(agendas.document(agenda_id('b', tomorrow)).get().exists)
+
+            upsert_chore_instance(db, dict(instance, assignee='b'), 'house1')
+            delete_chore_instance(db, {'id': 'inst1'}, 'house1')
+        self.assertEqual(agendas.document(agenda_id('b', today)).get().to_dict()['instances'], {})
+        self.assertEqual(get_current_day_chore_instances_by_user(db, {'house_id': 'house1', 'user_id': 'b'}), [])
+
+    def test_agenda_follows_bulk_upserts(self):
+        db = FakeFirestore()
+        today = datetime.now(timezone.utc)
+        get_current_day_chore_instances_by_user(db, {'house_id': 'house1', 'user_id': 'a'})
+        items = [{'id': f'inst{i:03}', 'assignee': 'a', 'dueDate': format_date(today)}
+                 for i in range(AGENDA_CHUNK_SIZE + 5)]
+
+        with Flask(__name__).app_context():
+            result = bulk_upsert(db, 'house1', 'choreInstances', items).get_json()
+
+        self.assertEqual(result['written'], len(items))
+        self.assertEqual([inst['id'] for inst in get_current_day_chore_instances_by_user(
+            db, {'house_id': 'house1', 'user_id': 'a'})], [item['id'] for item in items])
+
+    def _stats_house(self):
+        db = FakeFirestore()
+        house_ref = db.collection('houses').document('house1')
+        house_ref.collection('members').document('a').set({'id': 'a', 'subgroups': ['up']})
+        house_ref.collection('members').document('b').set({'id': 'b', 'subgroups': ['up', 'down']})
+        instances = house_ref.collection('choreInstances')
+        instances.document('i1').set({'id': 'i1', 'assignee': 'a', 'isDone': True, 'doneOnTime': True})
+        instances.document('i2').set({'id': 'i2', 'assignee': 'a', 'isDone': True, 'doneOnTime': False})
+        instances.document('i3').set({'id': 'i3', 'assignee': 'b', 'isDone': False, 'doneOnTime': False})
+        return db
+
+    def test_get_chore_stats_built_on_first_read(self):
+        db = self._stats_house()
+
+        stats = get_chore_stats(db, 'house1')
+
+        self.assertEqual(stats['members'], {'a': {'completed': 2, 'onTime': 1, 'late': 1, 'onTimePct': 50}})
+        self.assertEqual(stats['subgroups'], {'up': {'completed': 2, 'onTime': 1, 'late': 1, 'onTimePct': 50}})
+        db.reset_stats()
+        self.assertEqual(get_chore_stats(db, 'house1'), stats)
+        self.assertEqual(db.stats['reads'], 1)
+
+    def test_chore_stats_follow_chore_instance_writes(self):
+        db = self._stats_house()
+        get_chore_stats(db, 'house1')
+
+        with Flask(__name__).app_context():
+            upsert_chore_instance(db, {'id': 'i3', 'assignee': 'b', 'isDone': True, 'doneOnTime': True}, 'house1')
+            stats = get_chore_stats(db, 'house1')
+            self.assertEqual(stats['members']['b'], {'completed': 1, 'onTime': 1, 'late': 0, 'onTimePct': 100})
+            self.assertEqual(stats['subgroups']['up']['completed'], 3)
+            self.assertEqual(stats['subgroups']['down']['completed'], 1)
+
+            # reassigning a done instance moves its count; edits that don't change it are free
+            upsert_chore_instance(db, {'id': 'i2', 'assignee': 'b', 'isDone': True, 'doneOnTime': False}, 'house1')
+            db.reset_stats()
+            upsert_chore_instance(db, {'id': 'i2', 'assignee': 'b', 'isDone': True, 'doneOnTime': False,
+                                       'swapID': 's1'}, 'house1')
+            self.assertEqual(db.stats['reads'], 1)
+
+            delete_chore_instance(db, {'id': 'i1'}, 'house1')
+        stats = get_chore_stats(db, 'house1')
+        self.assertEqual(stats['members']['a'], {'completed': 0, 'onTime': 0, 'late': 0, 'onTimePct': None})
+        self.assertEqual(stats['members']['b'], {'completed': 2, 'onTime': 1, 'late': 1, 'onTimePct': 50})
+        # same as recounting from scratch
+        self.assertEqual(build_chore_stats(db, 'house1', rebuild=True)['members'],
+                         {'b': {'completed': 2, 'onTime': 1, 'late': 1}})
+
+    def test_recompute_all_stats(self):
+        db = self._stats_house()
+        db.collection('houses').document('house1').set({'id': 'house1'})
+        get_chore_stats(db, 'house1')
+        # a moves to another subgroup, which the incremental counts don't follow
+        db.collection('houses').document('house1').collection('members').document('a').set(
+            {'id': 'a', 'subgroups': ['down']})
+
+        results = recompute_all_stats(db)
+
+        self.assertEqual(list(results), ['house1'])
+        self.assertEqual(build_chore_stats(db, 'house1')['subgroups'],
+                         {'down': {'completed': 2, 'onTime': 1, 'late': 1}})
+
+    def _swap_house(self, status='pending'):
+        db = self._stats_house()
+        today = datetime.now(timezone.utc)
+        instances = db.collection('houses').document('house1').collection('choreInstances')
+        instances.document('i2').update({'dueDate': today})
+        instances.document('i3').update({'dueDate': today})
+        db.collection('houses').document('house1').collection('swaps').document('s1').set(
+            {'id': 's1', 'choreID': 'ch1', 'choreInstID': 'i2', 'from': 'a', 'to': 'b', 'status': status, 'offered': 'i3'})
+        return db, instances
+
+    def test_accept_swap(self):
+        db, instances = self._swap_house()
+        get_chore_stats(db, 'house1')
+        for user in ['a', 'b']:
+            get_current_day_chore_instances_by_user(db, {'house_id': 'house1', 'user_id': user})
+
+        with Flask(__name__).app_context():
+            response = accept_swap(db, {'id': 's1'}, 'house1')
+            self.assertEqual(response.get_json(), {'id': 's1', 'status': 'accepted', 'choreInstances': ['i2', 'i3']})
+
+            # accepting it again fails without writing anything
+            db.reset_stats()
+            response, status = accept_swap(db, {'id': 's1'}, 'house1')
+            self.assertEqual(status, 400)
+            self.assertEqual(db.stats['writes'], 0)
+
+        self.assertEqual(instances.document('i2').get().to_dict()['assignee'], 'b')
+        self.assertEqual(instances.document('i3').get().to_dict()['assignee'], 'a')
+        self.assertEqual(instances.document('i3').get().to_dict()['swapID'], 's1')
+        swap = db.collection('houses').document('house1').collection('swaps').document('s1').get().to_dict()
+        self.assertEqual(swap['status'], 'accepted')
+        self.assertIn('updatedAt', swap)
+        # derived per-member views follow the swap
+        self.assertEqual([inst['id'] for inst in get_current_day_chore_instances_by_user(
+            db, {'house_id': 'house1', 'user_id': 'a'})], ['i3'])
+        self.assertEqual(get_chore_stats(db, 'house1')['members']['b']['late'], 1)
+        self.assertEqual(build_chore_stats(db, 'house1', rebuild=True)['members'],
+                         {'a': {'completed': 1, 'onTime': 1, 'late': 0}, 'b': {'completed': 1, 'onTime': 0, 'late': 1}})
+
+    def test_accept_swap_invalid(self):
+        db, instances = self._swap_house(status='declined')
+        swaps = db.collection('houses').document('house1').collection('swaps')
+
+        with Flask(__name__).app_context():
+            self.assertEqual(accept_swap(db, {'id': 's1'}, 'house1')[1], 400)
+            self.assertEqual(accept_swap(db, {'id': 'nope'}, 'house1')[1], 400)
+            self.assertEqual(accept_swap(db, {}, 'house1')[1], 400)
+            # the instances must belong to the swap's members
+            swaps.document('s1').update({'status': 'pending', 'to': 'c'})
+            self.assertEqual(accept_swap(db, {'id': 's1'}, 'house1')[1], 400)
+            swaps.document('s1').update({'to': None})
+            self.assertEqual(accept_swap(db, {'id': 's1'}, 'house1')[1], 400)
+            # an unassigned instance can't be compared with the members by sorting
+            swaps.document('s1').update({'to': 'b'})
+            instances.document('i3').update({'assignee': None})
+            self.assertEqual(accept_swap(db, {'id': 's1'}, 'house1')[1], 400)
+            instances.document('i3').update({'assignee': 'b'})
+            swaps.document('s1').update({'offered': 'missing'})
+            self.assertEqual(accept_swap(db, {'id': 's1'}, 'house1')[1], 400)
+
+        self.assertEqual(instances.document('i2').get().to_dict()['assignee'], 'a')
+        self.assertEqual(swaps.document('s1').get().to_dict()['status'], 'pending')
+
+    def test_mark_overdue_instances(self):
+        db = FakeFirestore()
+        now = datetime.now(timezone.utc)
+        instances = db.collection('houses').document('house1').collection('choreInstances')
+        instances.document('late').set({'id': 'late', 'assignee': 'a', 'isDone': False, 'doneOnTime': True,
+                                         'dueDate': now - timedelta(hours=1)})
+        instances.document('done').set({'id': 'done', 'assignee': 'a', 'isDone': True, 'doneOnTime': True,
+                                         'dueDate': now - timedelta(hours=1)})
+        instances.document('soon').set({'id': 'soon', 'assignee': 'a', 'isDone': False, 'doneOnTime': False,
+                                         'dueDate': now + timedelta(hours=1)})
+
+        self.assertEqual(mark_overdue_instances(db, 'house1', now), 1)
+        late = instances.document('late').get().to_dict()
+        self.assertTrue(late['overdue'])
+        self.assertFalse(late['doneOnTime'])
+        self.assertIn('updatedAt', late)
+        self.assertNotIn('overdue', instances.document('soon').get().to_dict())
+
+        # the next pass only looks at instances that fell due since
+        cursor = db.collection('houses').document('house1').collection('stats').document('overdue')
+        self.assertEqual(cursor.get().to_dict(), {'checkedUntil': now - timedelta(hours=1)})
+        self.assertEqual(mark_overdue_instances(db, 'house1', now + timedelta(hours=2)), 1)
+        self.assertTrue(instances.document('soon').get().to_dict()['overdue'])
+        self.assertEqual(cursor.get().to_dict(), {'checkedUntil': now + timedelta(hours=1)})
+
+        # a pass that finds nothing new leaves the cursor as it is
+        db.reset_stats()
+        self.assertEqual(mark_overdue_instances(db, 'house1', now + timedelta(hours=3)), 0)
+        self.assertEqual(db.stats['writes'], 0)
+
+    def test_roll_over_chores(self):
+        db = FakeFirestore()
+        chores = db.collection('houses').document('house1').collection('chores')
+        chores.document('ch1').set({'id': 'ch1', 'assignees': ['a'], 'frequencyPattern': 'daily',
+                                    'startDate': 'Thu, 01 May 2025 07:00:00 GMT'})
+        chores.document('ch2').set({'id': 'ch2', 'assignees': ['a']})
+        now = datetime(2025, 5, 10, 12, tzinfo=timezone.utc)
+
+        self.assertEqual(roll_over_chores(db, 'house1', horizon_days=7, now=now), 8)
+        self.assertEqual(roll_over_chores(db, 'house1', horizon_days=7, now=now), 0)
+        self.assertEqual(roll_over_chores(db, 'house1', horizon_days=7, now=now + timedelta(days=1)), 1)
+
+    def test_get_chore_occurrences_weekly(self):
+        chore = {
+            'frequencyPattern': 'weekly',
+            'frequencyDays': ['3', '7'],
+            'startDate': 'Thu, 01 May 2025 07:00:00 GMT'
+        }
+        until = datetime(2025, 5, 12, tzinfo=timezone.utc)
+
+        occurrences = list(get_chore_occurrences(chore, until))
+
+        # Wednesdays and Sundays
+        self.assertEqual([o.day for o in occurrences], [4, 7, 11])
+        self.assertTrue(all(o.hour == 7 for o in occurrences))
+
+    def test_get_chore_occurrences_invalid(self):
+        until = datetime(2025, 5, 12, tzinfo=timezone.utc)
+        self.assertIsNone(get_chore_occurrences({'frequencyPattern': 'weekly'}, until))
+        self.assertIsNone(get_chore_occurrences(
+            {'frequencyPattern': 'sometimes', 'startDate': 'Thu, 01 May 2025 07:00:00 GMT'}, until))
+
+    def test_generate_chore_instances_round_robin(self):
+        chore = {
+            'id': 'ch1',
+            'assignees': ['a', 'b'],
+            'frequencyPattern': 'daily',
+            'startDate': 'Thu, 01 May 2025 07:00:00 GMT'
+        }
+        db = FakeFirestore()
+        now = datetime(2025, 5, 3, 12, 0, 0, tzinfo=timezone.utc)
+
+        created = generate_chore_instances(db, chore, 'house1', horizon_days=3, now=now)
+
+        # May 3rd's occurrence is still open until the end of the day
+        self.assertEqual([format_date(c['dueDate']) for c in created], [
+            'Sat, 03 May 2025 23:59:59 GMT',
+            'Sun, 04 May 2025 23:59:59 GMT',
+            'Mon, 05 May 2025 23:59:59 GMT',
+            'Tue, 06 May 2025 23:59:59 GMT'
+        ])
+        # rotation counts from the start date (May 1st -> 'a')
+        self.assertEqual([c['assignee'] for c in created], ['a', 'b', 'a', 'b'])
+        self.assertTrue(all(c['choreID'] == 'ch1' and not c['isDone'] for c in created))
+        stored = db.collection('houses').document('house1').collection('choreInstances').get()
+        self.assertEqual(sorted(doc.id for doc in stored), sorted(c['id'] for c in created))
+
+    def test_generate_chore_instances_skips_existing(self):
+        chore = {
+            'id': 'ch1',
+            'assignees': ['a'],
+            'frequencyPattern': 'daily',
+            'startDate': 'Thu, 01 May 2025 07:00:00 GMT'
+        }
+        db = FakeFirestore()
+        db.collection('houses').document('house1').collection('choreInstances').document('existing').set(
+            {'id': 'existing', 'choreID': 'ch1', 'dueDate': datetime(2025, 5, 4, 18, 59, 59, tzinfo=timezone.utc)})
+        now = datetime(2025, 5, 4, 12, 0, 0, tzinfo=timezone.utc)
+
+        created = generate_chore_instances(db, chore, 'house1', horizon_days=1, now=now)
+
+        # May 4th already has an instance, so only May 5th's is created
+        self.assertEqual([format_date(c['dueDate']) for c in created], ['Mon, 05 May 2025 23:59:59 GMT'])
+
+    def test_generate_chore_instances_due_on_their_day(self):
+        # a chore that starts at 07:00 is on the agenda of the day it occurs on
+        chore = {
+            'id': 'ch1',
+            'assignees': ['a'],
+            'frequencyPattern': 'daily',
+            'startDate': '2025-05-01T07:00:00Z'
         }
+        db = FakeFirestore()
+        now = datetime(2025, 5, 3, 7, 30, 0, tzinfo=timezone.utc)
+
+        created = generate_chore_instances(db, chore, 'house1', horizon_days=0, now=now)
+
+        self.assertEqual([c['dueDate'] for c in created], [datetime(2025, 5, 3, 23, 59, 59, tzinfo=timezone.utc)])
+        self.assertEqual(agenda_id('a', created[0]['dueDate']), 'a_2025-05-03')
+        self.assertEqual([doc.id for doc in current_day_query(
+            db.collection('houses').document('house1').collection('choreInstances'), 'a', now).stream()],
+            [created[0]['id']])
+
+    def test_generate_chore_instances_ids_are_stable(self):
+        chore = {
+            'id': 'ch1',
+            'assignees': ['a'],
+            'frequencyPattern': 'weekly',
+            'frequencyDays': ['1'],
+            'startDate': 'Thu, 01 May 2025 07:00:00 GMT'
+        }
+        now = datetime(2025, 5, 1, tzinfo=timezone.utc)
 
-        self.mock_db.collection.side_effect = Exception("Firestore Connection Error")
+        first = generate_chore_instances(FakeFirestore(), chore, 'house1', now=now)
+        second = generate_chore_instances(FakeFirestore(), chore, 'house1', now=now)
 
-        result = get_current_day_chore_instances_by_user(self.mock_db, data)
+        self.assertEqual(len(first), 4)
+        self.assertEqual([c['id'] for c in first], [c['id'] for c in second])
+
+    def test_generate_chore_instances_keeps_deleted_and_moved(self):
+        chore = {
+            'id': 'ch1',
+            'assignees': ['a'],
+            'frequencyPattern': 'daily',
+            'startDate': 'Thu, 01 May 2025 07:00:00 GMT'
+        }
+        db = FakeFirestore()
+        instances = db.collection('houses').document('house1').collection('choreInstances')
+        now = datetime(2025, 5, 3, 12, 0, 0, tzinfo=timezone.utc)
+        deleted, moved = generate_chore_instances(db, chore, 'house1', horizon_days=3, now=now)[1:3]
+        write_chore_instances(db, 'house1', [dict(moved, dueDate=datetime(2025, 4, 1, tzinfo=timezone.utc))],
+                              delete_ids=[deleted['id']])
+
+        self.assertEqual(generate_chore_instances(db, chore, 'house1', horizon_days=3, now=now), [])
+        self.assertFalse(instances.document(deleted['id']).get().exists)
+        self.assertEqual(instances.document(moved['id']).get().to_dict()['dueDate'],
+                         datetime(2025, 4, 1, tzinfo=timezone.utc))
+
+    @patch('choreService.chore_utils.generate_chore_instances')
+    @patch('choreService.chore_utils.jsonify')
+    def test_upsert_chore_generates_instances(self, mock_jsonify, mock_generate):
+        data = {'id': 'ch1', 'assignees': ['a'], 'frequencyPattern': 'daily',
+                'startDate': 'Thu, 01 May 2025 07:00:00 GMT'}
+        mock_jsonify.side_effect = lambda x: x
+        mock_generate.return_value = [{'id': 'inst1'}, {'id': 'inst2'}]
+
+        result = upsert_chore(self.mock_db, data, 'house1', generate_instances=True)
+
+        stored = dict(data, startDate=datetime(2025, 5, 1, 7, 0, 0, tzinfo=timezone.utc))
+        self.mock_chore_doc.set.assert_called_with(dict(stored, updatedAt=firestore.SERVER_TIMESTAMP))
+        mock_generate.assert_called_once_with(self.mock_db, stored, 'house1')
+        self.assertEqual(result, {'id': 'ch1', 'instancesCreated': 2})
+
+    def _chainable_query(self, docs):
+        """
+        Makes the chore instances collection behave like a query whose
+        builder methods all return the same query, streaming docs.
+        """
+        query = self.mock_chore_instances_collection
+        for method in ['where', 'order_by', 'select', 'start_after', 'limit']:
+            getattr(query, method).return_value = query
+        query.stream.return_value = docs
+        return query
+
+    def _instance_doc(self, inst_id):
+        doc = MagicMock(id=inst_id)
+        doc.to_dict.return_value = {'id': inst_id}
+        return doc
+
+    def test_list_chore_instances_paginates(self):
+        query = self._chainable_query([self._instance_doc(f'inst{i}') for i in range(3)])
+
+        page, next_start_after = list_chore_instances(self.mock_db, 'house1', {'limit': '2'})
+
+        self.assertEqual(list(page), ['inst0', 'inst1'])
+        self.assertEqual(next_start_after, 'inst1')
+        query.limit.assert_called_once_with(3)
+        query.order_by.assert_called_once_with('__name__')
+
+    def test_list_chore_instances_last_page(self):
+        self._chainable_query([self._instance_doc('inst0')])
+        page, next_start_after = list_chore_instances(self.mock_db, 'house1', {'limit': 2})
+        self.assertEqual(list(page), ['inst0'])
+        self.assertIsNone(next_start_after)
+
+    def test_list_chore_instances_filters_and_projects(self):
+        query = self._chainable_query([])
+        cursor = MagicMock(exists=True)
+        self.mock_chore_instance_doc.get.return_value = cursor
+
+        list_chore_instances(self.mock_db, 'house1', {
+            'isDone': 'false',
+            'assignee': 'user1',
+            'dueAfter': 'Thu, 01 May 2025 00:00:00 GMT',
+            'start_after': 'inst9',
+            'fields': 'dueDate, isDone'
+        })
+
+        filters = [(c.kwargs['filter'].field_path, c.kwargs['filter'].op_string, c.kwargs['filter'].value)
+                   for c in query.where.call_args_list]
+        self.assertEqual(filters, [
+            ('isDone', '==', False),
+            ('assignee', '==', 'user1'),
+            ('dueDate', '>=', datetime(2025, 5, 1, tzinfo=timezone.utc))
+        ])
+        self.assertEqual([c.args[0] for c in query.order_by.call_args_list], ['dueDate', '__name__'])
+        query.select.assert_called_once_with(['dueDate', 'isDone'])
+        self.mock_chore_instances_collection.document.assert_called_with('inst9')
+        query.start_after.assert_called_once_with(cursor)
+        query.limit.assert_called_once_with(501)
+
+    def test_list_chore_instances_rejects_bad_page_options(self):
+        self._chainable_query([self._instance_doc('inst0')])
+        for limit in [0, '-1', 'ten']:
+            with self.assertRaises(ValueError):
+                list_chore_instances(self.mock_db, 'house1', {'limit': limit})
+        # a cursor that was deleted would restart paging at the first page
+        self.mock_chore_instance_doc.get.return_value = MagicMock(exists=False, id='inst9')
+        with self.assertRaises(ValueError):
+            list_chore_instances(self.mock_db, 'house1', {'start_after': 'inst9'})
+        result = get_chore_instances_by_house(self.mock_db, {'house_id': 'house1', 'limit': 0})
+        self.assertEqual(result[1], 400)
+
+    def test_get_chore_instances_by_house_paginated(self):
+        self._chainable_query([self._instance_doc('inst0')])
+        result = get_chore_instances_by_house(self.mock_db, {'house_id': 'house1', 'limit': 10})
+        self.assertEqual(result, {'instances': [{'id': 'inst0'}], 'nextStartAfter': None})
+
+    def test_async_list_chore_instances_pages(self):
+        db = FakeFirestore()
+        instances = db.collection('houses').document('house1').collection('choreInstances')
+        for i in range(5):
+            instances.document(f'inst{i}').set({'id': f'inst{i}', 'assignee': 'user1', 'isDone': i == 4})
+        async_db = db.async_client()
+
+        page, cursor = asyncio.run(chore_async_utils.list_chore_instances(
+            async_db, 'house1', {'limit': '2', 'isDone': 'false'}))
+        self.assertEqual(list(page), ['inst0', 'inst1'])
+        page, cursor = asyncio.run(chore_async_utils.list_chore_instances(
+            async_db, 'house1', {'limit': '2', 'isDone': 'false', 'start_after': cursor}))
+        self.assertEqual((list(page), cursor), (['inst2', 'inst3'], None))
+
+    def test_async_get_current_day_chore_instances_by_user(self):
+        db = FakeFirestore()
+        instances = db.collection('houses').document('house1').collection('choreInstances')
+        now = datetime.now(timezone.utc)
+        instances.document('today').set({'id': 'today', 'assignee': 'user1', 'dueDate': now})
+        instances.document('later').set({'id': 'later', 'assignee': 'user1', 'dueDate': now + timedelta(days=2)})
+        data = {'house_id': 'house1', 'user_id': 'user1'}
+
+        # the agenda is only read here; it is built by the sync function
+        self.assertIsNone(asyncio.run(chore_async_utils.get_current_day_chore_instances_by_user(db.async_client(), data)))
+        get_current_day_chore_instances_by_user(db, data)
+        result = asyncio.run(chore_async_utils.get_current_day_chore_instances_by_user(db.async_client(), data))
+        self.assertEqual([inst['id'] for inst in result], ['today'])
 
-        self.assertEqual(result, [])
-        
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,126 @@
+from quart import jsonify
+from choreService.chore_utils import (PAGE_OPTIONS, AGENDAS, STATS, CHORE_STATS, agenda_id, agenda_instances,
+                                      chore_instance_page_query, current_day_range, page_cursor, with_on_time_pct,
+                                      firestore)
+
+
+# /// Async Chore Utility Functions /// #
+    # firestore.AsyncClient counterparts of the chore_utils read functions,
+    # called by the async serving mode's routes in asgi.py.
+
+async def get_chore_instances_by_user(db, data):
+    """
+    Retrieves a user's chore instances.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        data: json of user_id and house_id
+
+    Returns:
+        list: A list of chore instance dictionaries, or an empty list on error.
+    """
+    try:
+        CHORE_INSTANCES = db.collection('houses').document(data.get('house_id')).collection('choreInstances')
+        query = CHORE_INSTANCES.where(filter=firestore.FieldFilter('assignee', '==', data.get('user_id')))
+        return [instance.to_dict() for instance in await query.get()]
+    except Exception as e:
+        print(f"Error getting chore instances for user {data.get('user_id')} in house {data.get('house_id')}: {e}")
+        return []
+
+
+async def get_current_day_chore_instances_by_user(db, data):
+    """
+    Retrieves a user's chore instances that are due today (UTC) from their
+    agenda for today (see chore_utils.AGENDAS). Agendas are built by the
+    sync get_current_day_chore_instances_by_user, in a transaction.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        data: json of user_id and house_id
+
+    Returns:
+        list: A list of chore instance dictionaries, or an empty list on error.
+        None if the agenda hasn't been built yet.
+    """
+    try:
+        start_of_day_utc, _ = current_day_range()
+        agenda = await db.collection('houses').document(data.get('house_id')).collection(AGENDAS).document(
+            agenda_id(data.get('user_id'), start_of_day_utc)).get()
+        if not agenda.exists:
+            return None
+        return agenda_instances(agenda.to_dict())
+    except Exception as e:
+        print(f"Error getting chore instances for user {data.get('user_id')} in house {data.get('house_id')}: {e}")
+        return []
+
+
+async def get_chore_stats(db, house_id):
+    """
+    Retrieves a house's completion counters per member and per subgroup
+    (see chore_utils.STATS). They are built by the sync get_chore_stats,
+    in a transaction.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        house_id (str): The ID of the house.
+
+    Returns:
+        dict: See chore_utils.get_chore_stats. None if the counters haven't been built yet.
+    """
+    stats = await db.collection('houses').document(house_id).collection(STATS).document(CHORE_STATS).get()
+    if not stats.exists:
+        return None
+    return with_on_time_pct(stats.to_dict())
+
+
+async def get_chore_instances_by_house(db, data):
+    """
+    Retrieves a house's chore instances, or one page of them if any of
+    PAGE_OPTIONS are given.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        data: json of house_id, and optionally PAGE_OPTIONS
+
+    Returns:
+        list: A list of chore instance dictionaries, or an empty list on error.
+        When paginating: {'instances': [...], 'nextStartAfter': <id or None>},
+        or a 400 error if the page options are invalid.
+    """
+    try:
+        if any(key in data for key in PAGE_OPTIONS):
+            try:
+                page, next_start_after = await list_chore_instances(db, data.get('house_id'), data)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid page options: {e}'}), 400
+            return {'instances': list(page.values()), 'nextStartAfter': next_start_after}
+        CHORE_INSTANCES = db.collection('houses').document(data.get('house_id')).collection('choreInstances')
+        return [doc.to_dict() for doc in await CHORE_INSTANCES.get()]
+    except Exception as e:
+        print(f"Error getting chore instances for house {data.get('house_id')}: {e}")
+        return []
+
+
+async def list_chore_instances(db, house_id, options):
+    """
+    Retrieves one page of a house's chore instances, see chore_utils.list_chore_instances.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        house_id (str): The ID of the house.
+        options (dict): The page options.
+
+    Returns:
+        tuple: ({<instance_id>: <instance data>, ...}, <next start_after, or None on the last page>)
+    """
+    CHORE_INSTANCES = db.collection('houses').document(house_id).collection('choreInstances')
+    query, limit = chore_instance_page_query(CHORE_INSTANCES, options)
+
+    if options.get('start_after'):
+        cursor = await CHORE_INSTANCES.document(options.get('start_after')).get()
+        query = query.start_after(page_cursor(cursor))
+
+    docs = await query.limit(limit + 1).get()
+    page = {doc.id: doc.to_dict() for doc in docs[:limit]}
+    next_start_after = docs[limit - 1].id if len(docs) > limit else None
+    return page, next_start_after
@@ -1,19 +1,86 @@
-from firebase_admin import firestore
+import bisect
+import collections
 import datetime
+import uuid
 from dateutil.rrule import rrule, DAILY, WEEKLY, MONTHLY
 from flask import jsonify
 
+from utils.utils import (MAX_BATCH_WRITES, TOMBSTONES, parse_date, normalize_dates, stamp_updated, tombstone,
+                         lazy_import)
+
+firestore = lazy_import('firebase_admin.firestore')
+
+# frequencyPattern -> (rrule frequency, interval)
+FREQUENCIES = {
+    'daily': (DAILY, 1),
+    'weekly': (WEEKLY, 1),
+    'biweekly': (WEEKLY, 2),
+    'monthly': (MONTHLY, 1)
+}
+
+# How far ahead chore instances are generated, in days
+DEFAULT_HORIZON_DAYS = 28
+
+# Largest page list_chore_instances will return
+MAX_PAGE_SIZE = 500
+
+# Request keys that make the chore instance listings paginate/filter
+PAGE_OPTIONS = ['limit', 'start_after', 'isDone', 'assignee', 'choreID', 'dueAfter', 'dueBefore', 'fields']
+
+# Per-member daily agendas: houses/{house_id}/agendas/{member_id}_{YYYY-MM-DD}
+# hold the chore instances assigned to a member that are due on that (UTC)
+# day, so /get-current-day-user-chores is a single document read. An agenda
+# is built from a query the first time it is read; from then on every write
+# to the house's chore instances (write_chore_instances) keeps it up to date
+# in the same transaction. Writes never create agendas, so an agenda that
+# exists is always complete.
+AGENDAS = 'agendas'
+
+# Agendas carry an expireAt this long after their day, for a Firestore TTL
+# policy on the agendas collection group to clean them up
+AGENDA_TTL_DAYS = 7
+
+# Instances written per transaction by write_chore_instances. Each one
+# takes up to three writes: its own set, or its delete and tombstone, and
+# the agendas it moves off and on.
+AGENDA_CHUNK_SIZE = MAX_BATCH_WRITES // 3
+
+# Per-house completion counters: houses/{house_id}/stats/chores holds
+# {'members': {<member_id>: <counters>}, 'subgroups': {<subgroup_id>: <counters>}}
+# where <counters> is {'completed', 'onTime', 'late'}, counting the done
+# chore instances assigned to the member (or to the subgroup's members,
+# according to each member's subgroups field). Like agendas, the document is
+# built from the house's chore instances the first time it is read (or by
+# utils.recompute_stats), and from then on write_chore_instances updates it
+# in the same transaction as the instances.
+STATS = 'stats'
+CHORE_STATS = 'chores'
+COUNTERS = ('completed', 'onTime', 'late')
+
+# houses/{house_id}/stats/overdue records how far mark_overdue_instances
+# has checked ({'checkedUntil': <due date of the last instance checked>}),
+# so each pass only queries the instances that fell due since then
+OVERDUE_CURSOR = 'overdue'
+
+# Swap statuses: only pending swaps (or swaps without a status) can be accepted
+SWAP_PENDING = 'pending'
+SWAP_ACCEPTED = 'accepted'
+
 # /// Chore Utility Functions /// #
     # Primarily called by app.py's public routes
 
-def upsert_chore(db, data, house_id):
+def upsert_chore(db, data, house_id, generate_instances=False):
     try:
         HOUSES = db.collection('houses')
         house_ref = HOUSES.document(house_id)
 
         CHORES = house_ref.collection('chores')
         chore_ref = CHORES.document(data.get('id'))
-        chore_ref.set(data)
+        data = normalize_dates(data)
+        chore_ref.set(stamp_updated(data))
+        if generate_instances:
+            created = generate_chore_instances(db, data, house_id)
+            return jsonify({'id': data.get('id'), 'instancesCreated': len(created)})
         return jsonify({'id': data.get('id')}) 
     except Exception as e:
         print(f"Error creating/updating chore: {e}")
@@ -22,18 +89,85 @@ def upsert_chore(db, data, house_id):
 def upsert_chore_instance(db, data, house_id):
     # TODO: lots to do here, but definitely need to make sure that choreID is valid
     try:
-        HOUSES = db.collection('houses')
-        house_ref = HOUSES.document(house_id)
-
-        CHORE_INSTANCES = house_ref.collection('choreInstances')
-        chore_inst_ref = CHORE_INSTANCES.document(data.get('id'))
-    
-        chore_inst_ref.set(data)
+        write_chore_instances(db, house_id, [data])
         return jsonify({'id': data.get('id')})
     except Exception as e:
         print(f"Error creating/updating chore instance: {e}")
         return jsonify({'error': 'Could not upsert chore instance'}), 500
 
+def delete_chore_instance(db, data, house_id):
+    try:
+        write_chore_instances(db, house_id, delete_ids=[data.get('id')])
+        return jsonify({"id": str(data.get('id'))})
+    except Exception as e:
+        print(f"Error deleting chore instance: {e}")
+        return jsonify({'error': 'Could not delete chore instance'}), 500
+
+def accept_swap(db, data, house_id):
+    """
+    Accepts a pending swap: the swap's chore instance (choreInstID) and the
+    instance offered for it (offered), one assigned to each of its from and
+    to members, trade assignees and get the swap's ID as their swapID, and
+    the swap's status becomes accepted. Everything, including the agendas
+    and completion counters the instances affect, is written in one
+    transaction, so a swap is never half applied, and accepting the same
+    swap twice fails the second time.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        data (dict): {'id': <swap ID>}
+        house_id (str): The ID of the house.
+
+    Returns:
+        flask.Response: {'id': <swap ID>, 'status': 'accepted', 'choreInstances': [<instance ID>, <instance ID>]},
+            or an error (400 if the swap can't be accepted).
+    """
+    if not data.get('id'):
+        return jsonify({'error': 'Swap could not be accepted: id is required'}), 400
+    house_ref = db.collection('houses').document(house_id)
+    CHORE_INSTANCES = house_ref.collection('choreInstances')
+    swap_ref = house_ref.collection('swaps').document(data.get('id'))
+
+    @firestore.transactional
+    def accept(transaction):
+        swap = swap_ref.get(transaction=transaction)
+        if not swap.exists:
+            raise ValueError(f"swap {swap_ref.id} does not exist")
+        swap = swap.to_dict()
+        if swap.get('status') not in (None, '', SWAP_PENDING):
+            raise ValueError(f"swap {swap_ref.id} is {swap.get('status')}")
+        if not swap.get('from') or not swap.get('to'):
+            raise ValueError(f"swap {swap_ref.id} needs from and to members")
+        instance_ids = [swap.get('choreInstID'), swap.get('offered')]
+        if not all(isinstance(instance_id, str) and instance_id for instance_id in instance_ids) \
+                or instance_ids[0] == instance_ids[1]:
+            raise ValueError(f"swap {swap_ref.id} needs two chore instances (choreInstID and offered)")
+
+        previous = {doc.id: doc.to_dict() for doc in transaction.get_all(
+            [CHORE_INSTANCES.document(instance_id) for instance_id in instance_ids]) if doc.exists}
+        missing = [instance_id for instance_id in instance_ids if instance_id not in previous]
+        if missing:
+            raise ValueError(f"chore instances {', '.join(missing)} do not exist")
+        assignees = [previous[instance_id].get('assignee') for instance_id in instance_ids]
+        # not sorted(), which can't order an unassigned (None) instance
+        if collections.Counter(assignees) != collections.Counter([swap.get('from'), swap.get('to')]):
+            raise ValueError("the chore instances aren't assigned to the swap's from and to members")
+
+        changes = [(instance_id, dict(previous[instance_id], assignee=assignee, swapID=swap_ref.id))
+                   for instance_id, assignee in zip(instance_ids, reversed(assignees))]
+        stage_chore_instance_writes(transaction, house_ref, changes, previous)
+        transaction.update(swap_ref, stamp_updated({'status': SWAP_ACCEPTED}))
+        return instance_ids
+
+    try:
+        instance_ids = accept(db.transaction())
+        return jsonify({'id': swap_ref.id, 'status': SWAP_ACCEPTED, 'choreInstances': instance_ids})
+    except ValueError as e:
+        return jsonify({'error': f'Swap could not be accepted: {e}'}), 400
+    except Exception as e:
+        print(f"Error accepting swap {swap_ref.id}: {e}")
+        return jsonify({'error': 'Swap could not be accepted'}), 500
+
 def get_chore_instances_by_user(db, data):
     """
     Retrieves chore instances for a specific user within a date range.
@@ -64,7 +198,8 @@ def get_chore_instances_by_user(db, data):
     
 def get_current_day_chore_instances_by_user(db, data):
     """
-    Retrieves chore instances for a specific user within a date range.
+    Retrieves a user's chore instances that are due today (UTC), from their
+    agenda for today, building the agenda first if this is its first read.
 
     Args:
         db (firestore.Client): The Firestore client.
@@ -74,47 +209,40 @@ def get_current_day_chore_instances_by_user(db, data):
         list: A list of chore instance dictionaries, or an empty list on error.
     """
     try:
-        instances = []
-        houses_ref = db.collection('houses')
-        house_ref = houses_ref.document(data.get('house_id'))
-        chore_instances_ref = house_ref.collection('choreInstances')
-
-        today_utc = datetime.datetime.now(datetime.timezone.utc).date()
-
-        # calculate the start and end of the current day in UTC
-        start_of_day_utc = datetime.datetime.combine(today_utc, datetime.time.min, tzinfo=datetime.timezone.utc)
-        end_of_day_utc = datetime.datetime.combine(today_utc, datetime.time.max, tzinfo=datetime.timezone.utc)
-
-        start_of_day_str = start_of_day_utc.strftime("%a, %d %b %Y %H:%M:%S GMT")
-        end_of_day_str = end_of_day_utc.strftime("%a, %d %b %Y %H:%M:%S GMT")
-
-        query = chore_instances_ref.where(
-            filter=firestore.FieldFilter('assignee', '==', data.get('user_id'))
-        ).where(
-            filter=firestore.FieldFilter('dueDate', '>=', start_of_day_str)
-        ).where(
-            filter=firestore.FieldFilter('dueDate', '<=', end_of_day_str)
-        )
-        results = query.get()
-        for instance in results:
-            instances.append(instance.to_dict())
-        return instances
+        house_ref = db.collection('houses').document(data.get('house_id'))
+        start_of_day_utc, _ = current_day_range()
+        agenda_ref = house_ref.collection(AGENDAS).document(agenda_id(data.get('user_id'), start_of_day_utc))
+        agenda = agenda_ref.get()
+        if agenda.exists:
+            return agenda_instances(agenda.to_dict())
+        return agenda_instances(build_agenda(db, data.get('house_id'), data.get('user_id')))
     except Exception as e:
         print(f"Error getting chore instances for user {data.get('user_id')} in house {data.get('house_id')}: {e}")
         return []
-    
+
 def get_chore_instances_by_house(db, data):
     """
     Retrieves chore instances for a specific user within a date range.
+    If any of PAGE_OPTIONS are given, only one filtered page is returned
+    (see list_chore_instances).
 
     Args:
         db (firestore.Client): The Firestore client.
-        data: json of house_id
+        data: json of house_id, and optionally PAGE_OPTIONS
 
     Returns:
         list: A list of chore instance dictionaries, or an empty list on error.
+        When paginating: {'instances': [...], 'nextStartAfter': <id or None>},
+        or a 400 error if the page options are invalid.
     """
     try:
+        if any(key in data for key in PAGE_OPTIONS):
+            try:
+                page, next_start_after = list_chore_instances(db, data.get('house_id'), data)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid page options: {e}'}), 400
+            return {'instances': list(page.values()), 'nextStartAfter': next_start_after}
+
         instances = []
         CHORE_INSTANCES = db.collection('houses').document(data.get('house_id')).collection('choreInstances')
 
@@ -126,6 +254,651 @@ def get_chore_instances_by_house(db, data):
         print(f"Error getting chore instances for house {data.get('house_id')}: {e}")
         return []
     
+def list_chore_instances(db, house_id, options):
+    """
+    Retrieves one page of a house's chore instances, optionally filtered and
+    projected to a subset of fields.
+    Results are ordered by dueDate when a date range is given and by
+    document ID otherwise. To get the next page, pass the returned cursor
+    as start_after.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        options (dict): Any of
+            limit (int): page size, at most MAX_PAGE_SIZE
+            start_after (str): the ID of the last instance of the previous page
+            isDone (bool or 'true'/'false'), assignee (str), choreID (str): equality filters
+            dueAfter, dueBefore (date string): inclusive dueDate range
+            fields (list or comma-separated str): the fields to return
+
+    Returns:
+        tuple: ({<instance_id>: <instance data>, ...}, <next start_after, or None on the last page>)
+
+    Raises:
+        ValueError: If limit isn't a positive integer, or start_after is an
+            instance that no longer exists (paging can't resume from it).
+    """
+    CHORE_INSTANCES = db.collection('houses').document(house_id).collection('choreInstances')
+    query, limit = chore_instance_page_query(CHORE_INSTANCES, options)
+
+    if options.get('start_after'):
+        cursor = CHORE_INSTANCES.document(options.get('start_after')).get()
+        query = query.start_after(page_cursor(cursor))
+
+    # fetch one extra document to know whether there is another page
+    docs = list(query.limit(limit + 1).stream())
+    page = {doc.id: doc.to_dict() for doc in docs[:limit]}
+    next_start_after = docs[limit - 1].id if len(docs) > limit else None
+    return page, next_start_after
+
+
+def chore_instance_page_query(CHORE_INSTANCES, options):
+    """
+    Builds the filtered, ordered and projected query for a page of chore
+    instances (see list_chore_instances), without the start_after cursor.
+    Works on both firestore.Client and firestore.AsyncClient collections.
+
+    Args:
+        CHORE_INSTANCES: A house's choreInstances collection reference.
+        options (dict): The page options, see list_chore_instances.
+
+    Returns:
+        tuple: (query, page size)
+
+    Raises:
+        ValueError: If limit isn't a positive integer.
+    """
+    limit = options.get('limit')
+    limit = MAX_PAGE_SIZE if limit is None or limit == '' else int(limit)
+    if limit <= 0:
+        raise ValueError('limit must be a positive integer')
+    query = CHORE_INSTANCES
+
+    if options.get('isDone') is not None:
+        is_done = options.get('isDone')
+        if isinstance(is_done, str):
+            is_done = is_done.lower() == 'true'
+        query = query.where(filter=firestore.FieldFilter('isDone', '==', is_done))
+    for field in ['assignee', 'choreID']:
+        if options.get(field):
+            query = query.where(filter=firestore.FieldFilter(field, '==', options.get(field)))
+
+    due_after = parse_date(options.get('dueAfter'))
+    due_before = parse_date(options.get('dueBefore'))
+    if due_after is not None:
+        query = query.where(filter=firestore.FieldFilter('dueDate', '>=', due_after))
+    if due_before is not None:
+        query = query.where(filter=firestore.FieldFilter('dueDate', '<=', due_before))
+    if due_after is not None or due_before is not None:
+        query = query.order_by('dueDate')
+    query = query.order_by('__name__')
+
+    fields = options.get('fields')
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if fields:
+        query = query.select(fields)
+
+    return query, min(limit, MAX_PAGE_SIZE)
+
+
+def page_cursor(snapshot):
+    """
+    Returns the start_after instance's snapshot to resume paging from.
+
+    Raises:
+        ValueError: If the instance no longer exists.
+    """
+    if not snapshot.exists:
+        raise ValueError(f'start_after instance {snapshot.id} not found')
+    return snapshot
+
+
+def current_day_range(now=None):
+    """
+    Returns the first and last instants of the current UTC day.
+
+    Args:
+        now (datetime.datetime): The current time. Defaults to now.
+
+    Returns:
+        tuple: (start of day, end of day) as timezone-aware datetimes
+    """
+    today_utc = (now or datetime.datetime.now(datetime.timezone.utc)).date()
+    return (datetime.datetime.combine(today_utc, datetime.time.min, tzinfo=datetime.timezone.utc),
+            datetime.datetime.combine(today_utc, datetime.time.max, tzinfo=datetime.timezone.utc))
+
+
+def current_day_query(CHORE_INSTANCES, user_id, now=None):
+    """
+    Returns the query for a user's chore instances due today (UTC). dueDate
+    is stored as a timestamp (see utils.normalize_dates), so this is served
+    by the (assignee, dueDate) index in firestore.indexes.json.
+
+    Args:
+        CHORE_INSTANCES: A house's choreInstances collection reference.
+        user_id (str): The assignee.
+        now (datetime.datetime): The current time. Defaults to now.
+    """
+    start_of_day_utc, end_of_day_utc = current_day_range(now)
+    return CHORE_INSTANCES.where(
+        filter=firestore.FieldFilter('assignee', '==', user_id)
+    ).where(
+        filter=firestore.FieldFilter('dueDate', '>=', start_of_day_utc)
+    ).where(
+        filter=firestore.FieldFilter('dueDate', '<=', end_of_day_utc)
+    )
+
+
+def agenda_id(assignee, due_date):
+    """
+    Returns the ID of the agenda a chore instance belongs on.
+
+    Args:
+        assignee (str): The instance's assignee.
+        due_date: The instance's dueDate (a datetime or date string).
+
+    Returns:
+        str: '<assignee>_<YYYY-MM-DD>', or None without an assignee or a valid due date.
+    """
+    due = parse_date(due_date)
+    if not assignee or due is None:
+        return None
+    return f"{assignee}_{due.date().isoformat()}"
+
+
+def agenda_instances(agenda):
+    """
+    Returns an agenda's chore instances, ordered by ID like a query's results.
+    """
+    instances = agenda.get('instances') or {}
+    return [instances[instance_id] for instance_id in sorted(instances)]
+
+
+def build_agenda(db, house_id, user_id, now=None):
+    """
+    Creates a user's agenda for today from their chore instances due today,
+    unless it already exists. Runs in a transaction so that chore instance
+    writes made meanwhile are either included or applied on top.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        user_id (str): The member whose agenda to build.
+        now (datetime.datetime): The current time. Defaults to now.
+
+    Returns:
+        dict: The agenda document.
+    """
+    house_ref = db.collection('houses').document(house_id)
+    start_of_day_utc, _ = current_day_range(now)
+    agenda_ref = house_ref.collection(AGENDAS).document(agenda_id(user_id, start_of_day_utc))
+    query = current_day_query(house_ref.collection('choreInstances'), user_id, now)
+
+    @firestore.transactional
+    def build(transaction):
+        agenda = agenda_ref.get(transaction=transaction)
+        if agenda.exists:
+            return agenda.to_dict()
+        built = {
+            'assignee': user_id,
+            'day': start_of_day_utc.date().isoformat(),
+            'expireAt': start_of_day_utc + datetime.timedelta(days=1 + AGENDA_TTL_DAYS),
+            'instances': {doc.id: doc.to_dict() for doc in transaction.get(query)}
+        }
+        transaction.set(agenda_ref, built)
+        return built
+
+    return build(db.transaction())
+
+
+def completion_counts(instance):
+    """
+    Returns the counters a chore instance adds to its assignee's totals:
+    {'completed': 1, 'onTime': 1 or 0, 'late': 0 or 1} if it is done and
+    assigned, otherwise None.
+    """
+    if not instance or not instance.get('isDone') or not instance.get('assignee'):
+        return None
+    on_time = 1 if instance.get('doneOnTime') else 0
+    return {'completed': 1, 'onTime': on_time, 'late': 1 - on_time}
+
+
+def add_counts(totals, member_id, subgroup_ids, counts, sign=1):
+    """
+    Adds (or with sign=-1, subtracts) counts to a member's and their
+    subgroups' counters in a completion counters document.
+    """
+    for key, entry_id in [('members', member_id)] + [('subgroups', subgroup_id) for subgroup_id in subgroup_ids]:
+        entry = totals.setdefault(key, {}).setdefault(entry_id, dict.fromkeys(COUNTERS, 0))
+        for counter in COUNTERS:
+            entry[counter] += sign * counts[counter]
+
+
+def build_chore_stats(db, house_id, rebuild=False):
+    """
+    Creates a house's completion counters document from its done chore
+    instances, unless it already exists. Runs in a transaction so that
+    chore instance writes made meanwhile are either included or applied on
+    top.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        rebuild (bool): If True, recount an existing document too.
+
+    Returns:
+        dict: The completion counters document.
+    """
+    house_ref = db.collection('houses').document(house_id)
+    stats_ref = house_ref.collection(STATS).document(CHORE_STATS)
+    done = house_ref.collection('choreInstances').where(
+        filter=firestore.FieldFilter('isDone', '==', True)
+    ).select(['assignee', 'isDone', 'doneOnTime'])
+
+    @firestore.transactional
+    def build(transaction):
+        stats = stats_ref.get(transaction=transaction)
+        if stats.exists and not rebuild:
+            return stats.to_dict()
+        members = {member.id: (member.to_dict() or {}).get('subgroups') or []
+                   for member in transaction.get(house_ref.collection('members').select(['subgroups']))}
+        totals = {'members': {}, 'subgroups': {}}
+        for instance in transaction.get(done):
+            data = instance.to_dict()
+            counts = completion_counts(data)
+            if counts:
+                add_counts(totals, data['assignee'], members.get(data['assignee'], []), counts)
+        transaction.set(stats_ref, totals)
+        return totals
+
+    return build(db.transaction())
+
+
+def with_on_time_pct(totals):
+    """
+    Returns a completion counters document with each entry's onTimePct, the
+    percentage of its completed chores done on time (None if there are none).
+    """
+    return {
+        key: {entry_id: dict(counts, onTimePct=round(100 * counts['onTime'] / counts['completed'])
+                             if counts['completed'] else None)
+              for entry_id, counts in (totals.get(key) or {}).items()}
+        for key in ['members', 'subgroups']
+    }
+
+
+def get_chore_stats(db, house_id):
+    """
+    Retrieves a house's completion counters per member and per subgroup,
+    building them first if this is their first read. Each entry also gets
+    its onTimePct, the percentage of completed chores done on time.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+
+    Returns:
+        dict: {'members': {<member_id>: {'completed': int, 'onTime': int, 'late': int, 'onTimePct': int}},
+               'subgroups': {<subgroup_id>: {...}}}
+    """
+    try:
+        stats = db.collection('houses').document(house_id).collection(STATS).document(CHORE_STATS).get()
+        return with_on_time_pct(stats.to_dict() if stats.exists else build_chore_stats(db, house_id))
+    except Exception as e:
+        print(f"Error getting chore stats for house {house_id}: {e}")
+        return jsonify({'error': 'Could not get chore stats'}), 500
+
+
+def write_chore_instances(db, house_id, instances=(), delete_ids=(), merge=False):
+    """
+    Writes and/or deletes chore instances, and updates the agendas they move
+    off of and onto and the house's completion counters (when those exist)
+    in the same transaction, one transaction per AGENDA_CHUNK_SIZE instances.
+    Written instances are stamped with updatedAt and deleted ones leave a
+    tombstone, for /sync-<house_id>.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        instances (list(dict)): Chore instances to create or overwrite.
+        delete_ids (list(str)): IDs of chore instances to delete.
+        merge (bool): Merge the instances' fields into the current
+            documents (if any) instead of overwriting them.
+    """
+    house_ref = db.collection('houses').document(house_id)
+    CHORE_INSTANCES = house_ref.collection('choreInstances')
+    changes = [(instance.get('id'), normalize_dates(instance)) for instance in instances]
+    changes += [(instance_id, None) for instance_id in delete_ids]
+
+    @firestore.transactional
+    def write(transaction, chunk):
+        refs = [CHORE_INSTANCES.document(instance_id) for instance_id, _ in chunk]
+        previous = {doc.id: doc.to_dict() for doc in transaction.get_all(refs) if doc.exists}
+        if merge:
+            chunk = [(instance_id, data if data is None else dict(previous.get(instance_id) or {}, **data))
+                     for instance_id, data in chunk]
+        stage_chore_instance_writes(transaction, house_ref, chunk, previous)
+
+    for start in range(0, len(changes), AGENDA_CHUNK_SIZE):
+        write(db.transaction(), changes[start:start + AGENDA_CHUNK_SIZE])
+
+
+def patch_chore_instance(db, house_id, instance_id, fields):
+    """
+    Changes some fields of an existing chore instance, in a transaction
+    that also updates its agendas and the house's completion counters (see
+    write_chore_instances).
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        instance_id (str): The ID of the chore instance.
+        fields (dict): The fields to change.
+
+    Returns:
+        bool: Whether the chore instance exists (nothing is written if not).
+    """
+    house_ref = db.collection('houses').document(house_id)
+    instance_ref = house_ref.collection('choreInstances').document(instance_id)
+    fields = normalize_dates(fields)
+
+    @firestore.transactional
+    def write(transaction):
+        instance = instance_ref.get(transaction=transaction)
+        if not instance.exists:
+            return False
+        previous = instance.to_dict()
+        stage_chore_instance_writes(transaction, house_ref, [(instance_id, dict(previous, **fields))],
+                                    {instance_id: previous})
+        return True
+    return write(db.transaction())
+
+
+def stage_chore_instance_writes(transaction, house_ref, changes, previous):
+    """
+    Reads the agendas and completion counters that chore instance writes
+    affect and adds the writes of the instances and of those documents to
+    transaction (see write_chore_instances). It reads before writing, so
+    call it after the transaction's other reads and before its other writes.
+
+    Args:
+        transaction (firestore.Transaction): The transaction, which must
+            have read the instances' current documents.
+        house_ref (firestore.DocumentReference): The house.
+        changes (list(tuple)): (<instance ID>, <new instance data, or None to delete it>)
+            for at most AGENDA_CHUNK_SIZE instances.
+        previous (dict): {<instance ID>: <current instance data>} for the
+            instances that exist.
+    """
+    CHORE_INSTANCES = house_ref.collection('choreInstances')
+    AGENDA_DOCS = house_ref.collection(AGENDAS)
+    MEMBERS = house_ref.collection('members')
+    stats_ref = house_ref.collection(STATS).document(CHORE_STATS)
+
+    # agenda ID -> {instance ID: new instance data, or None to remove it}
+    moves = {}
+    for instance_id, data in changes:
+        old = previous.get(instance_id)
+        if old is not None:
+            moves.setdefault(agenda_id(old.get('assignee'), old.get('dueDate')), {})[instance_id] = None
+        if data is not None:
+            moves.setdefault(agenda_id(data.get('assignee'), data.get('dueDate')), {})[instance_id] = data
+    moves.pop(None, None)
+
+    # (assignee, counters, 1 or -1) for instances completed, un-completed or reassigned
+    completions = []
+    for instance_id, data in changes:
+        old = previous.get(instance_id)
+        old_counts, new_counts = completion_counts(old), completion_counts(data)
+        if old_counts and new_counts and old.get('assignee') == data.get('assignee') and old_counts == new_counts:
+            continue
+        if old_counts:
+            completions.append((old.get('assignee'), old_counts, -1))
+        if new_counts:
+            completions.append((data.get('assignee'), new_counts, 1))
+
+    stats = stats_ref.get(transaction=transaction) if completions else None
+    if stats is not None and stats.exists:
+        # Transaction.get_all can't project fields, so this reads whole member documents
+        members = {member.id: (member.to_dict() or {}).get('subgroups') or []
+                   for member in transaction.get_all(
+                       [MEMBERS.document(assignee) for assignee in {assignee for assignee, _, _ in completions}])}
+        totals = stats.to_dict()
+        for assignee, counts, sign in completions:
+            add_counts(totals, assignee, members.get(assignee, []), counts, sign)
+    else:
+        totals = None
+
+    agendas = transaction.get_all([AGENDA_DOCS.document(agenda) for agenda in moves]) if moves else []
+    for agenda in agendas:
+        if not agenda.exists:
+            continue
+        entries = agenda.to_dict().get('instances') or {}
+        for instance_id, data in moves[agenda.id].items():
+            if data is None:
+                entries.pop(instance_id, None)
+            else:
+                entries[instance_id] = data
+        transaction.update(agenda.reference, {'instances': entries})
+
+    if totals is not None:
+        transaction.set(stats_ref, totals)
+
+    for instance_id, data in changes:
+        ref = CHORE_INSTANCES.document(instance_id)
+        if data is None:
+            transaction.delete(ref)
+            transaction.set(*tombstone(house_ref, 'choreInstances', instance_id))
+        else:
+            transaction.set(ref, stamp_updated(data))
+
+
+def get_chore_occurrences(chore, until):
+    """
+    Expands a chore's frequencyPattern, frequencyDays and startDate into the
+    datetimes at which it occurs.
+    frequencyDays are weekdays (1 = Monday ... 7 = Sunday) for weekly and
+    biweekly chores and days of the month for monthly chores. Daily chores
+    ignore them.
+
+    Args:
+        chore (dict): The chore document.
+        until (datetime.datetime): The last datetime to include.
+
+    Returns:
+        dateutil.rrule.rrule: The occurrences, or None if the chore has no
+        valid start date or frequency.
+    """
+    start = parse_date(chore.get('startDate'))
+    pattern = str(chore.get('frequencyPattern') or '').lower()
+    if start is None or pattern not in FREQUENCIES:
+        return None
+    freq, interval = FREQUENCIES[pattern]
+    days = [int(day) for day in chore.get('frequencyDays') or []]
+
+    rule_args = {}
+    if days and freq == WEEKLY:
+        rule_args['byweekday'] = [(day - 1) % 7 for day in days]
+    elif days and freq == MONTHLY:
+        rule_args['bymonthday'] = days
+    return rrule(freq, interval=interval, dtstart=start, until=until, **rule_args)
+
+
+def generate_chore_instances(db, chore, house_id, horizon_days=DEFAULT_HORIZON_DAYS, now=None):
+    """
+    Creates the chore instances of a chore that fall between now and
+    horizon_days from now. Occurrences that already have an instance (one
+    whose dueDate falls on that occurrence's day, or with the occurrence's
+    ID, wherever it was moved) are skipped, so this can be called repeatedly
+    to roll the window forward. So are the occurrences whose instance was
+    deleted, which leave a tombstone.
+    Instances are assigned round-robin across the chore's assignees, counting
+    from the chore's startDate so the rotation is stable between calls.
+    Each instance is due at the end (23:59:59 UTC) of the day its
+    occurrence falls on, so it is on that day's agendas.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        chore (dict): The chore document.
+        house_id (str): The ID of the house the chore belongs to.
+        horizon_days (int): How many days ahead to generate instances for.
+        now (datetime.datetime): The start of the window. Defaults to the current time.
+
+    Returns:
+        list: The chore instance dictionaries that were created.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    until = now + datetime.timedelta(days=horizon_days)
+    occurrences = get_chore_occurrences(chore, until)
+    assignees = chore.get('assignees') or []
+    if occurrences is None or not assignees:
+        return []
+
+    chore_id = chore.get('id')
+    house_ref = db.collection('houses').document(house_id)
+    CHORE_INSTANCES = house_ref.collection('choreInstances')
+    # only instances due from a day before now can be on the days generated
+    # (uses the (choreID, dueDate) index)
+    existing = CHORE_INSTANCES.where(
+        filter=firestore.FieldFilter('choreID', '==', chore_id)
+    ).where(
+        filter=firestore.FieldFilter('dueDate', '>=', now - datetime.timedelta(days=1))
+    ).select(['dueDate']).get()
+    existing_ids = {doc.id for doc in existing}
+    existing_due = sorted(filter(None, (parse_date(doc.to_dict().get('dueDate')) for doc in existing)))
+
+    created = []
+    day = datetime.timedelta(days=1)
+    for index, occurrence in enumerate(occurrences):
+        start_of_day, due = current_day_range(occurrence.astimezone(datetime.timezone.utc))
+        due = due.replace(microsecond=0)
+        if due < now:
+            continue
+        # skip occurrences that already have an instance due that day
+        pos = bisect.bisect_left(existing_due, start_of_day)
+        if pos < len(existing_due) and existing_due[pos] < start_of_day + day:
+            continue
+        instance_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f'{chore_id}/{occurrence.isoformat()}'))
+        if instance_id in existing_ids:
+            continue
+        created.append({
+            'id': instance_id,
+            'assignee': assignees[index % len(assignees)],
+            'choreID': chore_id,
+            'doneOnTime': False,
+            'dueDate': due,
+            'isDone': False,
+            'swapID': ''
+        })
+
+    if created:
+        # an instance moved out of the window or deleted since it was
+        # generated must not be overwritten or recreated
+        refs = [CHORE_INSTANCES.document(instance['id']) for instance in created] + \
+               [house_ref.collection(TOMBSTONES).document(f"choreInstances_{instance['id']}") for instance in created]
+        taken = {doc.id for doc in db.get_all(refs) if doc.exists}
+        created = [instance for instance in created
+                   if instance['id'] not in taken and f"choreInstances_{instance['id']}" not in taken]
+
+    write_chore_instances(db, house_id, created)
+    return created
+
+
+def generate_instances_for_chore(db, data, house_id):
+    """
+    Looks up a stored chore and generates its missing chore instances.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        data: json of the chore id and, optionally, horizonDays
+        house_id (str): The ID of the house the chore belongs to.
+
+    Returns:
+        {'id': <chore_id>, 'instancesCreated': <count>}
+    """
+    try:
+        chore_id = data.get('id')
+        chore = db.collection('houses').document(house_id).collection('chores').document(chore_id).get()
+        if not chore.exists:
+            return jsonify({'error': f'Chore with id {chore_id} not found'}), 400
+        horizon_days = int(data.get('horizonDays') or DEFAULT_HORIZON_DAYS)
+        created = generate_chore_instances(db, chore.to_dict(), house_id, horizon_days)
+        return jsonify({'id': chore_id, 'instancesCreated': len(created)})
+    except Exception as e:
+        print(f"Error generating chore instances for chore {data.get('id')} in house {house_id}: {e}")
+        return jsonify({'error': 'Could not generate chore instances'}), 500
+
+
+def roll_over_chores(db, house_id, horizon_days=DEFAULT_HORIZON_DAYS, now=None):
+    """
+    Generates the missing chore instances of every recurring chore of a
+    house (one with a frequencyPattern) up to horizon_days ahead.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        horizon_days (int): How many days ahead to generate instances for.
+        now (datetime.datetime): The start of the window. Defaults to the current time.
+
+    Returns:
+        int: The number of chore instances created.
+    """
+    chores = db.collection('houses').document(house_id).collection('chores').stream()
+    return sum(len(generate_chore_instances(db, chore.to_dict(), house_id, horizon_days, now))
+               for chore in chores if (chore.to_dict() or {}).get('frequencyPattern'))
+
+
+def mark_overdue_instances(db, house_id, now=None):
+    """
+    Marks the chore instances of a house that fell due (since the previous
+    call) without being done as overdue: overdue is set and doneOnTime
+    cleared, in transactions of up to AGENDA_CHUNK_SIZE instances that
+    also update the agendas they are on. Instances done or marked in the
+    meantime are left alone. The cursor is only written when instances
+    fell due, so a pass that finds none costs two reads and no writes.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        now (datetime.datetime): Instances due before this are overdue. Defaults to the current time.
+
+    Returns:
+        int: The number of chore instances marked overdue.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    house_ref = db.collection('houses').document(house_id)
+    CHORE_INSTANCES = house_ref.collection('choreInstances')
+    cursor_ref = house_ref.collection(STATS).document(OVERDUE_CURSOR)
+    cursor = cursor_ref.get()
+    checked_until = cursor.to_dict().get('checkedUntil') if cursor.exists else None
+
+    query = CHORE_INSTANCES.where(filter=firestore.FieldFilter('isDone', '==', False)).where(
+        filter=firestore.FieldFilter('dueDate', '<', now))
+    if checked_until is not None:
+        query = query.where(filter=firestore.FieldFilter('dueDate', '>', checked_until))
+    due = [(doc.id, doc.to_dict() or {}) for doc in query.select(['overdue', 'dueDate']).stream()]
+    instance_ids = [instance_id for instance_id, data in due if not data.get('overdue')]
+
+    @firestore.transactional
+    def mark(transaction, chunk):
+        previous = {doc.id: doc.to_dict() for doc in transaction.get_all(
+            [CHORE_INSTANCES.document(instance_id) for instance_id in chunk]) if doc.exists}
+        changes = [(instance_id, dict(data, overdue=True, doneOnTime=False)) for instance_id, data in previous.items()
+                   if not data.get('isDone') and not data.get('overdue')]
+        if changes:
+            stage_chore_instance_writes(transaction, house_ref, changes, previous)
+        return len(changes)
+
+    marked = 0
+    for start in range(0, len(instance_ids), AGENDA_CHUNK_SIZE):
+        marked += mark(db.transaction(), instance_ids[start:start + AGENDA_CHUNK_SIZE])
+    if due:
+        cursor_ref.set({'checkedUntil': max(data['dueDate'] for _, data in due)})
+    return marked
+
+
 # /// Un-Implemented Functions /// #
     # These functions have been written, but aren't used
     # and haven't been tested.
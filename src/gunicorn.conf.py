@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+
+# /// Gunicorn Configuration /// #
+    # Production server settings. Run (from ./src):
+    #     gunicorn -c gunicorn.conf.py wsgi:app                       # WSGI (default)
+    #     SERVER_MODE=asgi gunicorn -c gunicorn.conf.py asgi:asgi_app  # async mode, see asgi.py
+    #
+    # Requests spend most of their time waiting on Firestore, so each
+    # worker process (one per core, since a process only runs Python on
+    # one core at a time) serves several requests at once: on
+    # GUNICORN_THREADS threads in WSGI mode, or on one event loop in ASGI
+    # mode. Capacity is then roughly cores x threads concurrent requests.
+    #
+    # The master reads the Firebase credentials, imports the Firestore
+    # library and loads the app once (preload_app); each worker opens its
+    # own Firestore client after the fork, because gRPC channels don't
+    # survive a fork.
+    #
+    # Environment variables:
+    #     PORT               port to listen on (default 5000)
+    #     SERVER_MODE        wsgi or asgi (default wsgi)
+    #     WEB_CONCURRENCY    worker processes (default: one per core)
+    #     GUNICORN_THREADS   threads per WSGI worker (default 8)
+    #     GUNICORN_TIMEOUT   seconds before a stuck worker is restarted (default 30)
+    #     SCHEDULER_ENABLED  run the background jobs in the workers, see utils/scheduler.py
+
+# A request waits ~5-20ms on each Firestore RPC and uses ~1-2ms of CPU, so
+# about 8 threads keep a core busy without piling up requests behind the GIL
+DEFAULT_THREADS = 8
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi').lower()
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+if SERVER_MODE == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', DEFAULT_THREADS))
+
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so memory growth stays bounded; the jitter
+# stops every worker restarting at once
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    # Runs in the master before the app is loaded and the workers forked
+    from utils.firebase_utils import preload_firebase
+    preload_firebase()
+
+
+def post_fork(server, worker):
+    # Open this worker's Firestore client now, rather than on its first request
+    from utils.firebase_utils import get_firestore_db
+    try:
+        get_firestore_db()
+    except Exception as e:
+        server.log.error(f"Could not create the Firestore client in worker {worker.pid}: {e}")
+
+    # Run the background jobs in this worker if SCHEDULER_ENABLED is set.
+    # Workers share them out through leases, see utils/scheduler.py.
+    from utils.scheduler import create_scheduler
+    scheduler = create_scheduler(get_firestore_db)
+    if scheduler is not None:
+        scheduler.start()
@@ -21,8 +21,28 @@ from houseService.house_utils import (
     create_house,
     get_house,
     add_member_to_house,
-    get_houses_by_user
+    get_houses_by_user,
+    get_houses,
+    get_house_snapshot,
+    delete_collection,
+    delete_house,
+    bulk_upsert,
+    stream_house_collection,
+    save_house,
+    get_house_by_join_code,
+    get_house_changes,
+    delete_house_document,
+    patch_house_document,
+    patch_house,
+    bump_house_versions,
+    join_code_cache,
+    JOIN_CODE_LENGTH
 )
+from choreService.chore_utils import upsert_chore, delete_chore_instance, current_day_range
+from utils.utils import parse_date
+from houseService import house_async_utils
+from utils.fake_firestore import FakeFirestore
+import asyncio
 
 
 class TestHouseService(unittest.TestCase):
@@ -52,6 +72,9 @@ class TestHouseService(unittest.TestCase):
         self.mock_document_snapshot = MagicMock()
         self.mock_document.get.return_value = self.mock_document_snapshot
 
+        self.mock_transaction = MagicMock(_max_attempts=1, _read_only=False)
+        self.mock_db.transaction.return_value = self.mock_transaction
+
         self.app = Flask(__name__)
         self.app.config['FIRESTORE_DB'] = self.mock_db
         self.app_context = self.app.app_context() 
@@ -80,6 +103,7 @@ class TestHouseService(unittest.TestCase):
         Test successful creation of a house.
         """
         self.mock_document.id = 'new_house_id'
+        self.mock_document_snapshot.exists = False
         result = create_house(self.mock_db, {
             'id': 'new_house_id', 
             'name': 'Test House',
@@ -88,9 +112,8 @@ class TestHouseService(unittest.TestCase):
             'imageID': 'abc123',
             'joinCode': 'meaningless'
         })
-        self.assertEqual(result.get_json(), {'id': 'new_house_id'})
-        self.mock_collection.document.assert_called_once()
-        self.mock_document.set.assert_called_once_with({
+        self.assertEqual(result.get_json(), {'id': 'new_house_id', 'joinCode': 'meaningless'})
+        self.mock_transaction.set.assert_any_call(self.mock_document, {
             'id': 'new_house_id',
             'name': 'Test House',
             'members': ['user123'],
@@ -98,12 +121,15 @@ class TestHouseService(unittest.TestCase):
             'imageID': 'abc123',
             'joinCode': 'meaningless'
         })
+        self.mock_transaction.set.assert_any_call(self.mock_document,
+                                                  {'code': 'meaningless', 'houseID': 'new_house_id'})
 
     def test_create_house_failure(self):
         """
         Test failure to create a house.
         """
-        self.mock_document.set.side_effect = Exception('Failed to create house')
+        self.mock_document_snapshot.exists = False
+        self.mock_transaction.set.side_effect = Exception('Failed to create house')
         result = create_house(self.mock_db, {'id': 'exid'})
         self.assertDictEqual(result[0].get_json(), {'error': 'Error creating house'})
         self.assertEqual(result[1], 500)
@@ -180,5 +206,557 @@ class TestHouseService(unittest.TestCase):
         result = get_houses_by_user(self.mock_db, "user1")
         self.assertEqual(result, [])
 
+    def test_get_house_snapshot_success(self):
+        """
+        Test retrieving a house and all of its subcollections in one call.
+        """
+        self.mock_document_snapshot.exists = True
+        self.mock_document_snapshot.to_dict.return_value = {'id': 'house123', 'name': 'Test House'}
+
+        def collection(name):
+            doc = MagicMock(id=f'{name}_doc')
+            doc.to_dict.return_value = {'id': f'{name}_doc'}
+            coll = MagicMock()
+            coll.stream.return_value = [doc]
+            return coll
+        self.mock_document.collection.side_effect = collection
+
+        result = get_house_snapshot(self.mock_db, 'house123')
+
+        self.assertEqual(result['house'], {'id': 'house123', 'name': 'Test House'})
+        for name in ['chores', 'choreInstances', 'members', 'subgroups', 'swaps']:
+            self.assertEqual(result[name], {f'{name}_doc': {'id': f'{name}_doc'}})
+        self.mock_document.get.assert_called_once()
+
+    def test_get_house_snapshot_not_found(self):
+        """
+        Test that a missing house is reported without reading subcollections.
+        """
+        self.mock_document_snapshot.exists = False
+        result = get_house_snapshot(self.mock_db, 'house123')
+        self.assertDictEqual(result[0].get_json(), {'error': 'House with id house123 not found'})
+        self.assertEqual(result[1], 400)
+        self.mock_document.collection.assert_not_called()
+
+    def test_get_house_snapshot_failure(self):
+        """
+        Test failure to read a subcollection.
+        """
+        self.mock_document_snapshot.exists = True
+        self.mock_document.collection.return_value.stream.side_effect = Exception('Failed to stream')
+        result = get_house_snapshot(self.mock_db, 'house123')
+        self.assertDictEqual(result[0].get_json(), {'error': 'Could not get house snapshot'})
+        self.assertEqual(result[1], 500)
+
+    def test_delete_collection_batches(self):
+        """
+        Test that documents are deleted in batches until the collection is empty.
+        """
+        coll_ref = MagicMock()
+        page = [MagicMock() for _ in range(3)]
+        coll_ref.select.return_value.limit.return_value.stream.side_effect = [page, page, []]
+        mock_batch = MagicMock()
+        self.mock_db.batch.return_value = mock_batch
+
+        deleted = delete_collection(self.mock_db, coll_ref, batch_size=3)
+
+        self.assertEqual(deleted, 6)
+        self.assertEqual(mock_batch.delete.call_count, 6)
+        self.assertEqual(mock_batch.commit.call_count, 2)
+        coll_ref.select.return_value.limit.assert_called_with(3)
+
+    def test_delete_collection_dry_run(self):
+        """
+        Test that a dry run counts documents without deleting any.
+        """
+        coll_ref = MagicMock()
+        coll_ref.count.return_value.get.return_value = [[MagicMock(value=42)]]
+
+        deleted = delete_collection(self.mock_db, coll_ref, dry_run=True)
+
+        self.assertEqual(deleted, 42)
+        self.mock_db.batch.assert_not_called()
+        coll_ref.stream.assert_not_called()
+
+    def test_delete_house_success(self):
+        """
+        Test deleting a house deletes every subcollection and then the house.
+        """
+        coll_ref = MagicMock()
+        coll_ref.select.return_value.limit.return_value.stream.return_value = [MagicMock()]
+        self.mock_document.collection.return_value = coll_ref
+        self.mock_document_snapshot.exists = False
+
+        result = delete_house(self.mock_db, 'house123').get_json()
+
+        self.assertEqual(result['id'], 'house123')
+        self.assertFalse(result['dryRun'])
+        self.assertEqual(set(result['collections']),
+                         {'chores', 'choreInstances', 'members', 'subgroups', 'swaps', 'agendas', 'stats', 'tombstones'})
+        for stats in result['collections'].values():
+            self.assertEqual(stats['deleted'], 1)
+        self.mock_document.delete.assert_called_once()
+
+    def test_delete_house_dry_run(self):
+        """
+        Test that a dry run leaves the house in place.
+        """
+        self.mock_document.collection.return_value.count.return_value.get.return_value = [[MagicMock(value=2)]]
+
+        result = delete_house(self.mock_db, 'house123', dry_run=True).get_json()
+
+        self.assertTrue(result['dryRun'])
+        self.assertEqual(result['collections']['chores']['deleted'], 2)
+        self.mock_document.delete.assert_not_called()
+        self.mock_db.batch.assert_not_called()
+
+    def test_delete_house_failure(self):
+        """
+        Test failure while deleting a house leaves the house document in place.
+        """
+        self.mock_document.collection.side_effect = Exception('Failed to delete')
+        result = delete_house(self.mock_db, 'house123')
+        self.assertDictEqual(result[0].get_json(), {'error': 'Could not delete house'})
+        self.assertEqual(result[1], 500)
+        self.mock_document.delete.assert_not_called()
+
+    def test_bulk_upsert_success(self):
+        """
+        Test that documents are written in batches with one result per item.
+        """
+        mock_batch = MagicMock()
+        self.mock_db.batch.return_value = mock_batch
+        items = [{'id': f'sub{i}', 'name': f'Subgroup {i}'} for i in range(3)]
+
+        with patch('houseService.house_utils.MAX_BATCH_WRITES', 2):
+            result = bulk_upsert(self.mock_db, 'house123', 'subgroups', items).get_json()
+
+        self.assertEqual(result['written'], 3)
+        self.assertEqual(result['failed'], 0)
+        self.assertEqual([r['id'] for r in result['results']], ['sub0', 'sub1', 'sub2'])
+        self.assertEqual(mock_batch.set.call_count, 3)
+        self.assertEqual(mock_batch.commit.call_count, 2)
+        self.mock_document.collection.assert_called_with('subgroups')
+
+    def test_bulk_upsert_rejects_items_without_id(self):
+        """
+        Test that invalid items are reported without blocking the others.
+        """
+        result = bulk_upsert(self.mock_db, 'house123', 'chores', [{'id': 'ch1'}, {'name': 'No id'}]).get_json()
+        self.assertEqual(result['written'], 1)
+        self.assertEqual(result['results'][1], {'id': None, 'status': 'error', 'error': 'id is required'})
+        self.mock_db.batch.return_value.set.assert_called_once()
+
+    def test_bulk_upsert_failed_batch(self):
+        """
+        Test that a failed commit marks every item in the batch as failed.
+        """
+        self.mock_db.batch.return_value.commit.side_effect = Exception('Failed to commit')
+        result = bulk_upsert(self.mock_db, 'house123', 'swaps', [{'id': 's1'}, {'id': 's2'}]).get_json()
+        self.assertEqual(result['written'], 0)
+        self.assertEqual(result['failed'], 2)
+        self.assertTrue(all(r['status'] == 'error' for r in result['results']))
+
+    def test_bulk_upsert_requires_list(self):
+        """
+        Test that a body that isn't a list is rejected.
+        """
+        result = bulk_upsert(self.mock_db, 'house123', 'swaps', {'id': 's1'})
+        self.assertEqual(result[1], 400)
+
+    def test_stream_house_collection_success(self):
+        """
+        Test that a house's subcollection is returned as a document stream.
+        """
+        self.mock_document_snapshot.exists = True
+        stream = iter([MagicMock(id='chore1')])
+        self.mock_document.collection.return_value.stream.return_value = stream
+
+        result = stream_house_collection(self.mock_db, 'house123', 'chores')
+
+        self.assertIs(result, stream)
+        self.mock_document.collection.assert_called_once_with('chores')
+
+    def test_stream_house_collection_not_found(self):
+        """
+        Test that a missing house is reported before anything is streamed.
+        """
+        self.mock_document_snapshot.exists = False
+        result = stream_house_collection(self.mock_db, 'house123', 'chores')
+        self.assertDictEqual(result[0].get_json(), {'error': 'House does not exist'})
+        self.assertEqual(result[1], 400)
+        self.mock_document.collection.assert_not_called()
+
+    def _documents_by_id(self, snapshots):
+        """
+        Makes every collection return a separate document mock per ID,
+        whose get() returns a snapshot of snapshots[id] (or a missing one).
+        """
+        docs = {}
+
+        def document(doc_id):
+            if doc_id not in docs:
+                data = snapshots.get(doc_id)
+                doc = MagicMock(id=doc_id)
+                doc.get.return_value = MagicMock(exists=data is not None, id=doc_id)
+                doc.get.return_value.to_dict.return_value = data
+                docs[doc_id] = doc
+            return docs[doc_id]
+        self.mock_collection.document.side_effect = document
+        return docs
+
+    def test_save_house_rejects_taken_join_code(self):
+        """
+        Test that a join code belonging to another house is rejected.
+        """
+        self._documents_by_id({'TAKEN': {'code': 'TAKEN', 'houseID': 'other_house'}})
+        result = create_house(self.mock_db, {'id': 'house123', 'joinCode': 'TAKEN'})
+        self.assertEqual(result[1], 409)
+        self.mock_transaction.set.assert_not_called()
+
+    def test_save_house_allocates_join_code(self):
+        """
+        Test that a house without a join code is given an unused one.
+        """
+        docs = self._documents_by_id({})
+        saved = save_house(self.mock_db, {'id': 'house123', 'name': 'Test House'})
+        code = saved['joinCode']
+        self.assertEqual(len(code), JOIN_CODE_LENGTH)
+        self.mock_transaction.set.assert_any_call(docs[code], {'code': code, 'houseID': 'house123'})
+        self.mock_transaction.set.assert_any_call(docs['house123'], saved)
+
+    def test_save_house_keeps_existing_join_code(self):
+        """
+        Test that saving a house without a join code keeps its current one.
+        """
+        self._documents_by_id({
+            'house123': {'id': 'house123', 'joinCode': 'KEEPME'},
+            'KEEPME': {'code': 'KEEPME', 'houseID': 'house123'}
+        })
+        saved = save_house(self.mock_db, {'id': 'house123', 'name': 'Renamed'})
+        self.assertEqual(saved['joinCode'], 'KEEPME')
+        self.mock_transaction.delete.assert_not_called()
+
+    def test_save_house_releases_old_join_code(self):
+        """
+        Test that changing a house's join code removes the old index entry.
+        """
+        docs = self._documents_by_id({'house123': {'id': 'house123', 'joinCode': 'OLD'}})
+        save_house(self.mock_db, {'id': 'house123', 'joinCode': 'NEW'})
+        self.mock_transaction.delete.assert_called_once_with(docs['OLD'])
+
+    def test_get_house_by_join_code_uses_index(self):
+        """
+        Test that a join code is resolved through the joinCodes index.
+        """
+        join_code_cache.clear()
+        self._documents_by_id({
+            'CODE1': {'code': 'CODE1', 'houseID': 'house123'},
+            'house123': {'id': 'house123', 'joinCode': 'CODE1'}
+        })
+        self.assertEqual(get_house_by_join_code(self.mock_db, 'CODE1'), {'id': 'house123', 'joinCode': 'CODE1'})
+        self.mock_collection.where.assert_not_called()
+        self.assertEqual(join_code_cache.get('CODE1'), 'house123')
+
+    def test_get_house_by_join_code_backfills_index(self):
+        """
+        Test that houses missing from the index are found and indexed, in a
+        transaction that leaves a code claimed by another house alone.
+        """
+        join_code_cache.clear()
+        db = FakeFirestore()
+        db.collection('houses').document('house123').set({'id': 'house123', 'joinCode': 'OLDCODE'})
+
+        self.assertEqual(get_house_by_join_code(db, 'OLDCODE'), {'id': 'house123', 'joinCode': 'OLDCODE'})
+        self.assertEqual(db.collection('joinCodes').document('OLDCODE').get().to_dict(),
+                         {'code': 'OLDCODE', 'houseID': 'house123'})
+
+        # another house claimed the code (and changed it) before the backfill
+        db.collection('houses').document('house456').set({'id': 'house456', 'joinCode': 'CODE2'})
+        db.collection('joinCodes').document('CODE2').set({'code': 'CODE2', 'houseID': 'house789'})
+        join_code_cache.clear()
+        self.assertEqual(get_house_by_join_code(db, 'CODE2'), {'id': 'house456', 'joinCode': 'CODE2'})
+        self.assertEqual(db.collection('joinCodes').document('CODE2').get().to_dict()['houseID'], 'house789')
+        self.assertIsNone(join_code_cache.get('CODE2'))
+
+    def test_get_house_by_join_code_not_found(self):
+        """
+        Test that an unknown join code is reported.
+        """
+        join_code_cache.clear()
+        self._documents_by_id({})
+        self.mock_collection.where.return_value.limit.return_value.get.return_value = []
+        result = get_house_by_join_code(self.mock_db, 'NOPE')
+        self.assertDictEqual(result[0].get_json(), {'error': 'House with code NOPE not found'})
+        self.assertEqual(result[1], 400)
+
+    def test_async_get_house_snapshot(self):
+        db = FakeFirestore()
+        house_ref = db.collection('houses').document('h1')
+        house_ref.set({'id': 'h1'})
+        house_ref.collection('chores').document('c1').set({'id': 'c1'})
+
+        snapshot = asyncio.run(house_async_utils.get_house_snapshot(db.async_client(), 'h1'))
+        self.assertEqual(snapshot['house'], {'id': 'h1'})
+        self.assertEqual(snapshot['chores'], {'c1': {'id': 'c1'}})
+        self.assertEqual(snapshot['swaps'], {})
+
+    def test_async_get_house_by_join_code(self):
+        join_code_cache.clear()
+        db = FakeFirestore()
+        db.collection('houses').document('h1').set({'id': 'h1', 'joinCode': 'ABC'})
+        db.collection('joinCodes').document('ABC').set({'code': 'ABC', 'houseID': 'h1'})
+
+        house = asyncio.run(house_async_utils.get_house_by_join_code(db.async_client(), 'ABC'))
+        self.assertEqual(house, {'id': 'h1', 'joinCode': 'ABC'})
+        self.assertEqual(join_code_cache.get('ABC'), 'h1')
+
+    def _sync(self, db, cursor=None):
+        return get_house_changes(db, 'h1', parse_date(cursor) if cursor else None)
+
+    def test_sync_returns_changes_since_cursor(self):
+        db = FakeFirestore()
+        house_ref = db.collection('houses').document('h1')
+        house_ref.set({'id': 'h1'})
+        house_ref.collection('chores').document('legacy').set({'id': 'legacy'})
+        bulk_upsert(db, 'h1', 'swaps', [{'id': 's1'}, {'id': 's2'}])
+        bulk_upsert(db, 'h1', 'choreInstances', [{'id': 'i1'}])
+
+        full = self._sync(db)
+        self.assertTrue(full['full'])
+        self.assertEqual(set(full['changes']['swaps']), {'s1', 's2'})
+        # documents written before updatedAt existed are only in full syncs
+        self.assertEqual(set(full['changes']['chores']), {'legacy'})
+
+        upsert_chore(db, {'id': 'c1', 'name': 'Clean'}, 'h1')
+        delete_house_document(db, 'h1', 'swaps', 's1')
+        delete_chore_instance(db, {'id': 'i1'}, 'h1')
+        db.reset_stats()
+        delta = self._sync(db, full['cursor'])
+
+        self.assertFalse(delta['full'])
+        self.assertEqual({name: list(docs) for name, docs in delta['changes'].items() if docs}, {'chores': ['c1']})
+        self.assertEqual({name: ids for name, ids in delta['deleted'].items() if ids},
+                         {'swaps': ['s1'], 'choreInstances': ['i1']})
+        # one read for the house, one per query that matched nothing, one per document
+        self.assertEqual(db.stats['reads'], 1 + 4 + 1 + 2)
+
+        unchanged = self._sync(db, delta['cursor'])
+        self.assertEqual(unchanged['cursor'], delta['cursor'])
+        self.assertFalse(any(unchanged['changes'].values()) or any(unchanged['deleted'].values()))
+
+    def test_sync_recreated_document_is_not_deleted(self):
+        db = FakeFirestore()
+        db.collection('houses').document('h1').set({'id': 'h1'})
+        cursor = self._sync(db)['cursor']
+        bulk_upsert(db, 'h1', 'swaps', [{'id': 's1'}])
+        delete_house_document(db, 'h1', 'swaps', 's1')
+        bulk_upsert(db, 'h1', 'swaps', [{'id': 's1', 'status': 'again'}])
+
+        delta = self._sync(db, cursor)
+
+        self.assertEqual(delta['changes']['swaps']['s1']['status'], 'again')
+        self.assertEqual(delta['deleted']['swaps'], [])
+
+    def test_sync_stale_cursor_or_missing_house(self):
+        db = FakeFirestore()
+        db.collection('houses').document('h1').set({'id': 'h1'})
+        self.assertTrue(self._sync(db, '2000-01-01T00:00:00.000000Z')['full'])
+
+        result = get_house_changes(db, 'nope')
+        self.assertEqual(result[1], 400)
+
+    def test_patch_house_document(self):
+        """
+        Test that a partial update only changes the given fields, and that a
+        chore instance's agenda follows it.
+        """
+        db = FakeFirestore()
+        house_ref = db.collection('houses').document('h1')
+        house_ref.collection('members').document('m1').set({'id': 'm1', 'name': 'Ann', 'email': 'ann@divvy.com'})
+        result = patch_house_document(db, 'h1', 'members', {'id': 'm1', 'name': 'Anna'})
+        self.assertEqual(result.get_json(), {'id': 'm1', 'updated': ['name']})
+        member = house_ref.collection('members').document('m1').get().to_dict()
+        self.assertEqual((member['name'], member['email']), ('Anna', 'ann@divvy.com'))
+        self.assertIn('updatedAt', member)
+
+        due = parse_date('2024-01-01T09:00:00Z')
+        house_ref.collection('choreInstances').document('i1').set(
+            {'id': 'i1', 'choreID': 'c1', 'assignee': 'm1', 'dueDate': due, 'isDone': False})
+        house_ref.collection('agendas').document('m1_2024-01-01').set(
+            {'instances': {'i1': {'id': 'i1', 'assignee': 'm1', 'dueDate': due, 'isDone': False}}})
+        result = patch_house_document(db, 'h1', 'choreInstances', {'id': 'i1', 'isDone': True})
+        self.assertEqual(result.get_json(), {'id': 'i1', 'updated': ['isDone']})
+        instance = house_ref.collection('choreInstances').document('i1').get().to_dict()
+        self.assertEqual((instance['isDone'], instance['choreID']), (True, 'c1'))
+        agenda = house_ref.collection('agendas').document('m1_2024-01-01').get().to_dict()
+        self.assertTrue(agenda['instances']['i1']['isDone'])
+
+    def test_patch_house_document_errors(self):
+        """
+        Test that missing documents return 404 and invalid fields 400, without creating them.
+        """
+        db = FakeFirestore()
+        self.assertEqual(patch_house_document(db, 'h1', 'chores', {'id': 'ch1', 'name': 'Dishes'})[1], 404)
+        self.assertEqual(patch_house_document(db, 'h1', 'choreInstances', {'id': 'i1', 'isDone': True})[1], 404)
+        result = patch_house_document(db, 'h1', 'choreInstances', {'id': 'i1', 'isDone': 'yes', 'dueDate': 'soon'})
+        self.assertEqual(result[1], 400)
+        self.assertEqual(result[0].get_json(), {'error': 'isDone must be bool; dueDate must be a date'})
+        self.assertEqual(patch_house_document(db, 'h1', 'chores', {'name': 'Dishes'})[1], 400)
+        self.assertFalse(db.collection('houses').document('h1').collection('chores').document('ch1').get().exists)
+
+    def test_patch_house(self):
+        """
+        Test that a house's fields are updated in place and a new join code is checked and indexed.
+        """
+        db = FakeFirestore()
+        save_house(db, {'id': 'h1', 'name': 'Home', 'joinCode': 'ABC'})
+        save_house(db, {'id': 'h2', 'name': 'Other', 'joinCode': 'XYZ'})
+        self.assertEqual(patch_house(db, 'h1', {'name': 'The Burrow'}).get_json(), {'id': 'h1', 'updated': ['name']})
+        self.assertEqual(patch_house(db, 'h1', {'joinCode': 'XYZ'})[1], 409)
+        patch_house(db, 'h1', {'joinCode': 'NEW'})
+        house = db.collection('houses').document('h1').get().to_dict()
+        self.assertEqual((house['name'], house['joinCode']), ('The Burrow', 'NEW'))
+        self.assertFalse(db.collection('joinCodes').document('ABC').get().exists)
+        self.assertEqual(db.collection('joinCodes').document('NEW').get().to_dict()['houseID'], 'h1')
+        self.assertEqual(patch_house(db, 'h3', {'name': 'Missing'})[1], 404)
+        self.assertEqual(patch_house(db, 'h3', {'joinCode': 'QRS'})[1], 404)
+
+    def _houses_db(self):
+        db = FakeFirestore()
+        start_of_day, _ = current_day_range()
+        for house_id in ['h1', 'h2', 'h3']:
+            house_ref = db.collection('houses').document(house_id)
+            house_ref.set({'id': house_id, 'members': ['u1'] if house_id != 'h3' else ['u2']})
+            house_ref.collection('choreInstances').document(f'{house_id}-i1').set(
+                {'id': f'{house_id}-i1', 'assignee': 'u1', 'dueDate': start_of_day, 'isDone': False})
+        # h1's agenda was already built today, h2's wasn't
+        db.collection('houses').document('h1').collection('agendas').document(
+            f"u1_{start_of_day.strftime('%Y-%m-%d')}").set({'instances': {'h1-i1': {'id': 'h1-i1'}}})
+        return db
+
+    def test_get_houses(self):
+        """
+        Test that houses are read in one batched read, in request order.
+        """
+        db = self._houses_db()
+        db.reset_stats()
+        result = get_houses(db, ['h2', 'missing', 'h1', 'h2'])
+        self.assertEqual(list(result['houses']), ['h2', 'h1'])
+        self.assertEqual(result['notFound'], ['missing'])
+        self.assertNotIn('agendas', result)
+        self.assertEqual(db.stats['rpcs'], 1)
+
+        # from the user's membership, with today's agendas
+        result = get_houses(db, user_id='u1', include_agenda=True)
+        self.assertEqual(set(result['houses']), {'h1', 'h2'})
+        self.assertEqual(result['agendas']['h1'], [{'id': 'h1-i1'}])
+        self.assertEqual([instance['id'] for instance in result['agendas']['h2']], ['h2-i1'])
+
+        # the async version leaves unbuilt agendas to the caller
+        result = asyncio.run(house_async_utils.get_houses(db.async_client(), ['h1', 'h3'], 'u1', True))
+        self.assertEqual(list(result['houses']), ['h1', 'h3'])
+        self.assertEqual(result['agendas'], {'h1': [{'id': 'h1-i1'}], 'h3': None})
+
+    def test_get_houses_of_user(self):
+        """
+        Test that a user's houses are keyed by document ID and that a failed
+        query is an error rather than no houses.
+        """
+        db = self._houses_db()
+        db.collection('houses').document('h4').set({'members': ['u1']})
+        self.assertEqual(set(get_houses(db, user_id='u1')['houses']), {'h1', 'h2', 'h4'})
+
+        with patch('utils.fake_firestore.FakeQuery.stream', side_effect=Exception('unavailable')):
+            self.assertEqual(get_houses(db, user_id='u1')[1], 500)
+
+    def test_get_houses_invalid(self):
+        """
+        Test that invalid requests are rejected.
+        """
+        db = FakeFirestore()
+        self.assertEqual(get_houses(db)[1], 400)
+        self.assertEqual(get_houses(db, 'h1')[1], 400)
+        self.assertEqual(get_houses(db, [f'h{i}' for i in range(101)])[1], 400)
+        self.assertEqual(get_houses(db, ['h1'], include_agenda=True)[1], 400)
+
+class TestConditionalReads(unittest.TestCase):
+    """
+    Unit tests for the ETags and 304 responses of the house read routes.
+    """
+
+    def setUp(self):
+        import app
+        self.app_module = app
+        app.cache.clear()
+        self.db = FakeFirestore()
+        house_ref = self.db.collection('houses').document('h1')
+        house_ref.set({'id': 'h1'})
+        house_ref.collection('chores').document('c1').set({'id': 'c1'})
+        # as counted by /add-house
+        bump_house_versions(self.db, 'h1', ['house'])
+        self.client = app.create_app({'FIRESTORE_DB': self.db}).test_client()
+
+    def test_not_modified_until_written(self):
+        response = self.client.get('/get-house-h1-chores')
+        etag = response.headers['ETag']
+        self.assertEqual(response.get_json(), {'c1': {'id': 'c1'}})
+
+        # an unchanged poll reads only the house's write counters
+        self.app_module.cache.clear()
+        self.db.reset_stats()
+        response = self.client.get('/get-house-h1-chores', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.db.stats['reads'], 1)
+
+        members_etag = self.client.get('/get-house-h1-members').headers['ETag']
+        self.client.post('/upsert-chore-h1', json={'id': 'c2'})
+
+        response = self.client.get('/get-house-h1-chores', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(set(response.get_json()), {'c1', 'c2'})
+        # other collections keep their ETags
+        self.assertEqual(self.client.get('/get-house-h1-members', headers={'If-None-Match': members_etag}).status_code, 304)
+        snapshot = self.client.get('/get-house-h1-snapshot')
+        self.assertEqual(self.client.get('/get-house-h1-snapshot', headers={
+            'If-None-Match': snapshot.headers['ETag']}).status_code, 304)
+
+    def test_mirrored_reads_are_tagged(self):
+        mirror = MagicMock()
+        mirror.get_house.return_value = {'id': 'h1'}
+        mirror.get_collection.return_value = {'c1': {'id': 'c1'}}
+        with patch.object(self.app_module, 'mirror', mirror):
+            for path in ['/get-house-h1', '/get-house-h1-chores', '/get-house-h1-snapshot']:
+                response = self.client.get(path)
+                self.assertEqual(response.headers['ETag'], self.client.get(path).headers['ETag'])
+                mirror.reset_mock()
+                response = self.client.get(path, headers={'If-None-Match': response.headers['ETag']})
+                self.assertEqual(response.status_code, 304, path)
+                # answered without reading the mirror
+                mirror.get_house.assert_not_called()
+                mirror.get_collection.assert_not_called()
+
+    def test_errors_are_not_tagged(self):
+        response = self.client.get('/get-house-nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('ETag', response.headers)
+
+    def test_async_not_modified(self):
+        import asgi
+        asgi.async_app.config['FIRESTORE_DB'] = self.db.async_client()
+        self.addCleanup(asgi.async_app.config.pop, 'FIRESTORE_DB')
+        client = asgi.async_app.test_client()
+
+        async def poll():
+            response = await client.get('/get-house-h1')
+            etag = response.headers['ETag']
+            return etag, (await client.get('/get-house-h1', headers={'If-None-Match': etag})).status_code
+
+        etag, status = asyncio.run(poll())
+        self.assertEqual(status, 304)
+        self.assertEqual(etag, self.client.get('/get-house-h1').headers['ETag'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,215 @@
+from quart import jsonify
+import asyncio
+
+from houseService.house_utils import HOUSE_SUBCOLLECTIONS, HOUSE_VERSIONS, STATS, join_code_cache, houses_request_error, firestore
+from choreService.chore_utils import AGENDAS, agenda_id, agenda_instances, current_day_range
+
+
+# /// Async House Utility Functions /// #
+    # firestore.AsyncClient counterparts of the house_utils read functions,
+    # called by the async serving mode's routes in asgi.py. Writes are
+    # still served by app.py, so they only exist in house_utils.
+
+async def get_house(db, house_id):
+    """
+    Retrieves a house document from Firestore.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        house_id (str): The ID of the house to retrieve.
+
+    Returns:
+        dict: The house data, or an error if the house doesn't exist.
+    """
+    try:
+        house = await db.collection('houses').document(house_id).get()
+        if house.exists:
+            return house.to_dict()
+        return jsonify({'error': f'House with id {house_id} not found'}), 400
+    except Exception as e:
+        print(f"Error getting house {house_id}: {e}")
+        return jsonify({'error': 'Could not get house'}), 500
+
+
+async def get_house_versions(db, house_id):
+    """
+    Retrieves a house's write counters, see house_utils.get_house_versions.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        house_id (str): The ID of the house.
+
+    Returns:
+        dict: {'generation': int, 'writes': {<name>: int}}
+    """
+    versions = await db.collection('houses').document(house_id).collection(STATS).document(HOUSE_VERSIONS).get()
+    if not versions.exists:
+        return {'generation': 0, 'writes': {}}
+    return {'generation': round(versions.create_time.timestamp() * 1000000), 'writes': versions.to_dict()}
+
+
+async def get_houses(db, house_ids=None, user_id=None, include_agenda=False):
+    """
+    Reads several houses (and optionally user_id's agendas for today) in
+    batched reads, see house_utils.get_houses. Agendas that haven't been
+    built yet today are None, for the caller to build with the sync
+    chore_utils.build_agenda.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        house_ids (list(str)): The IDs of the houses.
+        user_id (str): The member whose houses and/or agendas to read.
+        include_agenda (bool): Also read user_id's chore instances due today.
+
+    Returns:
+        dict: See house_utils.get_houses, or an error.
+    """
+    error = houses_request_error(house_ids, user_id, include_agenda)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        HOUSES = db.collection('houses')
+        if house_ids is None:
+            query = HOUSES.where(filter=firestore.FieldFilter('members', 'array_contains', user_id))
+            houses = {house.id: house.to_dict() for house in await query.get()}
+            not_found = []
+        else:
+            house_ids = list(dict.fromkeys(house_ids))
+            found = {house.id: house.to_dict()
+                     async for house in db.get_all([HOUSES.document(house_id) for house_id in house_ids])
+                     if house.exists}
+            houses = {house_id: found[house_id] for house_id in house_ids if house_id in found}
+            not_found = [house_id for house_id in house_ids if house_id not in found]
+        result = {'houses': houses, 'notFound': not_found}
+
+        if include_agenda:
+            start_of_day_utc, _ = current_day_range()
+            refs = [HOUSES.document(house_id).collection(AGENDAS).document(agenda_id(user_id, start_of_day_utc))
+                    for house_id in houses]
+            house_of = {ref.path: house_id for ref, house_id in zip(refs, houses)}
+            agendas = {}
+            if refs:
+                async for agenda in db.get_all(refs):
+                    if agenda.exists:
+                        agendas[house_of[agenda.reference.path]] = agenda_instances(agenda.to_dict())
+            result['agendas'] = {house_id: agendas.get(house_id) for house_id in houses}
+        return result
+    except Exception as e:
+        print(f"Error getting houses {house_ids or f'of user {user_id}'}: {e}")
+        return jsonify({'error': 'Could not get houses'}), 500
+
+
+async def get_house_by_join_code(db, join_code, backfill=None):
+    """
+    Retrieves the house with the given join code, see
+    house_utils.get_house_by_join_code. Shares its cache of recent lookups.
+    Houses saved before the joinCodes index existed are added to it by
+    backfill, which needs a transaction (which the async routes don't use).
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        join_code (str): The house's join code.
+        backfill (callable): Awaitable house_utils.backfill_join_code(house_id, join_code).
+            Without it, such houses aren't added to the index.
+
+    Returns:
+        dict: The house data, or an error if no house has that code.
+    """
+    try:
+        HOUSES = db.collection('houses')
+        house_id = join_code_cache.get(join_code)
+        if house_id is None:
+            code = await db.collection('joinCodes').document(join_code).get()
+            if code.exists:
+                house_id = code.to_dict().get('houseID')
+        if house_id is not None:
+            house = await HOUSES.document(house_id).get()
+            if house.exists and house.to_dict().get('joinCode') == join_code:
+                join_code_cache.set(join_code, house_id)
+                return house.to_dict()
+            join_code_cache.delete(join_code)
+
+        legacy = await HOUSES.where(filter=firestore.FieldFilter('joinCode', '==', join_code)).limit(1).get()
+        if legacy:
+            house = legacy[0]
+            if backfill is not None and await backfill(house.id, join_code):
+                join_code_cache.set(join_code, house.id)
+            return house.to_dict()
+        return jsonify({'error': f'House with code {join_code} not found'}), 400
+    except Exception as e:
+        print(f"Error getting house with join code {join_code}: {e}")
+        return jsonify({'error': 'Could not get house'}), 500
+
+
+async def stream_house_collection(db, house_id, name):
+    """
+    Streams the documents in one of a house's subcollections, after
+    checking that the house exists.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        house_id (str): The ID of the house.
+        name (str): The subcollection to read, e.g. 'chores'.
+
+    Returns:
+        An async iterator of document snapshots, or an error if the house doesn't exist.
+    """
+    house_ref = db.collection('houses').document(house_id)
+    house = await house_ref.get()
+    if not house.exists:
+        return jsonify({'error': 'House does not exist'}), 400
+    return house_ref.collection(name).stream()
+
+
+async def get_house_snapshot(db, house_id):
+    """
+    Retrieves a house document and all of its subcollections, reading the
+    subcollections concurrently on the event loop.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        house_id (str): The ID of the house to retrieve.
+
+    Returns:
+        dict: {'house': <house data>, <subcollection>: {<id>: <data>, ...}, ...}
+    """
+    try:
+        house_ref = db.collection('houses').document(house_id)
+        house = await house_ref.get()
+        if not house.exists:
+            return jsonify({'error': f'House with id {house_id} not found'}), 400
+
+        async def read_collection(name):
+            return {doc.id: doc.to_dict() async for doc in house_ref.collection(name).stream()}
+
+        collections = await asyncio.gather(*(read_collection(name) for name in HOUSE_SUBCOLLECTIONS))
+        return dict(zip(HOUSE_SUBCOLLECTIONS, collections), house=house.to_dict())
+    except Exception as e:
+        print(f"Error getting snapshot for house {house_id}: {e}")
+        return jsonify({'error': 'Could not get house snapshot'}), 500
+
+
+async def get_subgroup(db, house_id, subgroup_id):
+    """
+    Retrieves a subgroup from a house.
+
+    Args:
+        db (firestore.AsyncClient): The async Firestore client.
+        house_id (str): The ID of the house.
+        subgroup_id (str): The ID of the subgroup.
+
+    Returns:
+        dict: The subgroup data, or an error if the house or subgroup doesn't exist.
+    """
+    try:
+        house_ref = db.collection('houses').document(house_id)
+        house, subgroup = await asyncio.gather(house_ref.get(),
+                                               house_ref.collection('subgroups').document(subgroup_id).get())
+        if not house.exists:
+            return jsonify({'error': 'House does not exist'}), 400
+        if subgroup.exists:
+            return subgroup.to_dict()
+        return jsonify({'error': 'Subgroup not found'}), 400
+    except Exception as e:
+        print(f"Error getting subgroup {subgroup_id} of house {house_id}: {e}")
+        return jsonify({'error': 'Subgroup not found'}), 400
@@ -1,5 +1,53 @@
 from flask import jsonify
-from firebase_admin import firestore
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import secrets
+import string
+import time
+
+from utils.utils import (MAX_BATCH_WRITES, UPDATED_AT, TOMBSTONES, TOMBSTONE_TTL_DAYS, normalize_dates,
+                         stamp_updated, tombstone, validate_fields, lazy_import)
+from utils.cache import TTLCache
+from choreService.chore_utils import (AGENDAS, AGENDA_CHUNK_SIZE, STATS, agenda_id, agenda_instances, build_agenda,
+                                      current_day_range, write_chore_instances, patch_chore_instance)
+
+firestore = lazy_import('firebase_admin.firestore')
+exceptions = lazy_import('google.api_core.exceptions')
+
+
+# Subcollections stored under every house document
+HOUSE_SUBCOLLECTIONS = ['members', 'choreInstances', 'subgroups', 'chores', 'swaps']
+
+# Everything under a house document, including data derived from the
+# subcollections above (see chore_utils.AGENDAS, chore_utils.STATS and utils.TOMBSTONES)
+HOUSE_DOCUMENT_COLLECTIONS = HOUSE_SUBCOLLECTIONS + [AGENDAS, STATS, TOMBSTONES]
+
+# houses/{house_id}/stats/versions counts the writes to each part of a
+# house, {'house': n, 'chores': n, 'choreInstances': n, ...}, so read routes
+# can tag responses with an ETag and answer If-None-Match with 304 Not
+# Modified after a single document read (see house_etag)
+HOUSE_VERSIONS = 'versions'
+
+# Sync cursors are ISO-8601 UTC times with microseconds, written with a Z
+# so they don't need escaping in a query string
+SYNC_CURSOR_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+# Join codes look like 'ZsmLvSVz53'. joinCodes/{code} documents map each
+# code to its house so codes stay unique and joins are a document get.
+JOIN_CODE_ALPHABET = string.ascii_letters + string.digits
+JOIN_CODE_LENGTH = 10
+
+# Most houses /get-houses reads in one request
+MAX_HOUSES_PER_READ = 100
+
+# Recent join code -> house ID lookups
+join_code_cache = TTLCache(max_entries=4096, ttl=600)
+
+
+class JoinCodeTaken(Exception):
+    """
+    Raised when a house is saved with a join code that belongs to another house.
+    """
 
 
 # /// User Utility Functions /// #
@@ -7,7 +55,6 @@ from firebase_admin import firestore
 
 def create_house(db, data):
     try:
-        HOUSES = db.collection('houses')
         house_id = data.get('id')
         house_name = data.get('name')
         members = data.get('members')
@@ -27,13 +74,218 @@ def create_house(db, data):
         # if not house_id or not house_name or not creator_user_id:
         #     return jsonify({'error': 'House ID and name, and creator user ID are required'}), 400
 
-        HOUSES.document(house_id).set(data)
-        return jsonify({"id": str(house_id)}) 
+        saved = save_house(db, data)
+        return jsonify({"id": str(house_id), "joinCode": saved.get('joinCode')})
+    except JoinCodeTaken as e:
+        return jsonify({'error': f'Join code {e} is already in use'}), 409
     except Exception as e:
         print(f"Error creating house: {e}")
         return jsonify({'error': 'Error creating house'}), 500
 
 
+def upsert_house(db, data):
+    """
+    Creates or overwrites a house document, keeping its join code indexed.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        data (dict): The house document. The id field must be non-empty.
+
+    Returns:
+        {'id': <house_id>, 'joinCode': <join_code>}
+    """
+    try:
+        house_data = save_house(db, data)
+        return jsonify({'id': data.get('id'), 'joinCode': house_data.get('joinCode')})
+    except JoinCodeTaken as e:
+        return jsonify({'error': f'Join code {e} is already in use'}), 409
+    except Exception as e:
+        print(f"Error updating house: {e}")
+        return jsonify({'error': 'House could not be updated'}), 400
+
+
+def save_house(db, data, merge=False):
+    """
+    Writes a house document and its joinCodes/{code} index entry in one
+    transaction. If the house has no joinCode, its existing code is kept,
+    or a new unused one is allocated. If the code changed, the old index
+    entry is removed.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        data (dict): The house document. The id field must be non-empty.
+        merge (bool): Merge data's fields into the existing house document
+            instead of overwriting it.
+
+    Returns:
+        dict: The house data that was written, or None if merge is set and
+            the house doesn't exist.
+
+    Raises:
+        JoinCodeTaken: If the joinCode belongs to another house.
+    """
+    house_ref = db.collection('houses').document(data.get('id'))
+    CODES = db.collection('joinCodes')
+
+    @firestore.transactional
+    def write(transaction):
+        house = house_ref.get(transaction=transaction)
+        if merge and not house.exists:
+            return None, None
+        fields = dict(house.to_dict() or {}, **data) if merge else data
+        old_code = (house.to_dict() or {}).get('joinCode') if house.exists else None
+        code = _claim_join_code(transaction, CODES, fields.get('joinCode') or old_code, house_ref.id)
+
+        house_data = normalize_dates(dict(fields, joinCode=code))
+        if old_code and old_code != code:
+            transaction.delete(CODES.document(old_code))
+        transaction.set(house_ref, house_data)
+        return house_data, old_code
+
+    house_data, old_code = write(db.transaction())
+    if house_data is None:
+        return None
+    if old_code and old_code != house_data['joinCode']:
+        join_code_cache.delete(old_code)
+    return house_data
+
+
+def _claim_join_code(transaction, CODES, code, house_id):
+    """
+    Points joinCodes/{code} at a house in a transaction, allocating an
+    unused code if code is empty. Reads before it writes, so call it before
+    the transaction's other writes.
+
+    Returns:
+        str: The code.
+
+    Raises:
+        JoinCodeTaken: If the code belongs to another house.
+    """
+    if code:
+        owner = CODES.document(code).get(transaction=transaction)
+        if owner.exists and owner.to_dict().get('houseID') != house_id:
+            raise JoinCodeTaken(code)
+    else:
+        code = _allocate_join_code(transaction, CODES)
+    transaction.set(CODES.document(code), {'code': code, 'houseID': house_id})
+    return code
+
+
+def backfill_join_code(db, house_id, join_code):
+    """
+    Adds a house saved before the joinCodes index existed to the index,
+    unless the house's code has changed or another house has claimed it
+    since.
+
+    Returns:
+        bool: Whether the code now points at the house.
+    """
+    house_ref = db.collection('houses').document(house_id)
+
+    @firestore.transactional
+    def backfill(transaction):
+        house = house_ref.get(transaction=transaction)
+        if not house.exists or house.to_dict().get('joinCode') != join_code:
+            return False
+        try:
+            _claim_join_code(transaction, db.collection('joinCodes'), join_code, house_id)
+        except JoinCodeTaken:
+            return False
+        return True
+    return backfill(db.transaction())
+
+
+def _allocate_join_code(transaction, CODES, attempts=10):
+    """
+    Picks a random join code that isn't in the joinCodes index.
+    """
+    for _ in range(attempts):
+        code = ''.join(secrets.choice(JOIN_CODE_ALPHABET) for _ in range(JOIN_CODE_LENGTH))
+        if not CODES.document(code).get(transaction=transaction).exists:
+            return code
+    raise RuntimeError('Could not allocate an unused join code')
+
+
+def patch_house(db, house_id, data):
+    """
+    Changes only the given fields of a house document. A changed joinCode
+    is checked and indexed as in save_house.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        data (dict): The fields to change.
+
+    Returns:
+        {'id': <house_id>, 'updated': [<field>, ...]}, or an error (400 if
+        a field is invalid, 404 if the house doesn't exist, 409 if the join
+        code belongs to another house).
+    """
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be an object of the fields to update'}), 400
+    fields = {field: value for field, value in data.items() if field != 'id'}
+    errors = validate_fields('house', fields) or ([] if fields else ['No fields to update'])
+    if errors:
+        return jsonify({'error': '; '.join(errors)}), 400
+    try:
+        if 'joinCode' in fields:
+            if save_house(db, dict(fields, id=house_id), merge=True) is None:
+                return jsonify({'error': f'House {house_id} not found'}), 404
+        else:
+            db.collection('houses').document(house_id).update(normalize_dates(fields))
+        return jsonify({'id': house_id, 'updated': sorted(fields)})
+    except exceptions.NotFound:
+        return jsonify({'error': f'House {house_id} not found'}), 404
+    except JoinCodeTaken as e:
+        return jsonify({'error': f'Join code {e} is already in use'}), 409
+    except Exception as e:
+        print(f"Error updating house {house_id}: {e}")
+        return jsonify({'error': 'House could not be updated'}), 500
+
+
+def get_house_by_join_code(db, join_code):
+    """
+    Retrieves the house with the given join code. The code is resolved
+    through the joinCodes index (and a local cache of recent lookups), so
+    this is a single document get in the common case. Houses saved before
+    the index existed are found with a query and added to the index, in a
+    transaction like save_house's.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        join_code (str): The house's join code.
+
+    Returns:
+        dict: The house data, or an error if no house has that code.
+    """
+    try:
+        HOUSES = db.collection('houses')
+        house_id = join_code_cache.get(join_code)
+        if house_id is None:
+            code = db.collection('joinCodes').document(join_code).get()
+            if code.exists:
+                house_id = code.to_dict().get('houseID')
+        if house_id is not None:
+            house = HOUSES.document(house_id).get()
+            # the cached or indexed house may have changed its code since
+            if house.exists and house.to_dict().get('joinCode') == join_code:
+                join_code_cache.set(join_code, house_id)
+                return house.to_dict()
+            join_code_cache.delete(join_code)
+
+        legacy = HOUSES.where(filter=firestore.FieldFilter('joinCode', '==', join_code)).limit(1).get()
+        if legacy:
+            house = legacy[0]
+            if backfill_join_code(db, house.id, join_code):
+                join_code_cache.set(join_code, house.id)
+            return house.to_dict()
+        return jsonify({'error': f'House with code {join_code} not found'}), 400
+    except Exception as e:
+        print(f"Error getting house with join code {join_code}: {e}")
+        return jsonify({'error': 'Could not get house'}), 500
+
+
 def get_house(db, house_id):
     """
     Retrieves a house document from Firestore.
@@ -57,18 +309,448 @@ def get_house(db, house_id):
         return jsonify({'error': 'e'}), 500
 
 
-# coll_ref is the collection reference to delete
-def delete_collection(coll_ref, batch_size=50):
-    docs = coll_ref.limit(batch_size).stream()
+def stream_house_collection(db, house_id, name):
+    """
+    Streams the documents in one of a house's subcollections. The house is
+    checked up front so a missing house can still be reported as an error,
+    then documents are yielded as Firestore returns them.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        name (str): The subcollection to read, e.g. 'chores'.
+
+    Returns:
+        An iterator of document snapshots, or an error if the house doesn't exist.
+    """
+    house_ref = db.collection('houses').document(house_id)
+    house = house_ref.get()
+    if not house.exists:
+        return jsonify({'error': 'House does not exist'}), 400
+    return house_ref.collection(name).stream()
+
+
+def get_house_snapshot(db, house_id):
+    """
+    Retrieves a house document and all of its subcollections in one call.
+    The house is checked once, then every subcollection is streamed
+    concurrently, so latency is that of the slowest single read rather
+    than the sum of all of them.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house to retrieve.
+
+    Returns:
+        dict: {'house': <house data>, 'chores': {...}, 'choreInstances': {...},
+               'members': {...}, 'subgroups': {...}, 'swaps': {...}}
+               where each subcollection maps document IDs to document data.
+    """
+    try:
+        house_ref = db.collection('houses').document(house_id)
+        house = house_ref.get()
+        if not house.exists:
+            return jsonify({'error': f'House with id {house_id} not found'}), 400
+
+        def read_collection(name):
+            return {doc.id: doc.to_dict() for doc in house_ref.collection(name).stream()}
+
+        with ThreadPoolExecutor(max_workers=len(HOUSE_SUBCOLLECTIONS)) as executor:
+            futures = {name: executor.submit(read_collection, name)
+                       for name in HOUSE_SUBCOLLECTIONS}
+            snapshot = {'house': house.to_dict()}
+            for name, future in futures.items():
+                snapshot[name] = future.result()
+        return snapshot
+    except Exception as e:
+        print(f"Error getting snapshot for house {house_id}: {e}")
+        return jsonify({'error': 'Could not get house snapshot'}), 500
+
+
+def get_house_changes(db, house_id, since=None):
+    """
+    Retrieves the documents of a house's subcollections written since a
+    sync cursor, and the IDs of those deleted since (from their
+    tombstones). Without a cursor, or with one older than the tombstones
+    are kept, every document is returned instead. Everything is read in one
+    read-only transaction, so the results are a consistent snapshot, with
+    the subcollections queried concurrently.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        since (datetime.datetime): The cursor returned by the previous sync.
+
+    Returns:
+        dict: {'house': <house data>, 'full': bool, 'cursor': <SYNC_CURSOR_FORMAT time>,
+               'changes': {<subcollection>: {<doc_id>: <doc data>}},
+               'deleted': {<subcollection>: [<doc_id>, ...]}}
+        Pass cursor as since to the next sync.
+    """
+    try:
+        house_ref = db.collection('houses').document(house_id)
+        oldest = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=TOMBSTONE_TTL_DAYS)
+        full = since is None or since < oldest
+
+        def changed(coll_ref):
+            # Transaction.get takes a Query or DocumentReference, not a CollectionReference
+            if full:
+                return coll_ref.order_by('__name__')
+            return coll_ref.where(filter=firestore.FieldFilter(UPDATED_AT, '>', since))
+
+        @firestore.transactional
+        def read(transaction):
+            house = house_ref.get(transaction=transaction)
+            if not house.exists:
+                return None
+
+            def read_collection(name):
+                return {doc.id: doc.to_dict() for doc in transaction.get(changed(house_ref.collection(name)))}
+
+            names = HOUSE_SUBCOLLECTIONS + ([] if full else [TOMBSTONES])
+            with ThreadPoolExecutor(max_workers=len(names)) as executor:
+                futures = {name: executor.submit(read_collection, name) for name in names}
+                changes = {name: future.result() for name, future in futures.items()}
+            tombstones = list(changes.pop(TOMBSTONES, {}).values())
+            return house.to_dict(), changes, tombstones
+
+        result = read(db.transaction(read_only=True))
+        if result is None:
+            return jsonify({'error': f'House with id {house_id} not found'}), 400
+        house, changes, tombstones = result
+
+        # The newest write returned: every write committed before it was
+        # visible to the transaction, so the next sync starts from there
+        cursor = since if not full else datetime.datetime.fromtimestamp(0, datetime.timezone.utc)
+        for doc in [doc for docs in changes.values() for doc in docs.values()] + tombstones:
+            updated_at = doc.get(UPDATED_AT)
+            if isinstance(updated_at, datetime.datetime) and updated_at > cursor:
+                cursor = updated_at
+
+        deleted = {name: [] for name in HOUSE_SUBCOLLECTIONS}
+        for doc in tombstones:
+            if doc.get('id') not in changes.get(doc.get('collection'), {}):
+                deleted.setdefault(doc.get('collection'), []).append(doc.get('id'))
+        return {'house': house, 'full': full, 'cursor': cursor.strftime(SYNC_CURSOR_FORMAT),
+                'changes': changes, 'deleted': deleted}
+    except Exception as e:
+        print(f"Error syncing house {house_id}: {e}")
+        return jsonify({'error': 'Could not sync house'}), 500
+
+
+def get_house_versions(db, house_id):
+    """
+    Retrieves a house's write counters (see HOUSE_VERSIONS).
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+
+    Returns:
+        dict: {'generation': int, 'writes': {<name>: int}}, where generation
+        is the counters' creation time in microseconds (0 if nothing has
+        been written yet), so a deleted and recreated house gets new ETags.
+    """
+    versions = db.collection('houses').document(house_id).collection(STATS).document(HOUSE_VERSIONS).get()
+    if not versions.exists:
+        return {'generation': 0, 'writes': {}}
+    return {'generation': round(versions.create_time.timestamp() * 1000000), 'writes': versions.to_dict()}
+
+
+def bump_house_versions(db, house_id, names):
+    """
+    Counts a write to each of the given parts of a house.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        names (list(str)): 'house' and/or subcollection names.
+    """
+    versions_ref = db.collection('houses').document(house_id).collection(STATS).document(HOUSE_VERSIONS)
+    versions_ref.set({name: firestore.Increment(1) for name in names}, merge=True)
+
+
+def house_etag(versions, names):
+    """
+    Returns the ETag of a response made of the given parts of a house.
+
+    Args:
+        versions (dict): The house's get_house_versions.
+        names (list(str)): 'house' and/or subcollection names.
+
+    Returns:
+        str: e.g. '1751655599123456-4-17'
+    """
+    return '-'.join([str(versions['generation'])] + [str(versions['writes'].get(name, 0)) for name in names])
+
+
+def delete_house_document(db, house_id, name, doc_id):
+    """
+    Deletes a document from one of a house's subcollections, leaving a
+    tombstone for /sync-<house_id> in the same batch.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        name (str): The subcollection, e.g. 'swaps'.
+        doc_id (str): The ID of the document to delete.
+    """
+    house_ref = db.collection('houses').document(house_id)
+    batch = db.batch()
+    batch.delete(house_ref.collection(name).document(doc_id))
+    batch.set(*tombstone(house_ref, name, doc_id))
+    batch.commit()
+
+
+def delete_collection(db, coll_ref, batch_size=MAX_BATCH_WRITES, dry_run=False):
+    """
+    Deletes every document in a collection, committing up to batch_size
+    deletes per write batch. Pages are re-queried from the start of the
+    collection each time, so an interrupted delete can simply be run again
+    to pick up whatever is left.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        coll_ref (firestore.CollectionReference): The collection to delete.
+        batch_size (int): Documents deleted per commit (Firestore allows at most 500).
+        dry_run (bool): If True, only count the documents that would be deleted.
+
+    Returns:
+        int: The number of documents deleted (or that would be deleted).
+    """
+    if dry_run:
+        return coll_ref.count().get()[0][0].value
+
     deleted = 0
+    while True:
+        # only document references are needed, so skip transferring field data
+        docs = list(coll_ref.select([]).limit(batch_size).stream())
+        if not docs:
+            return deleted
+        batch = db.batch()
+        for doc in docs:
+            batch.delete(doc.reference)
+        batch.commit()
+        deleted += len(docs)
+        if len(docs) < batch_size:
+            return deleted
 
-    for doc in docs:
-        print(f'Deleting doc {doc.id}')
-        doc.reference.delete()
-        deleted += 1
 
-    if deleted >= batch_size:
-        return delete_collection(coll_ref, batch_size)
+def delete_house(db, house_id, dry_run=False):
+    """
+    Deletes a house and all of its subcollections. Subcollections are deleted
+    in parallel, and the house document itself is only removed once they are
+    all empty, so re-running an interrupted delete resumes it.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house to delete.
+        dry_run (bool): If True, report what would be deleted without deleting.
+
+    Returns:
+        dict: {'id': <house_id>, 'dryRun': bool, 'elapsed': <seconds>,
+               'collections': {<name>: {'deleted': int, 'elapsed': <seconds>}}}
+    """
+    try:
+        start = time.perf_counter()
+        house_ref = db.collection('houses').document(house_id)
+
+        def delete_subcollection(name):
+            coll_start = time.perf_counter()
+            deleted = delete_collection(db, house_ref.collection(name), dry_run=dry_run)
+            return {'deleted': deleted, 'elapsed': round(time.perf_counter() - coll_start, 3)}
+
+        with ThreadPoolExecutor(max_workers=len(HOUSE_DOCUMENT_COLLECTIONS)) as executor:
+            futures = {name: executor.submit(delete_subcollection, name)
+                       for name in HOUSE_DOCUMENT_COLLECTIONS}
+            collections = {name: future.result() for name, future in futures.items()}
+
+        # finally, delete house and free its join code
+        if not dry_run:
+            house = house_ref.get()
+            join_code = (house.to_dict() or {}).get('joinCode') if house.exists else None
+            if join_code:
+                db.collection('joinCodes').document(join_code).delete()
+                join_code_cache.delete(join_code)
+            house_ref.delete()
+        return jsonify({
+            'id': str(house_id),
+            'dryRun': dry_run,
+            'elapsed': round(time.perf_counter() - start, 3),
+            'collections': collections
+        })
+    except Exception as e:
+        print(f"Error deleting house {house_id}: {e}")
+        return jsonify({'error': 'Could not delete house'}), 500
+
+
+def bulk_upsert(db, house_id, name, items):
+    """
+    Creates or overwrites many documents in one of a house's subcollections,
+    committing them in atomic batches of up to MAX_BATCH_WRITES writes.
+    Chore instances are written in transactions of AGENDA_CHUNK_SIZE that
+    also keep the members' agendas up to date (see write_chore_instances).
+    Items without an id are rejected individually; if a batch fails to
+    commit, every item in that batch is reported as failed.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        name (str): The subcollection to write to, e.g. 'chores'.
+        items (list(dict)): The documents to write. Each must have an id.
+
+    Returns:
+        {'written': <count>, 'failed': <count>,
+         'results': [{'id': <id>, 'status': 'ok'} or
+                     {'id': <id>, 'status': 'error', 'error': <reason>}, ...]}
+        with one result per item, in request order.
+    """
+    if not isinstance(items, list):
+        return jsonify({'error': 'Request body must be a list of documents'}), 400
+    try:
+        coll_ref = db.collection('houses').document(house_id).collection(name)
+        results = []
+        valid = []
+        for item in items:
+            if not isinstance(item, dict) or not item.get('id'):
+                results.append({'id': item.get('id') if isinstance(item, dict) else None,
+                                'status': 'error', 'error': 'id is required'})
+            else:
+                results.append({'id': item['id'], 'status': 'ok'})
+                valid.append((results[-1], item))
+
+        chunk_size = AGENDA_CHUNK_SIZE if name == 'choreInstances' else MAX_BATCH_WRITES
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            try:
+                if name == 'choreInstances':
+                    write_chore_instances(db, house_id, [item for _, item in chunk])
+                else:
+                    batch = db.batch()
+                    for _, item in chunk:
+                        batch.set(coll_ref.document(item['id']), stamp_updated(normalize_dates(item)))
+                    batch.commit()
+            except Exception as e:
+                print(f"Error committing bulk upsert to {name} in house {house_id}: {e}")
+                for result, _ in chunk:
+                    result.update({'status': 'error', 'error': 'Could not be written'})
+
+        failed = sum(1 for result in results if result['status'] == 'error')
+        return jsonify({'written': len(results) - failed, 'failed': failed, 'results': results})
+    except Exception as e:
+        print(f"Error bulk upserting {name} in house {house_id}: {e}")
+        return jsonify({'error': f'Could not upsert {name}'}), 500
+
+
+def patch_house_document(db, house_id, name, data):
+    """
+    Changes only the given fields of a document in one of a house's
+    subcollections, stamping its updatedAt. Chore instances are changed in
+    a transaction that also updates their agendas and completion counters
+    (see chore_utils.patch_chore_instance).
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house.
+        name (str): The subcollection, e.g. 'choreInstances'.
+        data (dict): {'id': <document ID>, <field>: <new value>, ...}
+
+    Returns:
+        {'id': <id>, 'updated': [<field>, ...]}, or an error (400 if a
+        field is invalid, 404 if the document doesn't exist).
+    """
+    if not isinstance(data, dict) or not data.get('id'):
+        return jsonify({'error': 'id is required'}), 400
+    doc_id = data['id']
+    fields = {field: value for field, value in data.items() if field != 'id'}
+    errors = validate_fields(name, fields) or ([] if fields else ['No fields to update'])
+    if errors:
+        return jsonify({'error': '; '.join(errors)}), 400
+    try:
+        if name == 'choreInstances':
+            if not patch_chore_instance(db, house_id, doc_id, fields):
+                raise exceptions.NotFound(doc_id)
+        else:
+            db.collection('houses').document(house_id).collection(name).document(doc_id).update(
+                stamp_updated(normalize_dates(fields)))
+        return jsonify({'id': doc_id, 'updated': sorted(fields)})
+    except exceptions.NotFound:
+        return jsonify({'error': f'{doc_id} not found in {name}'}), 404
+    except Exception as e:
+        print(f"Error updating {doc_id} in {name} of house {house_id}: {e}")
+        return jsonify({'error': f'Could not update {name}'}), 500
+
+
+def houses_request_error(house_ids, user_id, include_agenda):
+    """
+    Returns what is wrong with a /get-houses request (see get_houses), or
+    None if nothing is.
+    """
+    if house_ids is None and not user_id:
+        return 'house_ids or user_id is required'
+    if house_ids is not None and (not isinstance(house_ids, list)
+                                  or not all(isinstance(house_id, str) and house_id for house_id in house_ids)):
+        return 'house_ids must be a list of house IDs'
+    if house_ids is not None and len(house_ids) > MAX_HOUSES_PER_READ:
+        return f'At most {MAX_HOUSES_PER_READ} houses can be read at once'
+    if include_agenda and not user_id:
+        return 'user_id is required to include agendas'
+    return None
+
+
+def get_houses(db, house_ids=None, user_id=None, include_agenda=False):
+    """
+    Reads several houses in one batched read (db.get_all), or the houses
+    user_id is a member of if no house_ids are given, and optionally
+    user_id's agenda for today in each of them (one more batched read;
+    agendas read for the first time today are built, see
+    chore_utils.build_agenda).
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_ids (list(str)): The IDs of the houses, at most MAX_HOUSES_PER_READ.
+        user_id (str): The member whose houses and/or agendas to read.
+        include_agenda (bool): Also read user_id's chore instances due today.
+
+    Returns:
+        {'houses': {<house_id>: <house>, ...}, 'notFound': [<house_id>, ...]}
+        in request order, plus 'agendas': {<house_id>: [<chore instance>, ...]}
+        with include_agenda, or an error (400 if the request is invalid).
+    """
+    error = houses_request_error(house_ids, user_id, include_agenda)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        HOUSES = db.collection('houses')
+        if house_ids is None:
+            query = HOUSES.where(filter=firestore.FieldFilter('members', 'array_contains', user_id))
+            houses = {house.id: house.to_dict() for house in query.stream()}
+            not_found = []
+        else:
+            house_ids = list(dict.fromkeys(house_ids))
+            found = {house.id: house.to_dict() for house in db.get_all([HOUSES.document(house_id) for house_id in house_ids])
+                     if house.exists}
+            houses = {house_id: found[house_id] for house_id in house_ids if house_id in found}
+            not_found = [house_id for house_id in house_ids if house_id not in found]
+        result = {'houses': houses, 'notFound': not_found}
+
+        if include_agenda:
+            start_of_day_utc, _ = current_day_range()
+            refs = [HOUSES.document(house_id).collection(AGENDAS).document(agenda_id(user_id, start_of_day_utc))
+                    for house_id in houses]
+            house_of = {ref.path: house_id for ref, house_id in zip(refs, houses)}
+            agendas = {}
+            for agenda in (db.get_all(refs) if refs else []):
+                if agenda.exists:
+                    agendas[house_of[agenda.reference.path]] = agenda_instances(agenda.to_dict())
+            for house_id in houses:
+                if house_id not in agendas:
+                    agendas[house_id] = agenda_instances(build_agenda(db, house_id, user_id))
+            result['agendas'] = {house_id: agendas[house_id] for house_id in houses}
+        return result
+    except Exception as e:
+        print(f"Error getting houses {house_ids or f'of user {user_id}'}: {e}")
+        return jsonify({'error': 'Could not get houses'}), 500
 
 
 # /// Un-Implemented Functions /// #
@@ -95,6 +777,7 @@ def add_member_to_house(db, house_id, user_id):
         print(f"Error adding member to house: {e}")
         return False
 
+
 def get_houses_by_user(db, user_id):
     """
     Retrieves all houses a user is a member of
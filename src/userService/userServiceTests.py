@@ -11,7 +11,8 @@ import os
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
-from userService.user_utils import (get_user, upsert_user)
+from userService.user_utils import (get_user, upsert_user, patch_user)
+from google.api_core import exceptions
 
 
 class TestUserService(unittest.TestCase):
@@ -123,5 +124,33 @@ class TestUserService(unittest.TestCase):
                                                         'houseID': 'asdkfnxc',
                                                         'id': 'fakeID'})
 
+    def test_patch_user_success(self):
+        """
+        Test that only the given fields are updated
+        """
+        result = patch_user(self.mock_db, 'fakeID', {'id': 'fakeID', 'houseID': 'asdkfnxc'})
+        self.assertDictEqual(result.get_json(), {'id': 'fakeID', 'updated': ['houseID']})
+        self.mock_collection.document.assert_called_once_with('fakeID')
+        self.mock_document.update.assert_called_once_with({'houseID': 'asdkfnxc'})
+        self.mock_document.set.assert_not_called()
+
+    def test_patch_user_not_found(self):
+        """
+        Test that updating a user that doesn't exist returns 404
+        """
+        self.mock_document.update.side_effect = exceptions.NotFound('No document to update')
+        result = patch_user(self.mock_db, 'fakeID', {'name': 'John'})
+        self.assertEqual(result[1], 404)
+
+    def test_patch_user_invalid(self):
+        """
+        Test that fields of the wrong type (or no fields) are rejected without writing
+        """
+        result = patch_user(self.mock_db, 'fakeID', {'name': 5})
+        self.assertDictEqual(result[0].get_json(), {'error': 'name must be str'})
+        self.assertEqual(result[1], 400)
+        self.assertEqual(patch_user(self.mock_db, 'fakeID', {'id': 'fakeID'})[1], 400)
+        self.mock_document.update.assert_not_called()
+
 if __name__ == '__main__':
      unittest.main()
@@ -1,7 +1,9 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
 from flask import jsonify
 
+from utils.utils import validate_fields, lazy_import
+
+exceptions = lazy_import('google.api_core.exceptions')
+
 
 # /// User Utility Functions /// #
     # Primarily called by app.py's public routes
@@ -16,7 +18,36 @@ def upsert_user(db, data):
     except Exception as e:
         print(f"Error creating user: {e}")
         return jsonify({'error': 'Could not upsert user'}), 500
-    
+
+
+def patch_user(db, user_id, data):
+    """
+    Changes only the given fields of a user document.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        user_id (str): The ID of the user.
+        data (dict): The fields to change.
+
+    Returns:
+        {'id': <user_id>, 'updated': [<field>, ...]}, or an error (400 if
+        a field is invalid, 404 if the user doesn't exist).
+    """
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be an object of the fields to update'}), 400
+    fields = {field: value for field, value in data.items() if field != 'id'}
+    errors = validate_fields('users', fields) or ([] if fields else ['No fields to update'])
+    if errors:
+        return jsonify({'error': '; '.join(errors)}), 400
+    try:
+        db.collection('users').document(user_id).update(fields)
+        return jsonify({'id': user_id, 'updated': sorted(fields)})
+    except exceptions.NotFound:
+        return jsonify({'error': f'User with ID {user_id} not found'}), 404
+    except Exception as e:
+        print(f"Error updating user: {e}")
+        return jsonify({'error': 'Could not update user'}), 500
+
 
 # /// Un-Implemented Functions /// #
     # These functions have been written, but aren't used
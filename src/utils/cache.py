@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask.json.provider import DefaultJSONProvider
+
+# /// Read-Through Cache /// #
+    # Caches house, user and subcollection reads for the GET routes in
+    # app.py. Entries expire after a TTL and the least recently used entry
+    # is evicted once the cache is full. Writes invalidate the matching
+    # entries, but only in the worker that handled them, so with several
+    # workers either keep the TTL short or point CACHE_REDIS_URL at a
+    # shared Redis instance (requires the optional redis package).
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire after ttl seconds.
+    A ttl of 0 disables caching.
+    """
+
+    def __init__(self, max_entries=1024, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and current size of the cache.
+        """
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxEntries': self.max_entries,
+                'ttl': self.ttl
+            }
+
+
+class RedisCache(TTLCache):
+    """
+    TTLCache stored in Redis, so every worker shares entries and sees each
+    other's invalidations. Eviction is left to Redis' maxmemory-policy.
+    Values are stored as JSON, with dates encoded as the responses encode
+    them, so they come back as the strings the routes would have sent.
+    """
+
+    def __init__(self, client, max_entries=1024, ttl=30, prefix='divvy:'):
+        super().__init__(max_entries, ttl)
+        self._client = client
+        self._prefix = prefix
+
+    def _key(self, key):
+        return self._prefix + ':'.join(str(part) for part in (key if isinstance(key, tuple) else (key,)))
+
+    def get(self, key):
+        raw = self._client.get(self._key(key))
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value):
+        if self.ttl > 0:
+            self._client.setex(self._key(key), max(1, int(self.ttl)),
+                               json.dumps(value, default=DefaultJSONProvider.default, separators=(',', ':')))
+
+    def delete(self, *keys):
+        if keys:
+            self._client.delete(*(self._key(key) for key in keys))
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + '*'):
+            self._client.delete(key)
+
+    def stats(self):
+        stats = super().stats()
+        stats['backend'] = 'redis'
+        stats['size'] = None
+        return stats
+
+
+def create_cache():
+    """
+    Creates the cache configured by the CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES
+    and CACHE_REDIS_URL environment variables. Falls back to the in-process
+    cache if Redis isn't configured or the redis package isn't installed.
+
+    Returns:
+        TTLCache: The cache.
+    """
+    ttl = float(os.getenv('CACHE_TTL_SECONDS', 30))
+    max_entries = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    redis_url = os.getenv('CACHE_REDIS_URL')
+    if redis_url:
+        try:
+            import redis
+            return RedisCache(redis.Redis.from_url(redis_url), max_entries, ttl)
+        except ImportError:
+            print("CACHE_REDIS_URL is set but the redis package isn't installed. Using in-process cache.")
+    return TTLCache(max_entries, ttl)
@@ -0,0 +1,210 @@
+import contextvars
+import zlib
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# /// Response Encoding /// #
+    # How responses are put on the wire, shared by app.py and asgi.py:
+    #
+    # - OrjsonProvider serializes with orjson instead of the json module,
+    #   with the same output as Flask's default provider (dates are still
+    #   HTTP dates), and with ?compact=true drops empty fields (see compact).
+    # - compress() and compress_stream() gzip or brotli (requires the
+    #   optional brotli package) response bodies for clients that accept
+    #   it. Bodies smaller than COMPRESS_MIN_BYTES are sent as they are,
+    #   since compressing them costs more CPU than it saves bytes. Streamed
+    #   bodies (subcollection reads) are always compressed, chunk by chunk,
+    #   and each chunk is flushed so it goes out as soon as it is read.
+
+# Smallest response body compressed by default (config['COMPRESS_MIN_BYTES'])
+COMPRESS_MIN_BYTES = 1024
+
+# gzip level and brotli quality: the fast end, since responses are
+# compressed per request rather than once ahead of time
+GZIP_LEVEL = 3
+BROTLI_QUALITY = 4
+
+# Only text formats are worth compressing
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html')
+
+# Values left out of objects by compact encoding
+EMPTY_VALUES = (None, '', [])
+
+# Whether the request being handled asked for compact JSON (?compact=true),
+# set by the apps' before-request hooks
+compact_json = contextvars.ContextVar('compact_json', default=False)
+
+
+def compact(value):
+    """
+    Drops the fields that are null, empty strings or empty lists from value
+    and every object nested in it. Clients of compact responses treat a
+    missing field as having one of those defaults. Empty objects are kept,
+    since a document can be one, and so are list items, since their
+    position matters.
+
+    Args:
+        value: Any JSON-serializable value.
+
+    Returns:
+        The value without empty fields.
+    """
+    if isinstance(value, dict):
+        return {key: compact(item) for key, item in value.items() if item not in EMPTY_VALUES}
+    if isinstance(value, (list, tuple)):
+        return [compact(item) for item in value]
+    return value
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask/Quart JSON provider that encodes and decodes with orjson. Falls
+    back to the default provider for options orjson doesn't have (e.g.
+    indent) and values it can't encode (e.g. integers over 64 bits).
+    """
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def encode(self, obj):
+        """
+            Returns obj as JSON bytes, without empty fields if the request
+            asked for compact JSON.
+        """
+        if compact_json.get():
+            obj = compact(obj)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options())
+        except orjson.JSONEncodeError:
+            return super().dumps(obj).encode()
+
+    def dumps(self, obj, **kwargs):
+        # orjson output is always compact, so separators make no difference
+        kwargs.pop('separators', None)
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)   # pretty-printed
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b'\n', mimetype=self.mimetype)
+
+
+def negotiate_encoding(accept_encodings):
+    """
+    Picks the compression to use for a client.
+
+    Args:
+        accept_encodings (werkzeug.datastructures.Accept): The request's
+            parsed Accept-Encoding header.
+
+    Returns:
+        str: 'br' or 'gzip', or None to send the body as it is.
+    """
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return accept_encodings.best_match(offered)
+
+
+def should_compress(response):
+    """
+    Whether response has a body that is worth compressing and isn't
+    already encoded.
+    """
+    return (response.status_code not in (204, 206, 304)
+            and 'Content-Encoding' not in response.headers
+            and response.mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+class BrotliCompressor:
+    """
+    brotli.Compressor with the interface of zlib's compressors.
+    """
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self, mode=zlib.Z_FINISH):
+        if mode == zlib.Z_SYNC_FLUSH:
+            return self._compressor.flush()
+        return self._compressor.finish()
+
+
+def compressor(encoding):
+    """
+    Returns a streaming compressor for encoding ('br' or 'gzip') with
+    compress(bytes) and flush([zlib.Z_SYNC_FLUSH]) methods, both returning
+    bytes.
+    """
+    if encoding == 'br':
+        return BrotliCompressor()
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)   # gzip container
+
+
+def compress(data, encoding):
+    """
+    Compresses a whole response body.
+    """
+    compressed = compressor(encoding)
+    return compressed.compress(data) + compressed.flush()
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compresses a streamed response body chunk by chunk, closing chunks
+    once it is done (or closed) so its generator can clean up. Each chunk
+    is flushed, so the client isn't kept waiting on the compressor's buffer
+    while the rest of the body is read.
+    """
+    compressed = compressor(encoding)
+    try:
+        for chunk in chunks:
+            data = compressed.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            yield data + compressed.flush(zlib.Z_SYNC_FLUSH)
+        yield compressed.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+async def compress_async_stream(body, encoding):
+    """
+    compress_stream for a Quart response body.
+    """
+    compressed = compressor(encoding)
+    async with body as chunks:
+        async for chunk in chunks:
+            data = compressed.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            yield data + compressed.flush(zlib.Z_SYNC_FLUSH)
+    yield compressed.flush()
+
+
+def mark_compressed(response, encoding):
+    """
+    Labels a response whose body was compressed with encoding. A strong
+    ETag becomes weak, since it now tags a different byte sequence of the
+    same data (If-None-Match compares ETags weakly, so it still matches).
+    """
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
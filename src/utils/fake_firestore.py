@@ -0,0 +1,816 @@
+import asyncio
+import copy
+import datetime
+import itertools
+import threading
+import time
+import uuid
+from collections import namedtuple
+from types import SimpleNamespace
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+
+from utils.utils import MAX_BATCH_WRITES
+
+# /// In-Memory Firestore /// #
+    # A stand-in for firestore.Client that keeps every document in memory,
+    # used by the benchmarks (see benchmarks/bench_routes.py) and by tests
+    # that need real query results instead of MagicMock calls. It covers
+    # the parts of the Firestore API the backend uses: collections,
+    # documents, where/order_by/select/limit/start_after queries (including
+    # document ID filters), count(), write batches, transactions, get_all,
+    # on_snapshot listeners and the
+    # SERVER_TIMESTAMP/DELETE_FIELD/Increment/ArrayUnion/ArrayRemove
+    # transforms.
+    #
+    # Every round trip to Firestore (a document read, a query, a write, a
+    # batch commit...) sleeps for `latency` seconds, so benchmarks can
+    # model the network without needing one. The latency is slept outside
+    # of any lock, so concurrent requests overlap like they would against
+    # the real service.
+    #
+    # FakeFirestore.async_client() returns a firestore.AsyncClient
+    # stand-in over the same documents, whose round trips await
+    # asyncio.sleep instead of blocking the event loop.
+
+AggregationResult = namedtuple('AggregationResult', ['alias', 'value', 'read_time'])
+
+# Firestore orders values of different types by type first
+_TYPE_ORDER = [
+    (type(None), 0), (bool, 1), (int, 2), (float, 2), (datetime.datetime, 3),
+    (str, 4), (bytes, 5), (list, 8), (dict, 9)
+]
+
+_MISSING = object()
+
+
+def _type_rank(value):
+    for value_type, rank in _TYPE_ORDER:
+        if isinstance(value, value_type):
+            return rank
+    return 6
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    if rank == 3 and value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    if rank == 8:
+        return (rank, tuple(_sort_key(item) for item in value))
+    if rank == 9:
+        return (rank, tuple(sorted((key, _sort_key(item)) for key, item in value.items())))
+    if rank in (0, 6):
+        return (rank, 0)
+    return (rank, value)
+
+
+def _get_field(data, field_path):
+    value = data
+    for part in field_path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _matches(value, op, expected):
+    if op == 'in':
+        return value is not _MISSING and any(_sort_key(value) == _sort_key(item) for item in expected)
+    if op == 'not-in':
+        return value not in (_MISSING, None) and all(_sort_key(value) != _sort_key(item) for item in expected)
+    if op == 'array_contains':
+        return isinstance(value, list) and any(_sort_key(item) == _sort_key(expected) for item in value)
+    if op == 'array_contains_any':
+        return isinstance(value, list) and any(_matches(value, 'array_contains', item) for item in expected)
+    if value is _MISSING:
+        return False
+    if op == '!=':
+        return value is not None and _sort_key(value) != _sort_key(expected)
+    if op == '==':
+        return _sort_key(value) == _sort_key(expected)
+    # range filters only match values of the same type
+    if _type_rank(value) != _type_rank(expected):
+        return False
+    key, other = _sort_key(value), _sort_key(expected)
+    return {'<': key < other, '<=': key <= other, '>': key > other, '>=': key >= other}[op]
+
+
+def _apply_writes(target, data, now, merge_maps=False, dotted=False):
+    """
+    Applies written fields, including transforms, to a document's data in place.
+    """
+    for key, value in data.items():
+        parts = key.split('.') if dotted else [key]
+        parent = target
+        for part in parts[:-1]:
+            if not isinstance(parent.get(part), dict):
+                parent[part] = {}
+            parent = parent[part]
+        field = parts[-1]
+        current = parent.get(field)
+        if value is transforms.DELETE_FIELD:
+            parent.pop(field, None)
+        elif value is transforms.SERVER_TIMESTAMP:
+            parent[field] = now
+        elif isinstance(value, transforms.Increment):
+            base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+            parent[field] = base + value.value
+        elif isinstance(value, transforms.ArrayUnion):
+            items = list(current) if isinstance(current, list) else []
+            parent[field] = items + [copy.deepcopy(item) for item in value.values if item not in items]
+        elif isinstance(value, transforms.ArrayRemove):
+            items = current if isinstance(current, list) else []
+            parent[field] = [item for item in items if item not in value.values]
+        elif isinstance(value, dict):
+            nested = current if merge_maps and isinstance(current, dict) else {}
+            parent[field] = nested
+            _apply_writes(nested, value, now, merge_maps)
+        else:
+            parent[field] = copy.deepcopy(value)
+    return target
+
+
+class FakeFirestore:
+    """
+    In-memory firestore.Client with injectable per-RPC latency.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.stats = {'rpcs': 0, 'reads': 0, 'writes': 0, 'deletes': 0}
+        self._collections = {}
+        self._times = {}
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._document_locks = {}
+
+    # client API
+    def collection(self, *path):
+        return FakeCollectionReference(self, '/'.join(path))
+
+    def document(self, *path):
+        path = '/'.join(path)
+        collection_path, doc_id = path.rsplit('/', 1)
+        return FakeDocumentReference(self, collection_path, doc_id)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts=5, read_only=False):
+        return FakeTransaction(self, max_attempts, read_only)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        references = list(references)
+        self._rpc(reads=len(references))
+        for ref in references:
+            if transaction is not None:
+                transaction._lock(ref.path)
+            snapshot = self._snapshot(ref, field_paths)
+            if transaction is not None:
+                transaction._read(snapshot)
+            yield snapshot
+
+    def collections(self):
+        with self._lock:
+            names = {path for path in self._collections if '/' not in path and self._collections[path]}
+        return [self.collection(name) for name in sorted(names)]
+
+    def close(self):
+        pass
+
+    # helpers
+    def reset_stats(self):
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def document_count(self):
+        with self._lock:
+            return sum(len(docs) for docs in self._collections.values())
+
+    def _document_lock(self, path):
+        with self._lock:
+            return self._document_locks.setdefault(path, threading.Lock())
+
+    def async_client(self):
+        """
+        Returns a firestore.AsyncClient stand-in sharing this client's documents.
+        """
+        return AsyncFakeFirestore(self)
+
+    def _rpc(self, **counts):
+        if self.latency:
+            time.sleep(self.latency)
+        self._count(**counts)
+
+    def _count(self, **counts):
+        with self._lock:
+            self.stats['rpcs'] += 1
+            for key, count in counts.items():
+                self.stats[key] += count
+
+    def _snapshot(self, ref, field_paths=None):
+        with self._lock:
+            data = self._collections.get(ref._collection_path, {}).get(ref.id)
+            times = self._times.get(ref.path)
+            data = copy.deepcopy(data)
+        if data is not None and field_paths is not None:
+            data = _project(data, field_paths)
+        return FakeDocumentSnapshot(ref, data, times)
+
+    def _query(self, query):
+        with self._lock:
+            docs = self._collections.get(query._collection_path, {})
+            results = [(doc_id, data) for doc_id, data in docs.items() if query._matches(data, doc_id)]
+            results = [(doc_id, copy.deepcopy(data), self._times.get(f"{query._collection_path}/{doc_id}"))
+                       for doc_id, data in results]
+        return results
+
+    def _commit(self, writes, read_times=None):
+        """
+        Applies (kind, ref, data) writes atomically and notifies listeners.
+        read_times maps the paths a transaction read to their update times
+        then; if any has changed since, the commit is aborted.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        changed = []
+        with self._lock:
+            for path, update_time in (read_times or {}).items():
+                if self._times.get(path, (None, None))[1] != update_time:
+                    raise exceptions.Aborted(f"Transaction lost a race on {path}")
+            # validate every write before applying any of them
+            for kind, ref, data in writes:
+                exists = ref.id in self._collections.get(ref._collection_path, {})
+                if kind == 'update' and not exists:
+                    raise exceptions.NotFound(f"No document to update: {ref.path}")
+                if kind == 'create' and exists:
+                    raise exceptions.AlreadyExists(f"Document already exists: {ref.path}")
+            for kind, ref, data in writes:
+                docs = self._collections.setdefault(ref._collection_path, {})
+                existing = docs.get(ref.id)
+                if kind == 'delete':
+                    if docs.pop(ref.id, None) is not None:
+                        self._times.pop(ref.path, None)
+                        changed.append((ref, existing, None))
+                    continue
+                if kind in ('set', 'create'):
+                    updated = _apply_writes({}, data, now)
+                elif kind == 'merge':
+                    updated = _apply_writes(copy.deepcopy(existing or {}), data, now, merge_maps=True)
+                else:
+                    updated = _apply_writes(copy.deepcopy(existing), data, now, dotted=True)
+                docs[ref.id] = updated
+                create_time = self._times[ref.path][0] if existing is not None else now
+                self._times[ref.path] = (create_time, now)
+                changed.append((ref, existing, updated))
+            listeners = list(self._listeners)
+        self._notify(listeners, changed)
+        return [SimpleNamespace(update_time=now) for _ in writes]
+
+    # listeners
+    def _listen(self, target, callback):
+        watch = FakeWatch(self, target, callback)
+        with self._lock:
+            self._listeners.append(watch)
+            if isinstance(target, FakeDocumentReference):
+                initial = [self._snapshot(target)]
+                changes = []
+            else:
+                initial = [FakeDocumentSnapshot(target._collection_ref().document(doc_id), data, times)
+                           for doc_id, data, times in self._query(target)]
+                changes = [FakeDocumentChange('ADDED', doc) for doc in initial]
+        callback(initial, changes, datetime.datetime.now(datetime.timezone.utc))
+        return watch
+
+    def _notify(self, listeners, changed):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for watch in listeners:
+            if not watch.active:
+                continue
+            target = watch.target
+            if isinstance(target, FakeDocumentReference):
+                if any(ref.path == target.path for ref, _, _ in changed):
+                    watch.callback([self._snapshot(target)], [], now)
+                continue
+            changes = []
+            for ref, before, after in changed:
+                if ref._collection_path != target._collection_path:
+                    continue
+                was_in = before is not None and target._matches(before, ref.id)
+                is_in = after is not None and target._matches(after, ref.id)
+                if is_in:
+                    changes.append(FakeDocumentChange('MODIFIED' if was_in else 'ADDED', self._snapshot(ref)))
+                elif was_in:
+                    changes.append(FakeDocumentChange('REMOVED', FakeDocumentSnapshot(ref, before, None)))
+            if changes:
+                docs = [FakeDocumentSnapshot(target._collection_ref().document(doc_id), data, times)
+                        for doc_id, data, times in self._query(target)]
+                watch.callback(docs, changes, now)
+
+
+def _project(data, field_paths):
+    projected = {}
+    for field_path in field_paths:
+        value = _get_field(data, field_path)
+        if value is not _MISSING:
+            _apply_writes(projected, {field_path: value}, None, merge_maps=True, dotted=True)
+    return projected
+
+
+class FakeWatch:
+    def __init__(self, db, target, callback):
+        self._db = db
+        self.target = target
+        self.callback = callback
+        self.active = True
+
+    def unsubscribe(self):
+        self.active = False
+        with self._db._lock:
+            if self in self._db._listeners:
+                self._db._listeners.remove(self)
+
+
+class FakeDocumentChange:
+    def __init__(self, change_type, document):
+        self.type = SimpleNamespace(name=change_type)
+        self.document = document
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data, times=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+        self.create_time, self.update_time = times or (None, None)
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path):
+        value = _get_field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class FakeDocumentReference:
+    def __init__(self, db, collection_path, doc_id):
+        self._db = db
+        self._collection_path = collection_path
+        self.id = doc_id
+        self.path = f"{collection_path}/{doc_id}"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    @property
+    def parent(self):
+        return FakeCollectionReference(self._db, self._collection_path)
+
+    def collection(self, name):
+        return FakeCollectionReference(self._db, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None):
+        if transaction is not None:
+            transaction._lock(self.path)
+        self._db._rpc(reads=1)
+        snapshot = self._db._snapshot(self, field_paths)
+        if transaction is not None:
+            transaction._read(snapshot)
+        return snapshot
+
+    def set(self, document_data, merge=False):
+        self._db._rpc(writes=1)
+        return self._db._commit([('merge' if merge else 'set', self, document_data)])[0]
+
+    def update(self, field_updates):
+        self._db._rpc(writes=1)
+        return self._db._commit([('update', self, field_updates)])[0]
+
+    def create(self, document_data):
+        self._db._rpc(writes=1)
+        return self._db._commit([('create', self, document_data)])[0]
+
+    def delete(self):
+        self._db._rpc(deletes=1)
+        self._db._commit([('delete', self, None)])
+
+    def on_snapshot(self, callback):
+        return self._db._listen(self, callback)
+
+
+class FakeQuery:
+    def __init__(self, db, collection_path, filters=(), orders=(), projection=None, limit=None, cursor=None):
+        self._db = db
+        self._collection_path = collection_path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._projection = projection
+        self._limit = limit
+        self._cursor = cursor
+
+    def _copy(self, **changes):
+        fields = dict(filters=self._filters, orders=self._orders, projection=self._projection,
+                      limit=self._limit, cursor=self._cursor)
+        fields.update(changes)
+        return FakeQuery(self._db, self._collection_path, **fields)
+
+    def _collection_ref(self):
+        return FakeCollectionReference(self._db, self._collection_path)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction='ASCENDING'):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(cursor=document_fields_or_snapshot)
+
+    def count(self, alias=None):
+        return FakeAggregationQuery(self, alias or 'field_1')
+
+    def on_snapshot(self, callback):
+        return self._db._listen(self, callback)
+
+    def _matches(self, data, doc_id):
+        if data is None:
+            return False
+        for field_path, op, value in self._filters:
+            if field_path == '__name__':
+                # document ID filters compare with document references
+                if not _matches(doc_id, op, getattr(value, 'id', value)):
+                    return False
+            elif not _matches(_get_field(data, field_path), op, value):
+                return False
+        # documents without a field being ordered by are left out, like Firestore does
+        return all(_get_field(data, field_path) is not _MISSING
+                   for field_path, _ in self._orders if field_path != '__name__')
+
+    def _sort_key(self, doc_id, data):
+        key = []
+        for field_path, direction in self._orders:
+            value = doc_id if field_path == '__name__' else _get_field(data, field_path)
+            key.append(_Reversible(_sort_key(value), direction == 'DESCENDING'))
+        # ties are broken by document ID, in the direction of the last order
+        descending = bool(self._orders) and self._orders[-1][1] == 'DESCENDING'
+        key.append(_Reversible(_sort_key(doc_id), descending))
+        return key
+
+    def _run(self):
+        results = self._db._query(self)
+        results.sort(key=lambda result: self._sort_key(result[0], result[1]))
+        if self._cursor is not None:
+            if isinstance(self._cursor, FakeDocumentSnapshot):
+                cursor = self._sort_key(self._cursor.id, self._cursor._data or {})
+            else:
+                # a dict of field values only positions the ordered fields
+                cursor = self._sort_key(None, self._cursor)[:len(self._orders)]
+            results = [result for result in results
+                       if self._sort_key(result[0], result[1])[:len(cursor)] > cursor]
+        if self._limit is not None:
+            results = results[:self._limit]
+        return results
+
+    def stream(self, transaction=None, retry=None, timeout=None):
+        # retry and timeout are accepted for API compatibility and ignored
+        results = self._run()
+        self._db._rpc(reads=max(1, len(results)))
+        collection = self._collection_ref()
+        for doc_id, data, times in results:
+            if self._projection is not None:
+                data = _project(data, self._projection)
+            snapshot = FakeDocumentSnapshot(collection.document(doc_id), data, times)
+            if transaction is not None:
+                transaction._lock(snapshot.reference.path)
+                transaction._read(snapshot)
+            yield snapshot
+
+    def get(self, transaction=None, retry=None, timeout=None):
+        return list(self.stream(transaction))
+
+
+class _Reversible:
+    """
+    Sort key wrapper that inverts comparisons for descending orders.
+    """
+
+    def __init__(self, key, descending):
+        self.key = key
+        self.descending = descending
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return self.key > other.key if self.descending else self.key < other.key
+
+    def __gt__(self, other):
+        return other < self
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, db, path):
+        super().__init__(db, path)
+        self.id = path.rsplit('/', 1)[-1]
+
+    @property
+    def parent(self):
+        if '/' not in self._collection_path:
+            return None
+        return self._db.document(self._collection_path.rsplit('/', 1)[0])
+
+    def document(self, document_id=None):
+        return FakeDocumentReference(self._db, self._collection_path, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, document_data, document_id=None):
+        ref = self.document(document_id)
+        return ref.create(document_data), ref
+
+    def list_documents(self):
+        self._db._rpc()
+        with self._db._lock:
+            doc_ids = sorted(self._db._collections.get(self._collection_path, {}))
+        return [self.document(doc_id) for doc_id in doc_ids]
+
+
+class FakeAggregationQuery:
+    def __init__(self, query, alias):
+        self._query = query
+        self._alias = alias
+
+    def get(self, transaction=None):
+        count = len(self._query._run())
+        self._query._db._rpc(reads=max(1, (count + 999) // 1000))
+        return [[AggregationResult(self._alias, count, datetime.datetime.now(datetime.timezone.utc))]]
+
+
+class FakeWriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('merge' if merge else 'set', reference, document_data))
+
+    def update(self, reference, field_updates):
+        self._writes.append(('update', reference, field_updates))
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference, document_data))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None))
+
+    def commit(self, read_times=None):
+        if len(self._writes) > MAX_BATCH_WRITES:
+            raise exceptions.InvalidArgument(f"maximum {MAX_BATCH_WRITES} writes allowed per request")
+        writes, self._writes = self._writes, []
+        deletes = sum(1 for kind, _, _ in writes if kind == 'delete')
+        self._db._rpc(writes=len(writes) - deletes, deletes=deletes)
+        return self._db._commit(writes, read_times)
+
+
+class FakeTransaction(FakeWriteBatch):
+    """
+    Transaction usable with @firestore.transactional. Like the server
+    client libraries, documents read in a transaction are locked until it
+    commits or rolls back, so competing transactions wait instead of
+    failing. A transaction that waits longer than LOCK_TIMEOUT (e.g. a
+    deadlock) raises Aborted, which makes @firestore.transactional retry,
+    as does a commit whose reads were overwritten by a plain write.
+    """
+
+    LOCK_TIMEOUT = 5
+
+    _ids = itertools.count(1)
+
+    def __init__(self, db, max_attempts=5, read_only=False):
+        super().__init__(db)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._read_times = {}
+        self._locks = []
+
+    @property
+    def in_progress(self):
+        return self._id is not None
+
+    @property
+    def id(self):
+        return self._id
+
+    def _lock(self, path):
+        # read-only transactions read a snapshot without taking locks
+        if self._read_only or path in self._read_times:
+            return
+        lock = self._db._document_lock(path)
+        if not lock.acquire(timeout=self.LOCK_TIMEOUT):
+            raise exceptions.Aborted(f"Transaction timed out waiting for {path}")
+        self._locks.append(lock)
+
+    def _read(self, snapshot):
+        self._read_times.setdefault(snapshot.reference.path, snapshot.update_time)
+
+    def _begin(self, retry_id=None):
+        self._id = str(next(self._ids)).encode()
+
+    def _clean_up(self):
+        self._writes = []
+        self._read_times = {}
+        self._id = None
+        while self._locks:
+            self._locks.pop().release()
+
+    def _rollback(self):
+        self._clean_up()
+
+    def _commit(self):
+        try:
+            return self.commit(self._read_times)
+        finally:
+            self._clean_up()
+
+    def get(self, ref_or_query):
+        # Like the real client: no field_paths, and a CollectionReference
+        # isn't a Query there, so it's rejected too
+        if isinstance(ref_or_query, FakeDocumentReference):
+            return iter([ref_or_query.get(transaction=self)])
+        if isinstance(ref_or_query, FakeQuery) and not isinstance(ref_or_query, FakeCollectionReference):
+            return ref_or_query.stream(transaction=self)
+        raise ValueError('Value for argument "ref_or_query" must be a DocumentReference or a Query.')
+
+    def get_all(self, references):
+        return self._db.get_all(references, transaction=self)
+
+
+# /// AsyncClient Stand-In /// #
+
+class AsyncFakeFirestore:
+    """
+    firestore.AsyncClient counterpart of FakeFirestore, for the async serving mode.
+    """
+
+    def __init__(self, db):
+        self._db = db
+
+    async def _rpc(self, **counts):
+        if self._db.latency:
+            await asyncio.sleep(self._db.latency)
+        self._db._count(**counts)
+
+    def collection(self, *path):
+        return AsyncFakeCollectionReference(self, self._db.collection(*path))
+
+    def document(self, *path):
+        return AsyncFakeDocumentReference(self, self._db.document(*path))
+
+    def batch(self):
+        return AsyncFakeWriteBatch(self)
+
+    async def get_all(self, references, field_paths=None, transaction=None):
+        references = list(references)
+        await self._rpc(reads=len(references))
+        for ref in references:
+            yield self._db._snapshot(ref._ref, field_paths)
+
+    def close(self):
+        pass
+
+
+class AsyncFakeDocumentReference:
+    def __init__(self, client, ref):
+        self._client = client
+        self._ref = ref
+        self.id = ref.id
+        self.path = ref.path
+
+    @property
+    def parent(self):
+        return AsyncFakeCollectionReference(self._client, self._ref.parent)
+
+    def collection(self, name):
+        return AsyncFakeCollectionReference(self._client, self._ref.collection(name))
+
+    async def get(self, field_paths=None, transaction=None):
+        await self._client._rpc(reads=1)
+        return self._client._db._snapshot(self._ref, field_paths)
+
+    async def set(self, document_data, merge=False):
+        await self._client._rpc(writes=1)
+        return self._client._db._commit([('merge' if merge else 'set', self._ref, document_data)])[0]
+
+    async def update(self, field_updates):
+        await self._client._rpc(writes=1)
+        return self._client._db._commit([('update', self._ref, field_updates)])[0]
+
+    async def create(self, document_data):
+        await self._client._rpc(writes=1)
+        return self._client._db._commit([('create', self._ref, document_data)])[0]
+
+    async def delete(self):
+        await self._client._rpc(deletes=1)
+        self._client._db._commit([('delete', self._ref, None)])
+
+
+class AsyncFakeQuery:
+    def __init__(self, client, query):
+        self._client = client
+        self._query = query
+
+    def _wrap(self, query):
+        return AsyncFakeQuery(self._client, query)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        return self._wrap(self._query.where(field_path, op_string, value, filter=filter))
+
+    def order_by(self, field_path, direction='ASCENDING'):
+        return self._wrap(self._query.order_by(field_path, direction))
+
+    def select(self, field_paths):
+        return self._wrap(self._query.select(field_paths))
+
+    def limit(self, count):
+        return self._wrap(self._query.limit(count))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._wrap(self._query.start_after(document_fields_or_snapshot))
+
+    def count(self, alias=None):
+        return AsyncFakeAggregationQuery(self, alias or 'field_1')
+
+    async def stream(self, transaction=None):
+        results = self._query._run()
+        await self._client._rpc(reads=max(1, len(results)))
+        collection = self._query._collection_ref()
+        for doc_id, data, times in results:
+            if self._query._projection is not None:
+                data = _project(data, self._query._projection)
+            yield FakeDocumentSnapshot(collection.document(doc_id), data, times)
+
+    async def get(self, transaction=None):
+        return [doc async for doc in self.stream(transaction)]
+
+
+class AsyncFakeCollectionReference(AsyncFakeQuery):
+    def __init__(self, client, collection):
+        super().__init__(client, collection)
+        self.id = collection.id
+
+    def document(self, document_id=None):
+        return AsyncFakeDocumentReference(self._client, self._query.document(document_id))
+
+
+class AsyncFakeAggregationQuery:
+    def __init__(self, query, alias):
+        self._query = query
+        self._alias = alias
+
+    async def get(self, transaction=None):
+        count = len(self._query._query._run())
+        await self._query._client._rpc(reads=max(1, (count + 999) // 1000))
+        return [[AggregationResult(self._alias, count, datetime.datetime.now(datetime.timezone.utc))]]
+
+
+class AsyncFakeWriteBatch(FakeWriteBatch):
+    def __init__(self, client):
+        super().__init__(client._db)
+        self._client = client
+
+    def set(self, reference, document_data, merge=False):
+        super().set(reference._ref, document_data, merge)
+
+    def update(self, reference, field_updates):
+        super().update(reference._ref, field_updates)
+
+    def create(self, reference, document_data):
+        super().create(reference._ref, document_data)
+
+    def delete(self, reference):
+        super().delete(reference._ref)
+
+    async def commit(self):
+        if len(self._writes) > MAX_BATCH_WRITES:
+            raise exceptions.InvalidArgument(f"maximum {MAX_BATCH_WRITES} writes allowed per request")
+        writes, self._writes = self._writes, []
+        deletes = sum(1 for kind, _, _ in writes if kind == 'delete')
+        await self._client._rpc(writes=len(writes) - deletes, deletes=deletes)
+        return self._db._commit(writes)
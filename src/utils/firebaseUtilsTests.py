@@ -1,10 +1,5 @@
 import unittest
 from unittest.mock import MagicMock, patch
-from datetime import datetime, timedelta
-from dateutil.rrule import rrule, DAILY, WEEKLY, MONTHLY
-import firebase_admin
-from firebase_admin import credentials, firestore, auth 
-from flask import Flask
 
 import sys
 import os
@@ -13,7 +8,11 @@ import os
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
-from utils.firebase_utils import get_firestore_db
+from utils import firebase_utils
+from utils.firebase_utils import init_firebase, get_firestore_db, reset_firestore_db
+from utils.fake_firestore import FakeFirestore
+from google.api_core import exceptions
+
 
 class TestFirebaseUtils(unittest.TestCase):
     """
@@ -22,56 +21,82 @@ class TestFirebaseUtils(unittest.TestCase):
 
     def setUp(self):
         """
-        Set up mocks for Firebase Admin SDK and Firestore.  This is crucial
-        to avoid actually connecting to a real Firebase database during tests.
+        Patch out the Firebase Admin SDK and the Firestore client so nothing
+        reads credentials or connects to Firestore.
         """
-        self.initialize_app_patch = patch('firebase_admin.initialize_app')
-        self.mock_initialize_app = self.initialize_app_patch.start()
+        reset_firestore_db()
+        self.mock_app = MagicMock(project_id='divvy-test')
+        patches = [
+            patch('firebase_admin._apps', {'[DEFAULT]': self.mock_app}),
+            patch('firebase_admin.get_app', return_value=self.mock_app),
+            patch('utils.firebase_utils.firestore.Client', side_effect=lambda **kwargs: MagicMock()),
+        ]
+        self.mocks = [p.start() for p in patches]
+        self.mock_client = self.mocks[2]
+        for p in patches:
+            self.addCleanup(p.stop)
+        self.addCleanup(reset_firestore_db)
 
-        self.mock_firestore_client = MagicMock()
+    def test_init_firebase_only_once(self):
+        with patch('firebase_admin.initialize_app') as mock_initialize_app:
+            init_firebase()
+        mock_initialize_app.assert_not_called()
 
-        self.firestore_client_patch = patch('firebase_admin.firestore.client', return_value=self.mock_firestore_client)
-        self.mock_firestore_client_instance = self.firestore_client_patch.start()
+        with patch('firebase_admin._apps', {}), \
+                patch('firebase_admin.initialize_app') as mock_initialize_app, \
+                patch('utils.firebase_utils.credentials.Certificate') as mock_certificate:
+            init_firebase('creds.json')
+        mock_certificate.assert_called_once_with('creds.json')
+        mock_initialize_app.assert_called_once_with(mock_certificate.return_value)
 
-        self.app = Flask(__name__)
-        self.app_context = self.app.app_context()
-        self.app_context.push()
-        self.request_context = MagicMock()
+    def test_get_firestore_db_cached_per_process(self):
+        db = get_firestore_db()
+        self.assertIs(get_firestore_db(), db)
+        self.mock_client.assert_called_once_with(
+            credentials=self.mock_app.credential.get_credential.return_value, project='divvy-test')
 
-        self.mock_auth = MagicMock()
-        self.auth_patch = patch('firebase_admin.auth', self.mock_auth)
-        self.auth_patch.start()
+        # a forked worker gets its own client
+        with patch('utils.firebase_utils.os.getpid', return_value=os.getpid() + 1):
+            forked_db = get_firestore_db()
+        self.assertIsNot(forked_db, db)
+        self.assertEqual(self.mock_client.call_count, 2)
 
-        # store the patched functions, and unpatch them in tearDown
-        self.get_firestore_db_patch = patch('src.utils.firebase_utils.get_firestore_db', return_value=self.mock_firestore_client)
-        self.get_firestore_db_patch.start()
+    def test_reset_firestore_db(self):
+        db = get_firestore_db()
+        reset_firestore_db()
+        self.assertIsNone(firebase_utils._client)
+        self.assertIsNot(get_firestore_db(), db)
+
+
+class TestReadiness(unittest.TestCase):
+    """
+    Unit tests for the /ready route in app.py.
+    """
+
+    def setUp(self):
+        import app
+        self.db = FakeFirestore()
+        self.flask_app = app.create_app({'FIRESTORE_DB': self.db})
+        self.client = self.flask_app.test_client()
+        app.ready_until = 0
+        self.addCleanup(setattr, app, 'ready_until', 0)
+
+    def test_ready(self):
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'status': 'ready'})
+
+        # reused for READINESS_TTL_SECONDS
+        self.db.reset_stats()
+        self.assertEqual(self.client.get('/ready').status_code, 200)
+        self.assertEqual(self.db.stats['rpcs'], 0)
+
+    def test_unavailable(self):
+        with patch('utils.fake_firestore.FakeQuery.get', side_effect=exceptions.ServiceUnavailable('down')):
+            response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()['status'], 'unavailable')
 
-    def tearDown(self):
-        """
-        Clean up the mocks after each test.  This is important to prevent
-        interference between tests.
-        """
-        self.initialize_app_patch.stop()
-        self.firestore_client_patch.stop()
-        self.get_firestore_db_patch.stop()
-
-    # NOT BEING USED because firebase_utils.py is not currently being used. Will be re-implemented
-    # when firebase_utils.py is updated.
-    # def test_get_firestore_db_success(self):
-    #     """
-    #     Test successful retrieval of the Firestore client.
-    #     """
-    #     with patch('firebase_admin._apps', [MagicMock()]):
-    #         db = get_firestore_db()
-    #         self.assertEqual(db, self.mock_firestore_client)
-
-    # def test_get_firestore_db_failure(self):
-    #     """
-    #     Test failure to retrieve the Firestore client when Firebase is not initialized.
-    #     """
-    #     with patch('firebase_admin._apps', []):
-    #         db = get_firestore_db()
-    #         self.assertIsNone(db)
 
 if __name__ == "__main__":
-     unittest.main()
\ No newline at end of file
+     unittest.main()
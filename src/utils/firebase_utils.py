@@ -1,18 +1,81 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+import importlib
 import os
+import threading
+
+from utils.utils import lazy_import
+
+# Imported on first use, see lazy_import
+firebase_admin = lazy_import('firebase_admin')
+credentials = lazy_import('firebase_admin.credentials')
+firestore = lazy_import('google.cloud.firestore')
+
+# /// Firebase Setup /// #
+    # firebase_admin is initialized once, which only reads the credentials
+    # file. The Firestore client, and with it its gRPC channels, is created
+    # separately in every process on first use: gRPC channels opened before
+    # a fork don't work in the child, so under gunicorn --preload the master
+    # reads the credentials once and each worker opens its own connection
+    # (see gunicorn.conf.py's post_fork).
+
+# Service account key, relative to ./src. Override with FIREBASE_CREDENTIALS.
+CREDENTIALS_PATH = 'firebase-auth.json'
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def init_firebase(credentials_path=None):
+    """
+    Initializes the default firebase_admin app, unless it already is.
+    Doesn't open any connections.
+
+    Args:
+        credentials_path (str): The service account key. Defaults to
+            FIREBASE_CREDENTIALS, or firebase-auth.json.
+    """
+    if not firebase_admin._apps:
+        path = credentials_path or os.getenv('FIREBASE_CREDENTIALS', CREDENTIALS_PATH)
+        firebase_admin.initialize_app(credentials.Certificate(path))
+
+
+def preload_firebase():
+    """
+    Initializes firebase_admin and imports the Firestore client library,
+    without connecting. Called by the gunicorn master (see gunicorn.conf.py)
+    so the forked workers share this work instead of each repeating it.
+    """
+    init_firebase()
+    importlib.import_module(firestore.__name__)
+
 
-# NOT CURRENTLY BEING USED. Modify to work with the new implementation of app.py
 def get_firestore_db():
     """
-    Retrieves the Firestore database client.
+    Retrieves this process's Firestore client, creating it on first use
+    (and again after a fork).
 
     Returns:
-        firestore.Client: The Firestore client.  Returns None if initialization failed.
-    """
-    if firebase_admin._apps:
-      return firestore.client()
-    else:
-      print("Firebase App not initialized.  Cannot get Firestore client.")
-      return None
-    
\ No newline at end of file
+        firestore.Client: The Firestore client.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _lock:
+            if _client is None or _client_pid != os.getpid():
+                init_firebase()
+                app = firebase_admin.get_app()
+                # not firestore.client(), which would hand a forked worker
+                # the client its parent created
+                _client = firestore.Client(credentials=app.credential.get_credential(), project=app.project_id)
+                _client_pid = os.getpid()
+    return _client
+
+
+def reset_firestore_db():
+    """
+    Drops this process's Firestore client, so the next call to
+    get_firestore_db creates a new one.
+    """
+    global _client, _client_pid
+    with _lock:
+        _client = None
+        _client_pid = None
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+
+from houseService.house_utils import HOUSE_SUBCOLLECTIONS
+
+# /// Real-Time House Mirror /// #
+    # Optional mode (HOUSE_MIRROR_ENABLED=true) in which the backend keeps
+    # recently active houses in memory with Firestore on_snapshot listeners
+    # instead of querying Firestore on every request. The first read of a
+    # house attaches the listeners and is served from Firestore as usual;
+    # once the initial snapshots arrive, reads become local dict lookups.
+    # Houses are dropped (and their listeners closed) after
+    # HOUSE_MIRROR_IDLE_SECONDS without reads, when they grow past
+    # HOUSE_MIRROR_MAX_DOCS documents, or to make room for a more recently
+    # used house once HOUSE_MIRROR_MAX_HOUSES are mirrored.
+
+
+class _MirroredHouse:
+    """
+    The listeners and local copy of one house.
+    """
+
+    def __init__(self, house_id):
+        self.house_id = house_id
+        self.house = None
+        self.house_ready = False
+        self.collections = {name: {} for name in HOUSE_SUBCOLLECTIONS}
+        self.ready = set()
+        self.watches = []
+        self.refs = 0
+        self.last_used = time.monotonic()
+        self.overflowed = False
+
+    def doc_count(self):
+        return sum(len(docs) for docs in self.collections.values())
+
+
+class HouseMirror:
+    """
+    Ref-counted, memory-bounded in-memory mirror of recently active houses.
+    """
+
+    def __init__(self, db, idle_seconds=300, max_docs_per_house=5000, max_houses=200):
+        self.db = db
+        self.idle_seconds = idle_seconds
+        self.max_docs_per_house = max_docs_per_house
+        self.max_houses = max_houses
+        self._houses = {}
+        self._lock = threading.RLock()
+        self._reaper = None
+
+    def get_house(self, house_id):
+        """
+        Returns the mirrored house document, or None if the house isn't
+        mirrored yet (or doesn't exist), in which case the caller should
+        read from Firestore.
+        """
+        with self._use(house_id) as house:
+            if house is None or not house.house_ready:
+                return None
+            return house.house
+
+    def get_collection(self, house_id, name):
+        """
+        Returns a copy of a mirrored subcollection keyed by document ID, or
+        None if it isn't mirrored yet, in which case the caller should read
+        from Firestore.
+        """
+        with self._use(house_id) as house:
+            if house is None or not house.house_ready or house.house is None or name not in house.ready:
+                return None
+            return dict(house.collections[name])
+
+    def close_idle(self):
+        """
+        Closes the listeners of houses that haven't been read recently.
+        """
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            for house_id, house in list(self._houses.items()):
+                if house.refs == 0 and house.last_used < cutoff:
+                    self._close(house_id)
+
+    def close(self):
+        with self._lock:
+            for house_id in list(self._houses):
+                self._close(house_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'houses': len(self._houses),
+                'documents': sum(house.doc_count() for house in self._houses.values())
+            }
+
+    def _use(self, house_id):
+        return _HouseUse(self, house_id)
+
+    def _acquire(self, house_id):
+        with self._lock:
+            house = self._houses.get(house_id)
+            if house is None:
+                house = self._open(house_id)
+            if house is None or house.overflowed:
+                return None
+            house.refs += 1
+            house.last_used = time.monotonic()
+            return house
+
+    def _release(self, house):
+        with self._lock:
+            house.refs -= 1
+
+    def _open(self, house_id):
+        # make room by dropping the least recently used idle house
+        if len(self._houses) >= self.max_houses:
+            idle = [house for house in self._houses.values() if house.refs == 0]
+            if not idle:
+                return None
+            self._close(min(idle, key=lambda house: house.last_used).house_id)
+
+        house = _MirroredHouse(house_id)
+        self._houses[house_id] = house
+        house_ref = self.db.collection('houses').document(house_id)
+        house.watches.append(house_ref.on_snapshot(
+            lambda docs, changes, read_time: self._on_house(house, docs)))
+        for name in HOUSE_SUBCOLLECTIONS:
+            house.watches.append(house_ref.collection(name).on_snapshot(
+                lambda docs, changes, read_time, name=name: self._on_collection(house, name, changes)))
+        self._start_reaper()
+        return house
+
+    def _close(self, house_id):
+        house = self._houses.pop(house_id, None)
+        if house is not None:
+            house.collections = {}
+            self._unsubscribe(house)
+
+    def _unsubscribe(self, house):
+        for watch in house.watches:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"Error closing listener for house {house.house_id}: {e}")
+
+    def _on_house(self, house, docs):
+        with self._lock:
+            house.house = docs[0].to_dict() if docs and docs[0].exists else None
+            house.house_ready = True
+
+    def _on_collection(self, house, name, changes):
+        with self._lock:
+            if house.overflowed or self._houses.get(house.house_id) is not house:
+                return
+            docs = house.collections[name]
+            for change in changes:
+                if change.type.name == 'REMOVED':
+                    docs.pop(change.document.id, None)
+                else:
+                    docs[change.document.id] = change.document.to_dict()
+            house.ready.add(name)
+            if house.doc_count() > self.max_docs_per_house:
+                # too big to mirror, so reads go back to Firestore until the
+                # house goes idle. Listeners can't be closed from their own
+                # callback thread, so close them from another one.
+                house.overflowed = True
+                house.collections = {}
+                threading.Thread(target=self._unsubscribe, args=(house,), daemon=True).start()
+
+    def _start_reaper(self):
+        if self._reaper is not None:
+            return
+
+        def reap():
+            while True:
+                time.sleep(max(1, self.idle_seconds / 4))
+                self.close_idle()
+        self._reaper = threading.Thread(target=reap, name='house-mirror-reaper', daemon=True)
+        self._reaper.start()
+
+
+class _HouseUse:
+    """
+    Holds a reference to a mirrored house while it's being read.
+    """
+
+    def __init__(self, mirror, house_id):
+        self.mirror = mirror
+        self.house_id = house_id
+        self.house = None
+
+    def __enter__(self):
+        self.house = self.mirror._acquire(self.house_id)
+        return self.house
+
+    def __exit__(self, *exc):
+        if self.house is not None:
+            self.mirror._release(self.house)
+        return False
+
+
+def create_house_mirror(db):
+    """
+    Creates the house mirror if HOUSE_MIRROR_ENABLED is set, configured by
+    HOUSE_MIRROR_IDLE_SECONDS, HOUSE_MIRROR_MAX_DOCS and HOUSE_MIRROR_MAX_HOUSES.
+
+    Returns:
+        HouseMirror: The mirror, or None if mirroring is disabled.
+    """
+    if os.getenv('HOUSE_MIRROR_ENABLED', '').lower() != 'true':
+        return None
+    return HouseMirror(
+        db,
+        idle_seconds=float(os.getenv('HOUSE_MIRROR_IDLE_SECONDS', 300)),
+        max_docs_per_house=int(os.getenv('HOUSE_MIRROR_MAX_DOCS', 5000)),
+        max_houses=int(os.getenv('HOUSE_MIRROR_MAX_HOUSES', 200))
+    )
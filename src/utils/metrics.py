@@ -0,0 +1,382 @@
+import inspect
+import os
+import threading
+import time
+
+# /// Request Metrics /// #
+    # Records the latency of every request by route, and how many Firestore
+    # reads, writes and deletes each route costs, and renders them in the
+    # Prometheus text format for GET /metrics.
+    #
+    # Firestore usage is counted by instrument(), which wraps the client the
+    # routes hand to the service utils (see get_db in app.py) and counts
+    # operations the way Firestore bills them: a read per document returned
+    # (a query that returns nothing still costs one), a write per set, update
+    # or create and a delete per delete, including those in batches and
+    # transactions.
+    #
+    # Each worker process keeps its own numbers, labelled with its pid, so
+    # a scrape only sees the worker that answered it; sum over the worker
+    # label to get totals.
+
+# Upper bounds of the request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FIRESTORE_OPERATIONS = ('reads', 'writes', 'deletes')
+
+
+class RequestMetrics:
+    """
+    Firestore usage of one request. Thread-safe, since some routes fan
+    their Firestore calls out to a thread pool.
+    """
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.deletes = 0
+        self.calls = 0
+        self.firestore_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds=0.0, reads=0, writes=0, deletes=0, calls=1):
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+            self.deletes += deletes
+            self.calls += calls
+            self.firestore_seconds += seconds
+
+    def server_timing(self, total_seconds):
+        """
+        Formats the request as a Server-Timing header value, e.g.
+        firestore;dur=12.5;desc="3 calls: 52 reads, 1 writes, 0 deletes", total;dur=15.1
+        """
+        return (f'firestore;dur={self.firestore_seconds * 1000:.1f};'
+                f'desc="{self.calls} calls: {self.reads} reads, {self.writes} writes, {self.deletes} deletes", '
+                f'total;dur={total_seconds * 1000:.1f}')
+
+
+class Metrics:
+    """
+    Thread-safe per-process registry of request counts, latency histograms
+    and Firestore usage, keyed by route and method.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._requests = {}     # (route, method, status) -> count
+        self._latency = {}      # (route, method) -> [bucket counts..., sum, count]
+        self._firestore = {}    # (route, method) -> [reads, writes, deletes, seconds]
+        self._lock = threading.Lock()
+
+    def observe(self, route, method, status, seconds, request_metrics=None):
+        """
+        Records one finished request.
+
+        Args:
+            route (str): The matched URL rule, e.g. '/get-house-<house_id>'.
+            method (str): The HTTP method.
+            status (int): The response status code.
+            seconds (float): How long the request took.
+            request_metrics (RequestMetrics): The request's Firestore usage.
+        """
+        with self._lock:
+            key = (route, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+            latency = self._latency.get((route, method))
+            if latency is None:
+                latency = self._latency[(route, method)] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    latency[i] += 1
+            latency[-2] += seconds
+            latency[-1] += 1
+
+            if request_metrics is not None:
+                usage = self._firestore.get((route, method))
+                if usage is None:
+                    usage = self._firestore[(route, method)] = [0, 0, 0, 0.0]
+                usage[0] += request_metrics.reads
+                usage[1] += request_metrics.writes
+                usage[2] += request_metrics.deletes
+                usage[3] += request_metrics.firestore_seconds
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        worker = str(os.getpid())
+        lines = []
+        with self._lock:
+            lines += ['# HELP divvy_http_requests_total Requests handled, by route, method and status.',
+                      '# TYPE divvy_http_requests_total counter']
+            for (route, method, status), count in sorted(self._requests.items()):
+                lines.append(f'divvy_http_requests_total{_labels(worker, route, method, status=status)} {count}')
+
+            lines += ['# HELP divvy_http_request_duration_seconds Request latency, by route and method.',
+                      '# TYPE divvy_http_request_duration_seconds histogram']
+            for (route, method), latency in sorted(self._latency.items()):
+                for bound, count in zip(self.buckets, latency):
+                    lines.append(f'divvy_http_request_duration_seconds_bucket'
+                                 f'{_labels(worker, route, method, le=repr(bound))} {count}')
+                lines.append(f'divvy_http_request_duration_seconds_bucket'
+                             f'{_labels(worker, route, method, le="+Inf")} {latency[-1]}')
+                lines.append(f'divvy_http_request_duration_seconds_sum{_labels(worker, route, method)} {latency[-2]}')
+                lines.append(f'divvy_http_request_duration_seconds_count{_labels(worker, route, method)} {latency[-1]}')
+
+            lines += ['# HELP divvy_firestore_operations_total Billed Firestore operations, by route, method and operation.',
+                      '# TYPE divvy_firestore_operations_total counter']
+            for (route, method), usage in sorted(self._firestore.items()):
+                for operation, count in zip(FIRESTORE_OPERATIONS, usage):
+                    lines.append(f'divvy_firestore_operations_total'
+                                 f'{_labels(worker, route, method, operation=operation)} {count}')
+
+            lines += ['# HELP divvy_firestore_seconds_total Time spent waiting on Firestore, by route and method.',
+                      '# TYPE divvy_firestore_seconds_total counter']
+            for (route, method), usage in sorted(self._firestore.items()):
+                lines.append(f'divvy_firestore_seconds_total{_labels(worker, route, method)} {usage[3]}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._requests.clear()
+            self._latency.clear()
+            self._firestore.clear()
+
+
+def _labels(worker, route, method, **extra):
+    labels = dict(worker=worker, route=route, method=method, **extra)
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# /// Firestore Instrumentation /// #
+    # Thin proxies around the client and the references, queries, batches
+    # and transactions it hands out. Every call is passed straight through;
+    # the calls that reach Firestore are timed and counted into the
+    # request's RequestMetrics. Works with firestore.Client, AsyncClient
+    # and the FakeFirestore used by the tests and benchmarks.
+
+def instrument(db, request_metrics):
+    """
+    Wraps a Firestore client so its usage is counted into request_metrics.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        request_metrics (RequestMetrics): The current request's metrics.
+
+    Returns:
+        A client that behaves like db.
+    """
+    return _InstrumentedClient(db, request_metrics)
+
+
+class _Instrumented:
+    # method name -> function of the result returning what the call cost,
+    # or the name of the counter the call adds one to
+    OPERATIONS = {}
+
+    __slots__ = ('_target', '_metrics')
+
+    def __init__(self, target, metrics):
+        self._target = target
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return _wrap(attr, self._metrics)
+        operation = self.OPERATIONS.get(name)
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            result = attr(*[_unwrap(arg) for arg in args], **{key: _unwrap(value) for key, value in kwargs.items()})
+            if result is self._target:
+                return self
+            if operation is None:
+                return _wrap(result, self._metrics)
+            return self._record(operation, result, start)
+        return call
+
+    def __repr__(self):
+        return f'instrumented {self._target!r}'
+
+    def _record(self, operation, result, start):
+        if isinstance(operation, str):
+            return _track(result, self._metrics, start, lambda value: {operation: 1})
+        return _track(result, self._metrics, start, operation)
+
+
+def _reads(value):
+    # value is a streamed document count, a list of documents or a single
+    # result. A query is billed one read even if it returns nothing.
+    if isinstance(value, list):
+        value = len(value)
+    elif not isinstance(value, int):
+        value = 1
+    return {'reads': max(1, value)}
+
+
+class _InstrumentedDocument(_Instrumented):
+    __slots__ = ()
+    OPERATIONS = {
+        'get': _reads,
+        'set': 'writes',
+        'update': 'writes',
+        'create': 'writes',
+        'delete': 'deletes',
+        'collections': _reads,
+    }
+
+
+class _InstrumentedQuery(_Instrumented):
+    __slots__ = ()
+    OPERATIONS = {
+        'get': _reads,
+        'stream': _reads,
+        'list_documents': _reads,
+        'add': 'writes',
+    }
+
+
+class _InstrumentedAggregation(_Instrumented):
+    __slots__ = ()
+    OPERATIONS = {'get': _reads}
+
+
+class _InstrumentedClient(_Instrumented):
+    __slots__ = ()
+    OPERATIONS = {
+        'get_all': _reads,
+        'collections': _reads,
+    }
+
+
+class _InstrumentedWrites(_Instrumented):
+    """
+    Batch or transaction: writes are counted when they are committed.
+    """
+    __slots__ = ('_pending',)
+    COMMIT = 'commit'
+
+    def __init__(self, target, metrics):
+        super().__init__(target, metrics)
+        self._pending = {'writes': 0, 'deletes': 0}
+
+    def __getattr__(self, name):
+        if name in ('set', 'update', 'create', 'delete'):
+            self._pending['deletes' if name == 'delete' else 'writes'] += 1
+        elif name == '_clean_up':
+            self._pending = {'writes': 0, 'deletes': 0}
+        elif name == self.COMMIT:
+            pending, self._pending = self._pending, {'writes': 0, 'deletes': 0}
+            commit = getattr(self._target, name)
+
+            def call(*args, **kwargs):
+                start = time.perf_counter()
+                return _track(commit(*args, **kwargs), self._metrics, start, lambda result: pending)
+            return call
+        return super().__getattr__(name)
+
+
+class _InstrumentedBatch(_InstrumentedWrites):
+    __slots__ = ()
+
+
+class _InstrumentedTransaction(_InstrumentedWrites):
+    __slots__ = ()
+    # called by @firestore.transactional, once per attempt
+    COMMIT = '_commit'
+    OPERATIONS = {'get': _reads, 'get_all': _reads}
+
+
+# Checked in order against the type's name, so the wrappers work with the
+# sync and async clients and with FakeFirestore alike
+_WRAPPERS = [
+    ('AggregationQuery', _InstrumentedAggregation),
+    ('DocumentReference', _InstrumentedDocument),
+    ('CollectionReference', _InstrumentedQuery),
+    ('CollectionGroup', _InstrumentedQuery),
+    ('Query', _InstrumentedQuery),
+    ('WriteBatch', _InstrumentedBatch),
+    ('Transaction', _InstrumentedTransaction),
+]
+
+
+def _wrap(value, metrics):
+    name = type(value).__name__
+    for suffix, wrapper in _WRAPPERS:
+        if name.endswith(suffix):
+            return wrapper(value, metrics)
+    return value
+
+
+def _unwrap(value):
+    if isinstance(value, _Instrumented):
+        return value._target
+    if isinstance(value, (list, tuple)) and any(isinstance(item, _Instrumented) for item in value):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+def _track(result, metrics, start, cost):
+    """
+    Counts what a call cost once it has finished: immediately, once an
+    awaitable has been awaited, or once a (async) stream is exhausted,
+    in which case cost is given the number of documents streamed.
+    """
+    if inspect.isawaitable(result):
+        async def wait():
+            value = await result
+            metrics.add(time.perf_counter() - start, **cost(value))
+            return value
+        return wait()
+    if hasattr(result, '__anext__'):
+        return _track_async_stream(result, metrics, start, cost)
+    if hasattr(result, '__next__'):
+        return _track_stream(result, metrics, start, cost)
+    metrics.add(time.perf_counter() - start, **cost(result))
+    return result
+
+
+def _track_stream(stream, metrics, start, cost):
+    # only the time spent waiting on the stream is counted, not the
+    # caller's work between documents
+    seconds = time.perf_counter() - start
+    count = 0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(stream)
+            except StopIteration:
+                break
+            finally:
+                seconds += time.perf_counter() - start
+            count += 1
+            yield item
+    finally:
+        metrics.add(seconds, **cost(count))
+
+
+async def _track_async_stream(stream, metrics, start, cost):
+    seconds = time.perf_counter() - start
+    count = 0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = await stream.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                seconds += time.perf_counter() - start
+            count += 1
+            yield item
+    finally:
+        metrics.add(seconds, **cost(count))
@@ -0,0 +1,102 @@
+import argparse
+
+from utils.utils import DATE_FIELDS, MAX_BATCH_WRITES, normalize_dates
+from houseService.house_utils import HOUSE_SUBCOLLECTIONS
+
+# /// Date Backfill Tool /// #
+    # Converts date fields that were stored as HTTP date strings
+    # (e.g. "Fri, 04 Jul 2025 18:59:59 GMT") into native Firestore
+    # timestamps, so date-window queries can be served by an index.
+    # Safe to re-run: documents that are already converted are skipped.
+    #
+    # Usage (from ./src):
+    #     python -m utils.migrate_dates [--dry-run] [house_id ...]
+
+
+def migrate_documents(db, docs, dry_run=False):
+    """
+    Converts the date fields of the given documents, committing up to
+    MAX_BATCH_WRITES updates per batch.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        docs: An iterable of document snapshots.
+        dry_run (bool): If True, only count the documents that need converting.
+
+    Returns:
+        int: The number of documents converted (or that would be converted).
+    """
+    migrated = 0
+    batch = db.batch()
+    pending = 0
+    for doc in docs:
+        data = doc.to_dict() or {}
+        normalized = normalize_dates(data)
+        updates = {field: normalized[field] for field in DATE_FIELDS
+                   if field in data and normalized[field] is not data[field]}
+        if not updates:
+            continue
+        migrated += 1
+        if dry_run:
+            continue
+        batch.update(doc.reference, updates)
+        pending += 1
+        if pending == MAX_BATCH_WRITES:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    return migrated
+
+
+def migrate_house_dates(db, house_id, dry_run=False):
+    """
+    Converts the date fields of a house and every document in its subcollections.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_id (str): The ID of the house to migrate.
+        dry_run (bool): If True, only count the documents that need converting.
+
+    Returns:
+        dict: {'house': int, <subcollection>: int, ...} documents converted per collection.
+    """
+    house_ref = db.collection('houses').document(house_id)
+    house = house_ref.get()
+    results = {'house': migrate_documents(db, [house] if house.exists else [], dry_run)}
+    for name in HOUSE_SUBCOLLECTIONS:
+        results[name] = migrate_documents(db, house_ref.collection(name).stream(), dry_run)
+    return results
+
+
+def migrate_all_dates(db, house_ids=None, dry_run=False):
+    """
+    Converts the date fields of the given houses, or of every house.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_ids (list): The houses to migrate. Defaults to every house.
+        dry_run (bool): If True, only count the documents that need converting.
+
+    Returns:
+        dict: {<house_id>: <migrate_house_dates result>}
+    """
+    if not house_ids:
+        house_ids = [doc.id for doc in db.collection('houses').select([]).stream()]
+    results = {}
+    for house_id in house_ids:
+        results[house_id] = migrate_house_dates(db, house_id, dry_run)
+        print(f"{'Would convert' if dry_run else 'Converted'} {house_id}: {results[house_id]}")
+    return results
+
+
+if __name__ == '__main__':
+    from utils.firebase_utils import get_firestore_db
+
+    parser = argparse.ArgumentParser(description='Convert stored date strings into Firestore timestamps.')
+    parser.add_argument('house_ids', nargs='*', help='houses to migrate (default: all houses)')
+    parser.add_argument('--dry-run', action='store_true', help='only report what would be converted')
+    args = parser.parse_args()
+
+    migrate_all_dates(get_firestore_db(), args.house_ids, args.dry_run)
@@ -0,0 +1,45 @@
+import argparse
+
+from choreService.chore_utils import build_chore_stats
+
+# /// Completion Counters Recompute Tool /// #
+    # Recounts the chore completion counters (houses/{house_id}/stats/chores,
+    # see chore_utils.STATS) of every house from its chore instances. Run it
+    # once to backfill the counters of existing houses, or again to correct
+    # them, e.g. after members change subgroups (completions are counted
+    # towards the subgroups their assignee was in at the time).
+    #
+    # Usage (from ./src):
+    #     python -m utils.recompute_stats [house_id ...]
+
+
+def recompute_all_stats(db, house_ids=None):
+    """
+    Recounts the completion counters of the given houses, or of every house.
+    Each house is recounted in one transaction.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        house_ids (list): The houses to recount. Defaults to every house.
+
+    Returns:
+        dict: {<house_id>: <completion counters document>}
+    """
+    if not house_ids:
+        house_ids = [doc.id for doc in db.collection('houses').select([]).stream()]
+    results = {}
+    for house_id in house_ids:
+        results[house_id] = build_chore_stats(db, house_id, rebuild=True)
+        print(f"Recounted {house_id}: {len(results[house_id]['members'])} members, "
+              f"{len(results[house_id]['subgroups'])} subgroups")
+    return results
+
+
+if __name__ == '__main__':
+    from utils.firebase_utils import get_firestore_db
+
+    parser = argparse.ArgumentParser(description='Recount the chore completion counters of houses.')
+    parser.add_argument('house_ids', nargs='*', help='houses to recount (default: all houses)')
+    args = parser.parse_args()
+
+    recompute_all_stats(get_firestore_db(), args.house_ids)
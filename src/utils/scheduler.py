@@ -0,0 +1,286 @@
+import argparse
+import datetime
+import os
+import random
+import socket
+import threading
+import uuid
+
+from choreService.chore_utils import roll_over_chores, mark_overdue_instances
+from houseService.house_utils import bump_house_versions
+from utils.utils import lazy_import
+
+firestore = lazy_import('firebase_admin.firestore')
+
+# /// Background Scheduler /// #
+    # House upkeep that used to wait for a client to call in, run for every
+    # house:
+    #     - every SCHEDULER_ROLLOVER_SECONDS (a day), rolls each recurring
+    #       chore's instances forward to DEFAULT_HORIZON_DAYS ahead
+    #       (chore_utils.roll_over_chores). That reads every chore's window
+    #       of instances, and the window only gains a day a day.
+    #     - every SCHEDULER_INTERVAL_SECONDS, marks chore instances that
+    #       fell due without being done as overdue
+    #       (chore_utils.mark_overdue_instances)
+    #
+    # Houses are split into SCHEDULER_SHARDS shards by house ID range, and a
+    # process only works on a shard while it holds the shard's lease, a
+    # document in the schedulerLeases collection. Any number of processes
+    # can run the scheduler: each pass, a process tries the shards in random
+    # order and takes those that nobody holds and that haven't been run in
+    # the last interval. A lease held by a process that died expires after
+    # SCHEDULER_LEASE_SECONDS. Both jobs are idempotent, so the rare overlap
+    # (e.g. a pass that outlives its lease) only costs reads.
+    #
+    # Run it in every server worker with SCHEDULER_ENABLED=true (started in
+    # gunicorn.conf.py's post_fork), or as a sidecar (from ./src):
+    #     python -m utils.scheduler           # run until stopped
+    #     python -m utils.scheduler --once    # one pass over every shard
+
+SCHEDULER_LEASES = 'schedulerLeases'
+
+DEFAULT_SHARDS = 16
+DEFAULT_INTERVAL_SECONDS = 300
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_ROLLOVER_SECONDS = 24 * 60 * 60
+
+
+def shard_range(shard, shards):
+    """
+    Returns the house IDs in a shard as a [start, end) range of document
+    IDs, splitting on the first two hex digits (house IDs are UUIDs). The
+    first and last shards are open-ended, so every ID is in a shard.
+
+    Args:
+        shard (int): The shard, from 0 to shards - 1.
+        shards (int): The number of shards, at most 256.
+
+    Returns:
+        tuple: (<start ID, or None>, <end ID, or None>)
+    """
+    bounds = [None] + [format(i * 256 // shards, '02x') for i in range(1, shards)] + [None]
+    return bounds[shard], bounds[shard + 1]
+
+
+def houses_in_shard(db, shard, shards):
+    """
+    Returns the IDs of the houses in a shard.
+    """
+    HOUSES = db.collection('houses')
+    start, end = shard_range(shard, shards)
+    query = HOUSES
+    if start is not None:
+        query = query.where(filter=firestore.FieldFilter('__name__', '>=', HOUSES.document(start)))
+    if end is not None:
+        query = query.where(filter=firestore.FieldFilter('__name__', '<', HOUSES.document(end)))
+    return [doc.id for doc in query.select([]).stream()]
+
+
+def claim_shard(db, shard, shards, owner, interval_seconds, lease_seconds, now=None, renew=False):
+    """
+    Takes (or, with renew=True, extends) the lease on a shard for
+    lease_seconds, unless another process holds it or, when taking it,
+    it was run less than interval_seconds ago.
+
+    Args:
+        db (firestore.Client): The Firestore client.
+        shard (int): The shard.
+        shards (int): The number of shards.
+        owner (str): The ID of the process taking the lease.
+        interval_seconds (float): How often each shard is run.
+        lease_seconds (float): How long the lease lasts.
+        now (datetime.datetime): Defaults to the current time.
+        renew (bool): Extend a lease owner already holds.
+
+    Returns:
+        bool: Whether owner now holds the lease.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    lease_ref = db.collection(SCHEDULER_LEASES).document(f'{shard}-of-{shards}')
+
+    @firestore.transactional
+    def claim(transaction):
+        lease = lease_ref.get(transaction=transaction)
+        data = lease.to_dict() if lease.exists else {}
+        held = data.get('expiresAt') is not None and data['expiresAt'] > now
+        if held and data.get('owner') != owner:
+            return False
+        if renew and not held:
+            return False
+        if not renew and data.get('ranAt') is not None \
+                and data['ranAt'] > now - datetime.timedelta(seconds=interval_seconds):
+            return False
+        transaction.set(lease_ref, dict(data, owner=owner, expiresAt=now + datetime.timedelta(seconds=lease_seconds)))
+        return True
+    return claim(db.transaction())
+
+
+def shard_rolled_at(db, shard, shards):
+    """
+    Returns when a shard's chores were last rolled over, or None.
+    """
+    lease = db.collection(SCHEDULER_LEASES).document(f'{shard}-of-{shards}').get()
+    return lease.to_dict().get('rolledAt') if lease.exists else None
+
+
+def release_shard(db, shard, shards, owner, now=None, rolled=False):
+    """
+    Records that owner has run a shard (and, with rolled=True, rolled its
+    chores over) and gives up its lease, if owner still holds it.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    lease_ref = db.collection(SCHEDULER_LEASES).document(f'{shard}-of-{shards}')
+
+    @firestore.transactional
+    def release(transaction):
+        lease = lease_ref.get(transaction=transaction)
+        if lease.exists and lease.to_dict().get('owner') == owner:
+            data = {'owner': owner, 'expiresAt': now, 'ranAt': now}
+            rolled_at = now if rolled else lease.to_dict().get('rolledAt')
+            if rolled_at is not None:
+                data['rolledAt'] = rolled_at
+            transaction.set(lease_ref, data)
+    release(db.transaction())
+
+
+def run_house(db, house_id, now=None, roll_over=True):
+    """
+    Rolls a house's chores forward (unless roll_over is False) and marks
+    its overdue chore instances.
+
+    Returns:
+        dict: {'instancesCreated': int, 'instancesOverdue': int}
+    """
+    created = roll_over_chores(db, house_id, now=now) if roll_over else 0
+    overdue = mark_overdue_instances(db, house_id, now=now)
+    if created or overdue:
+        # changes the ETags of the house's chore instance reads
+        bump_house_versions(db, house_id, ['choreInstances'])
+    return {'instancesCreated': created, 'instancesOverdue': overdue}
+
+
+class Scheduler:
+    """
+    Runs the scheduled jobs on the shards this process can lease, once per
+    pass, on a background thread or one pass at a time (run_once).
+    """
+
+    def __init__(self, get_db, shards=DEFAULT_SHARDS, interval_seconds=DEFAULT_INTERVAL_SECONDS,
+                 lease_seconds=DEFAULT_LEASE_SECONDS, owner=None, rollover_seconds=DEFAULT_ROLLOVER_SECONDS):
+        self.get_db = get_db
+        self.shards = shards
+        self.interval_seconds = interval_seconds
+        self.lease_seconds = lease_seconds
+        self.rollover_seconds = rollover_seconds
+        self.owner = owner or f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self, now=None):
+        """
+        Runs every shard that this process can lease.
+
+        Returns:
+            dict: {'shards': int, 'houses': int, 'instancesCreated': int, 'instancesOverdue': int}
+        """
+        db = self.get_db()
+        totals = {'shards': 0, 'houses': 0, 'instancesCreated': 0, 'instancesOverdue': 0}
+        for shard in random.sample(range(self.shards), self.shards):
+            if self._stop.is_set():
+                break
+            if not claim_shard(db, shard, self.shards, self.owner, self.interval_seconds, self.lease_seconds, now):
+                continue
+            claimed_at = datetime.datetime.now(datetime.timezone.utc)
+            try:
+                rolled_at = shard_rolled_at(db, shard, self.shards)
+                roll_over = rolled_at is None or rolled_at <= (now or claimed_at) - datetime.timedelta(
+                    seconds=self.rollover_seconds)
+                failed = False
+                for house_id in houses_in_shard(db, shard, self.shards):
+                    # renew the lease before half of it has run out
+                    if datetime.datetime.now(datetime.timezone.utc) - claimed_at > datetime.timedelta(
+                            seconds=self.lease_seconds / 2):
+                        if not claim_shard(db, shard, self.shards, self.owner, self.interval_seconds,
+                                           self.lease_seconds, renew=True):
+                            print(f"Scheduler lost the lease on shard {shard}")
+                            break
+                        claimed_at = datetime.datetime.now(datetime.timezone.utc)
+                    try:
+                        result = run_house(db, house_id, now, roll_over)
+                    except Exception as e:
+                        print(f"Error running scheduled jobs for house {house_id}: {e}")
+                        failed = True
+                        continue
+                    totals['houses'] += 1
+                    totals['instancesCreated'] += result['instancesCreated']
+                    totals['instancesOverdue'] += result['instancesOverdue']
+                # a shard with a house that failed is rolled over again next pass
+                release_shard(db, shard, self.shards, self.owner, now, rolled=roll_over and not failed)
+                totals['shards'] += 1
+            except Exception as e:
+                print(f"Error running scheduled jobs for shard {shard}: {e}")
+        return totals
+
+    def start(self):
+        """
+        Starts running a pass every interval_seconds on a daemon thread.
+        """
+        if self._thread is not None:
+            return
+
+        def run():
+            # stagger processes started together
+            self._stop.wait(random.uniform(0, min(self.interval_seconds, 30)))
+            while not self._stop.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"Error running scheduled jobs: {e}")
+                self._stop.wait(self.interval_seconds)
+        self._thread = threading.Thread(target=run, name='scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def create_scheduler(get_db, enabled=None):
+    """
+    Creates the scheduler if SCHEDULER_ENABLED is set (or enabled is True),
+    configured by SCHEDULER_SHARDS, SCHEDULER_INTERVAL_SECONDS,
+    SCHEDULER_LEASE_SECONDS and SCHEDULER_ROLLOVER_SECONDS. Every process
+    running it must use the same SCHEDULER_SHARDS.
+
+    Args:
+        get_db (callable): Returns the Firestore client to use.
+        enabled (bool): Overrides SCHEDULER_ENABLED.
+
+    Returns:
+        Scheduler: The scheduler, or None if it is disabled.
+    """
+    if enabled is None:
+        enabled = os.getenv('SCHEDULER_ENABLED', '').lower() == 'true'
+    if not enabled:
+        return None
+    return Scheduler(
+        get_db,
+        shards=int(os.getenv('SCHEDULER_SHARDS', DEFAULT_SHARDS)),
+        interval_seconds=float(os.getenv('SCHEDULER_INTERVAL_SECONDS', DEFAULT_INTERVAL_SECONDS)),
+        lease_seconds=float(os.getenv('SCHEDULER_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)),
+        rollover_seconds=float(os.getenv('SCHEDULER_ROLLOVER_SECONDS', DEFAULT_ROLLOVER_SECONDS))
+    )
+
+
+if __name__ == '__main__':
+    from utils.firebase_utils import get_firestore_db
+
+    parser = argparse.ArgumentParser(description='Roll chores forward and mark overdue chore instances.')
+    parser.add_argument('--once', action='store_true', help='run one pass over every shard and exit')
+    args = parser.parse_args()
+
+    scheduler = create_scheduler(get_firestore_db, enabled=True)
+    if args.once:
+        print(scheduler.run_once())
+    else:
+        scheduler.start()
+        scheduler._thread.join()
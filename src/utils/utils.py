@@ -0,0 +1,209 @@
+import datetime
+import importlib
+import types
+from email.utils import parsedate_to_datetime
+
+# /// General Utility Functions /// #
+    # Shared by the service utility modules
+
+# Firestore rejects write batches with more than 500 operations
+MAX_BATCH_WRITES = 500
+
+# Dates are exchanged with the frontend as HTTP dates,
+# e.g. "Fri, 04 Jul 2025 18:59:59 GMT"
+HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+# Fields stored as native Firestore timestamps. HTTP date strings sort by
+# weekday name rather than by time, so they can't be range-queried.
+# Flask serializes datetimes back to HTTP dates, so the frontend sees no change.
+DATE_FIELDS = ['dueDate', 'startDate', 'dateCreated', 'dateJoined']
+
+
+def parse_date(value):
+    """
+    Parses a date sent by the frontend into a timezone-aware UTC datetime.
+
+    Args:
+        value: An HTTP date string, an ISO-8601 string, or a datetime.
+
+    Returns:
+        datetime.datetime: The parsed date in UTC, or None if it can't be parsed.
+    """
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            try:
+                parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return None
+    else:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
+
+def format_date(value):
+    """
+    Formats a datetime as an HTTP date string, the format the frontend uses.
+
+    Args:
+        value (datetime.datetime): The date to format.
+
+    Returns:
+        str: e.g. "Fri, 04 Jul 2025 18:59:59 GMT"
+    """
+    return value.astimezone(datetime.timezone.utc).strftime(HTTP_DATE_FORMAT)
+
+
+def normalize_dates(data, fields=DATE_FIELDS):
+    """
+    Converts the date fields of a document into timezone-aware datetimes,
+    which Firestore stores as native timestamps. Values that aren't date
+    strings (e.g. firestore.SERVER_TIMESTAMP) are left untouched.
+
+    Args:
+        data (dict): The document to be written.
+        fields (list): The names of the date fields.
+
+    Returns:
+        dict: A copy of data with its date fields converted.
+    """
+    normalized = dict(data)
+    for field in fields:
+        value = normalized.get(field)
+        if isinstance(value, str):
+            parsed = parse_date(value)
+            if parsed is not None:
+                normalized[field] = parsed
+    return normalized
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is only imported on first attribute access,
+    see lazy_import.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name):
+    """
+    Defers importing a module until it is first used. Importing
+    google.cloud.firestore (and firebase_admin, which pulls it in) takes
+    most of the app's startup time, and many processes (tests, tools, a
+    worker answering health checks) never need it.
+
+    Args:
+        name (str): The module's full name, e.g. 'firebase_admin.firestore'.
+
+    Returns:
+        LazyModule: A stand-in that forwards attribute access to the module.
+    """
+    return LazyModule(name)
+
+
+firestore = lazy_import('firebase_admin.firestore')
+
+# Every write to a house's subcollections stamps the document's updatedAt
+# with the commit time, and every delete leaves a tombstone in the house's
+# tombstones collection, so /sync-<house_id> can return just the documents
+# changed or deleted since a client last synced (see house_utils.get_house_changes).
+UPDATED_AT = 'updatedAt'
+TOMBSTONES = 'tombstones'
+
+# Tombstones carry an expireAt this long after the delete, for a Firestore
+# TTL policy on the tombstones collection group. Clients that haven't
+# synced for longer get a full sync instead.
+TOMBSTONE_TTL_DAYS = 30
+
+
+def stamp_updated(data):
+    """
+    Returns a copy of a document to be written, with its updatedAt set to
+    the time the write is committed.
+
+    Args:
+        data (dict): The document to be written.
+
+    Returns:
+        dict: A copy of data with updatedAt set to firestore.SERVER_TIMESTAMP.
+    """
+    return dict(data, **{UPDATED_AT: firestore.SERVER_TIMESTAMP})
+
+
+def tombstone(house_ref, name, doc_id):
+    """
+    Returns the tombstone to write, in the same batch or transaction, when
+    deleting a document from one of a house's subcollections.
+
+    Args:
+        house_ref (firestore.DocumentReference): The house.
+        name (str): The subcollection, e.g. 'chores'.
+        doc_id (str): The ID of the deleted document.
+
+    Returns:
+        tuple: (tombstone document reference, tombstone data)
+    """
+    expire_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=TOMBSTONE_TTL_DAYS)
+    return (house_ref.collection(TOMBSTONES).document(f"{name}_{doc_id}"),
+            {'collection': name, 'id': doc_id, UPDATED_AT: firestore.SERVER_TIMESTAMP, 'expireAt': expire_at})
+
+
+# Types of the fields that partial updates (the PATCH /update-* routes) may
+# set, per collection ('house' for the house document itself). 'date' is a
+# date string or datetime (see parse_date). Any field may be set to None to
+# clear it, and fields not listed here are written as they are.
+FIELD_TYPES = {
+    'house': {'name': str, 'members': list, 'imageID': str, 'joinCode': str, 'dateCreated': 'date'},
+    'users': {'name': str, 'email': str, 'houseID': str},
+    'members': {'name': str, 'email': str, 'chores': list, 'subgroups': list, 'onTimePct': (str, int, float),
+                'profilePicture': str, 'dateJoined': 'date'},
+    'chores': {'name': str, 'description': str, 'emoji': str, 'assignees': list, 'frequencyPattern': str,
+               'frequencyDays': list, 'startDate': 'date'},
+    'choreInstances': {'choreID': str, 'assignee': str, 'dueDate': 'date', 'isDone': bool, 'doneOnTime': bool,
+                       'overdue': bool, 'swapID': str},
+    'subgroups': {'name': str, 'members': list},
+    'swaps': {'choreID': str, 'choreInstID': str, 'from': str, 'to': str, 'status': str, 'offered': str},
+}
+
+
+def validate_fields(name, fields):
+    """
+    Checks the fields of a partial update against FIELD_TYPES. Field names
+    can't contain '.', since the fields are merged into the document as
+    they are rather than as nested field paths.
+
+    Args:
+        name (str): The collection, e.g. 'choreInstances', or 'house'.
+        fields (dict): The fields to change.
+
+    Returns:
+        list(str): What is wrong with the fields, empty if nothing is.
+    """
+    errors = []
+    types_ = FIELD_TYPES.get(name, {})
+    for field, value in fields.items():
+        if '.' in field or field == UPDATED_AT:
+            errors.append(f"{field} can't be updated")
+        elif value is None or field not in types_:
+            continue
+        elif types_[field] == 'date':
+            if parse_date(value) is None:
+                errors.append(f"{field} must be a date")
+        # bool is an int, so it isn't a number here
+        elif not isinstance(value, types_[field]) or (isinstance(value, bool) and types_[field] is not bool):
+            expected = types_[field] if isinstance(types_[field], tuple) else (types_[field],)
+            errors.append(f"{field} must be {' or '.join(t.__name__ for t in expected)}")
+    return errors
@@ -0,0 +1,726 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta, timezone
+from firebase_admin import firestore
+import sys
+import os
+
+# Bad practice but tests won't work without it because Python Modules
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from utils.utils import parse_date, format_date, normalize_dates, lazy_import
+from utils.migrate_dates import migrate_documents
+from utils.cache import TTLCache, RedisCache
+from utils.house_mirror import HouseMirror
+from utils.fake_firestore import FakeFirestore
+from utils.metrics import Metrics, RequestMetrics, instrument
+from utils.write_buffer import WriteBuffer
+from utils.scheduler import Scheduler, shard_range, houses_in_shard, claim_shard, release_shard
+from utils.encoding import OrjsonProvider, compact, compact_json, compress, compress_stream
+from google.api_core import exceptions
+import threading
+import asyncio
+import gzip
+import zlib
+import json
+
+
+class TestUtils(unittest.TestCase):
+    """
+    Unit tests for the general utility functions and tools in utils.
+    """
+
+    def test_parse_date_formats(self):
+        expected = datetime(2025, 7, 4, 18, 59, 59, tzinfo=timezone.utc)
+        self.assertEqual(parse_date('Fri, 04 Jul 2025 18:59:59 GMT'), expected)
+        self.assertEqual(parse_date('2025-07-04T18:59:59Z'), expected)
+        self.assertEqual(parse_date('2025-07-04T11:59:59-07:00'), expected)
+        self.assertEqual(parse_date(expected), expected)
+        self.assertIsNone(parse_date('not a date'))
+        self.assertIsNone(parse_date(None))
+
+    def test_format_date(self):
+        self.assertEqual(format_date(datetime(2025, 7, 4, 18, 59, 59, tzinfo=timezone.utc)),
+                         'Fri, 04 Jul 2025 18:59:59 GMT')
+
+    def test_normalize_dates(self):
+        data = {
+            'id': 'h1',
+            'dateCreated': 'Tue, 20 May 2025 22:43:40 GMT',
+            'dateJoined': firestore.SERVER_TIMESTAMP,
+            'name': 'Fri, 04 Jul 2025 18:59:59 GMT'
+        }
+        result = normalize_dates(data)
+        self.assertEqual(result['dateCreated'], datetime(2025, 5, 20, 22, 43, 40, tzinfo=timezone.utc))
+        self.assertIs(result['dateJoined'], firestore.SERVER_TIMESTAMP)
+        # only date fields are converted
+        self.assertEqual(result['name'], 'Fri, 04 Jul 2025 18:59:59 GMT')
+        self.assertEqual(data['dateCreated'], 'Tue, 20 May 2025 22:43:40 GMT')
+
+    def test_migrate_documents(self):
+        mock_db = MagicMock()
+        mock_batch = MagicMock()
+        mock_db.batch.return_value = mock_batch
+        legacy = MagicMock()
+        legacy.to_dict.return_value = {'id': 'i1', 'dueDate': 'Fri, 04 Jul 2025 18:59:59 GMT'}
+        migrated = MagicMock()
+        migrated.to_dict.return_value = {'id': 'i2', 'dueDate': datetime(2025, 7, 4, tzinfo=timezone.utc)}
+
+        count = migrate_documents(mock_db, [legacy, migrated])
+
+        self.assertEqual(count, 1)
+        mock_batch.update.assert_called_once_with(
+            legacy.reference, {'dueDate': datetime(2025, 7, 4, 18, 59, 59, tzinfo=timezone.utc)})
+        mock_batch.commit.assert_called_once()
+
+    def test_migrate_documents_dry_run(self):
+        mock_db = MagicMock()
+        legacy = MagicMock()
+        legacy.to_dict.return_value = {'id': 'i1', 'startDate': 'Thu, 01 May 2025 07:00:00 GMT'}
+
+        count = migrate_documents(mock_db, [legacy], dry_run=True)
+
+        self.assertEqual(count, 1)
+        mock_db.batch.return_value.update.assert_not_called()
+        mock_db.batch.return_value.commit.assert_not_called()
+
+    def test_cache_hits_and_misses(self):
+        cache = TTLCache(max_entries=2, ttl=30)
+        self.assertIsNone(cache.get(('houses', 'h1', 'chores')))
+        cache.set(('houses', 'h1', 'chores'), {'c1': {}})
+        self.assertEqual(cache.get(('houses', 'h1', 'chores')), {'c1': {}})
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = TTLCache(max_entries=2, ttl=30)
+        cache.set('a', {})
+        cache.set('b', {})
+        cache.get('a')
+        cache.set('c', {})
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {})
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_cache_expires_entries(self):
+        cache = TTLCache(ttl=30)
+        with patch('utils.cache.time.monotonic', return_value=100):
+            cache.set('a', {})
+        with patch('utils.cache.time.monotonic', return_value=129):
+            self.assertEqual(cache.get('a'), {})
+        with patch('utils.cache.time.monotonic', return_value=131):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_cache_delete_and_disable(self):
+        cache = TTLCache(ttl=30)
+        cache.set('a', {})
+        cache.delete('a', 'missing')
+        self.assertIsNone(cache.get('a'))
+        disabled = TTLCache(ttl=0)
+        disabled.set('a', {})
+        self.assertIsNone(disabled.get('a'))
+
+    def test_redis_cache(self):
+        store = {}
+        client = MagicMock()
+        client.get.side_effect = store.get
+        client.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value)
+        cache = RedisCache(client, ttl=30)
+        # read_house_collection's keys end in the ETag, which may be None
+        cache.set(('houses', 'h1', 'chores', None), {'c1': {'dueDate': datetime(2025, 5, 1, tzinfo=timezone.utc)}})
+        self.assertEqual(list(store), ['divvy:houses:h1:chores:None'])
+        self.assertEqual(cache.get(('houses', 'h1', 'chores', None)),
+                         {'c1': {'dueDate': 'Thu, 01 May 2025 00:00:00 GMT'}})
+        self.assertIsNone(cache.get(('houses', 'h2', 'chores', None)))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def _mirror_with_listeners(self, **kwargs):
+        """
+        Creates a HouseMirror on a mock client and captures the snapshot
+        callbacks it registers, keyed by 'house' or subcollection name.
+        """
+        mock_db = MagicMock()
+        callbacks = {}
+        house_ref = mock_db.collection.return_value.document.return_value
+        house_ref.on_snapshot.side_effect = lambda cb: callbacks.setdefault('house', cb) and MagicMock()
+
+        def collection(name):
+            coll = MagicMock()
+            coll.on_snapshot.side_effect = lambda cb: callbacks.setdefault(name, cb) and MagicMock()
+            return coll
+        house_ref.collection.side_effect = collection
+        mirror = HouseMirror(mock_db, **kwargs)
+        mirror._start_reaper = lambda: None
+        return mirror, callbacks
+
+    def _change(self, kind, doc_id, data=None):
+        change = MagicMock()
+        change.type.name = kind
+        change.document.id = doc_id
+        change.document.to_dict.return_value = data
+        return change
+
+    def test_house_mirror_serves_reads_once_ready(self):
+        mirror, callbacks = self._mirror_with_listeners()
+        # first read attaches listeners and falls through to Firestore
+        self.assertIsNone(mirror.get_collection('h1', 'chores'))
+
+        house_doc = MagicMock(exists=True)
+        house_doc.to_dict.return_value = {'id': 'h1'}
+        callbacks['house']([house_doc], [], None)
+        callbacks['chores']([], [self._change('ADDED', 'c1', {'id': 'c1'})], None)
+
+        self.assertEqual(mirror.get_house('h1'), {'id': 'h1'})
+        self.assertEqual(mirror.get_collection('h1', 'chores'), {'c1': {'id': 'c1'}})
+        # collections whose first snapshot hasn't arrived still fall through
+        self.assertIsNone(mirror.get_collection('h1', 'swaps'))
+
+        callbacks['chores']([], [self._change('MODIFIED', 'c1', {'id': 'c1', 'name': 'Dishes'}),
+                                 self._change('ADDED', 'c2', {'id': 'c2'})], None)
+        callbacks['chores']([], [self._change('REMOVED', 'c2')], None)
+        self.assertEqual(mirror.get_collection('h1', 'chores'), {'c1': {'id': 'c1', 'name': 'Dishes'}})
+
+    def test_house_mirror_closes_idle_houses(self):
+        mirror, callbacks = self._mirror_with_listeners(idle_seconds=10)
+        with patch('utils.house_mirror.time.monotonic', return_value=100):
+            mirror.get_collection('h1', 'chores')
+        self.assertEqual(mirror.stats()['houses'], 1)
+        with patch('utils.house_mirror.time.monotonic', return_value=105):
+            mirror.close_idle()
+        self.assertEqual(mirror.stats()['houses'], 1)
+        with patch('utils.house_mirror.time.monotonic', return_value=111):
+            mirror.close_idle()
+        self.assertEqual(mirror.stats()['houses'], 0)
+
+    def test_house_mirror_bounds_memory(self):
+        mirror, callbacks = self._mirror_with_listeners(max_docs_per_house=2)
+        mirror.get_collection('h1', 'chores')
+        house_doc = MagicMock(exists=True)
+        callbacks['house']([house_doc], [], None)
+        callbacks['chores']([], [self._change('ADDED', f'c{i}', {}) for i in range(3)], None)
+
+        self.assertIsNone(mirror.get_collection('h1', 'chores'))
+        self.assertEqual(mirror.stats()['documents'], 0)
+
+    def test_house_mirror_evicts_least_recently_used_house(self):
+        mirror, callbacks = self._mirror_with_listeners(max_houses=1)
+        mirror.get_collection('h1', 'chores')
+        mirror.get_collection('h2', 'chores')
+        self.assertEqual(list(mirror._houses), ['h2'])
+
+
+    def test_lazy_import(self):
+        module = lazy_import('json.decoder')
+        self.assertIsNone(module._module)
+        self.assertEqual(module.JSONDecodeError.__name__, 'JSONDecodeError')
+        self.assertIs(module._module, sys.modules['json.decoder'])
+
+class TestFakeFirestore(unittest.TestCase):
+    """
+    Unit tests for the in-memory Firestore used by the benchmarks.
+    """
+
+    def setUp(self):
+        self.db = FakeFirestore()
+        self.instances = self.db.collection('houses').document('h1').collection('choreInstances')
+        for i in range(5):
+            self.instances.document(f'i{i}').set({'id': f'i{i}', 'order': i, 'assignee': 'a' if i % 2 else 'b',
+                                                  'dueDate': datetime(2025, 7, i + 1, tzinfo=timezone.utc)})
+
+    def test_queries(self):
+        by_assignee = self.instances.where(filter=firestore.FieldFilter('assignee', '==', 'a')).stream()
+        self.assertEqual([doc.id for doc in by_assignee], ['i1', 'i3'])
+        in_range = self.instances.where('dueDate', '>=', datetime(2025, 7, 2, tzinfo=timezone.utc)) \
+            .where('dueDate', '<', datetime(2025, 7, 4, tzinfo=timezone.utc)).get()
+        self.assertEqual([doc.id for doc in in_range], ['i1', 'i2'])
+        self.assertEqual(self.instances.count().get()[0][0].value, 5)
+        self.assertEqual([doc.to_dict() for doc in self.instances.select(['order']).limit(2).stream()],
+                         [{'order': 0}, {'order': 1}])
+
+    def test_order_and_cursor(self):
+        query = self.instances.order_by('order', direction=firestore.Query.DESCENDING).limit(2)
+        page = query.get()
+        self.assertEqual([doc.id for doc in page], ['i4', 'i3'])
+        self.assertEqual([doc.id for doc in query.start_after(page[-1]).get()], ['i2', 'i1'])
+
+    def test_writes_and_transforms(self):
+        ref = self.instances.document('i0')
+        ref.update({'stats.done': firestore.Increment(2), 'assignee': firestore.DELETE_FIELD})
+        ref.set({'stats': {'late': 1}, 'tags': firestore.ArrayUnion(['x'])}, merge=True)
+        data = ref.get().to_dict()
+        self.assertEqual(data['stats'], {'done': 2, 'late': 1})
+        self.assertEqual(data['tags'], ['x'])
+        self.assertNotIn('assignee', data)
+        ref.set({'id': 'i0'})
+        self.assertEqual(ref.get().to_dict(), {'id': 'i0'})
+        ref.delete()
+        self.assertFalse(ref.get().exists)
+        with self.assertRaises(exceptions.NotFound):
+            ref.update({'id': 'i0'})
+
+    def test_batch_limit(self):
+        batch = self.db.batch()
+        for i in range(501):
+            batch.set(self.instances.document(f'x{i}'), {})
+        with self.assertRaises(exceptions.InvalidArgument):
+            batch.commit()
+        self.assertEqual(self.instances.count().get()[0][0].value, 5)
+
+    def test_transactions_serialize_read_modify_write(self):
+        counter = self.db.collection('counters').document('c')
+
+        @firestore.transactional
+        def increment(transaction):
+            snapshot = counter.get(transaction=transaction)
+            transaction.set(counter, {'n': (snapshot.to_dict() or {}).get('n', 0) + 1})
+
+        threads = [threading.Thread(target=increment, args=(self.db.transaction(),)) for _ in range(10)]
+        self.db.latency = 0.001
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.get().to_dict(), {'n': 10})
+
+    def test_transaction_reads_match_client_signatures(self):
+        transaction = self.db.transaction()
+        with self.assertRaises(ValueError):
+            transaction.get(self.instances)
+        with self.assertRaises(ValueError):
+            transaction.get('houses/h1/choreInstances/i0')
+        with self.assertRaises(TypeError):
+            transaction.get(self.instances.document('i0'), ['order'])
+        with self.assertRaises(TypeError):
+            transaction.get_all([self.instances.document('i0')], field_paths=['order'])
+        self.assertEqual([doc.id for doc in transaction.get(self.instances.order_by('__name__'))],
+                         ['i0', 'i1', 'i2', 'i3', 'i4'])
+        self.assertEqual([doc.id for doc in transaction.get_all([self.instances.document('i1')])], ['i1'])
+        transaction._clean_up()
+
+    def test_latency_and_stats(self):
+        self.db.reset_stats()
+        self.db.latency = 0.01
+        with patch('utils.fake_firestore.time.sleep') as mock_sleep:
+            self.instances.document('i0').get()
+            list(self.instances.stream())
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(self.db.stats, {'rpcs': 2, 'reads': 6, 'writes': 0, 'deletes': 0})
+
+    def test_listeners_drive_house_mirror(self):
+        self.db.collection('houses').document('h1').set({'id': 'h1'})
+        mirror = HouseMirror(self.db)
+        self.assertEqual(len(mirror.get_collection('h1', 'choreInstances')), 5)
+        self.instances.document('i9').set({'id': 'i9'})
+        self.instances.document('i0').delete()
+        docs = mirror.get_collection('h1', 'choreInstances')
+        self.assertIn('i9', docs)
+        self.assertNotIn('i0', docs)
+        mirror.close()
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Unit tests for the request metrics and Firestore instrumentation.
+    """
+
+    def setUp(self):
+        self.fake = FakeFirestore()
+        self.request_metrics = RequestMetrics()
+        self.db = instrument(self.fake, self.request_metrics)
+        self.instances = self.db.collection('houses').document('h1').collection('choreInstances')
+
+    def assertUsage(self, reads=0, writes=0, deletes=0):
+        self.assertEqual((self.request_metrics.reads, self.request_metrics.writes, self.request_metrics.deletes),
+                         (reads, writes, deletes))
+
+    def test_counts_billed_operations(self):
+        for i in range(3):
+            self.instances.document(f'i{i}').set({'id': f'i{i}', 'assignee': 'a'})
+        self.instances.document('i0').get()
+        self.assertEqual(len(list(self.instances.stream())), 3)
+        self.instances.where(filter=firestore.FieldFilter('assignee', '==', 'b')).get()   # empty query
+        self.instances.count().get()
+        self.instances.document('i2').delete()
+        self.assertUsage(reads=1 + 3 + 1 + 1, writes=3, deletes=1)
+        self.assertEqual(self.request_metrics.calls, 8)
+
+    def test_counts_batches_and_transactions(self):
+        batch = self.db.batch()
+        for i in range(3):
+            batch.set(self.instances.document(f'i{i}'), {'id': f'i{i}'})
+        batch.delete(self.instances.document('i0'))
+        batch.commit()
+        self.assertUsage(writes=3, deletes=1)
+
+        @firestore.transactional
+        def move(transaction):
+            snapshot = self.instances.document('i1').get(transaction=transaction)
+            transaction.set(self.instances.document('i3'), snapshot.to_dict())
+            transaction.delete(self.instances.document('i1'))
+
+        move(self.db.transaction())
+        self.assertUsage(reads=1, writes=4, deletes=2)
+        self.assertEqual(self.fake.document_count(), 2)
+
+    def test_counts_async_operations(self):
+        import asyncio
+        self.fake.collection('houses').document('h1').set({'id': 'h1'})
+        db = instrument(self.fake.async_client(), self.request_metrics)
+
+        async def read():
+            house = await db.collection('houses').document('h1').get()
+            docs = [doc async for doc in db.collection('houses').stream()]
+            return house.to_dict(), len(docs)
+
+        self.assertEqual(asyncio.run(read()), ({'id': 'h1'}, 1))
+        self.assertUsage(reads=2)
+
+    def test_render(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        self.request_metrics.add(0.01, reads=5, writes=1)
+        metrics.observe('/get-house-<house_id>', 'GET', 200, 0.5, self.request_metrics)
+        metrics.observe('/get-house-<house_id>', 'GET', 200, 0.05, RequestMetrics())
+        text = metrics.render()
+        worker = f'worker="{os.getpid()}"'
+        labels = f'{worker},route="/get-house-<house_id>",method="GET"'
+        self.assertIn(f'divvy_http_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn(f'divvy_http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1', text)
+        self.assertIn(f'divvy_http_request_duration_seconds_bucket{{{labels},le="1.0"}} 2', text)
+        self.assertIn(f'divvy_http_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'divvy_firestore_operations_total{{{labels},operation="reads"}} 5', text)
+        self.assertIn(f'divvy_firestore_operations_total{{{labels},operation="writes"}} 1', text)
+
+    def test_metrics_route_and_server_timing(self):
+        import app
+        app.metrics.clear()
+        app.cache.clear()
+        self.fake.collection('houses').document('h1').set({'id': 'h1'})
+        client = app.create_app({'FIRESTORE_DB': self.fake, 'SERVER_TIMING': True}).test_client()
+        with client.get('/get-house-h1-members') as response:
+            self.assertEqual(response.get_json(), {})
+            self.assertIn('firestore;dur=', response.headers['Server-Timing'])
+
+        # the house's write counters (see conditional_read), the house and the empty query
+        text = client.get('/metrics').get_data(as_text=True)
+        self.assertIn('route="/get-house-<house_id>-members",method="GET",operation="reads"} 3', text)
+
+
+class TestEncoding(unittest.TestCase):
+    """
+    Unit tests for the JSON provider and response compression in encoding.py.
+    """
+
+    def setUp(self):
+        import app
+        app.cache.clear()
+        self.db = FakeFirestore()
+        house_ref = self.db.collection('houses').document('h1')
+        house_ref.set({'id': 'h1'})
+        chores = house_ref.collection('chores')
+        for i in range(50):
+            chores.document(f'c{i}').set({'id': f'c{i}', 'name': 'Dishes', 'description': '', 'members': [], 'notes': None})
+        self.flask_app = app.create_app({'FIRESTORE_DB': self.db})
+        self.client = self.flask_app.test_client()
+
+    def test_compact(self):
+        self.assertEqual(compact({'a': None, 'b': '', 'c': [], 'd': {}, 'e': 0, 'f': False,
+                                  'g': [{'h': None}, None]}),
+                         {'d': {}, 'e': 0, 'f': False, 'g': [{}, None]})
+
+    def test_provider_matches_default(self):
+        provider = OrjsonProvider(self.flask_app)
+        data = {'b': datetime(2024, 1, 2, tzinfo=timezone.utc), 'a': [1, 2.5, None], 'c': {'d': 'é'}}
+        default = self.flask_app.json_provider_class(self.flask_app)
+        with self.flask_app.app_context():
+            self.assertEqual(json.loads(provider.dumps(data)), json.loads(default.dumps(data)))
+            self.assertEqual(json.loads(provider.dumps(data))['b'], 'Tue, 02 Jan 2024 00:00:00 GMT')
+            # too big for orjson
+            self.assertEqual(provider.dumps({'n': 2 ** 70}), '{"n": 1180591620717411303424}')
+            self.assertEqual(provider.loads(b'{"a": [1]}'), {'a': [1]})
+
+        token = compact_json.set(True)
+        self.addCleanup(compact_json.reset, token)
+        self.assertEqual(provider.dumps({'a': None, 'b': 1}), '{"b":1}')
+
+    def test_compress_stream(self):
+        chunks = ['{', '"a":1', '}']
+        self.assertEqual(gzip.decompress(b''.join(compress_stream(iter(chunks), 'gzip'))), b'{"a":1}')
+        self.assertEqual(gzip.decompress(compress(b'{"a":1}', 'gzip')), b'{"a":1}')
+
+    def test_compress_stream_flushes_each_chunk(self):
+        def chunks():
+            yield '{'
+            yield '"a":1'
+            raise AssertionError('read past the first chunks')
+
+        stream = compress_stream(chunks(), 'gzip')
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual(decompressor.decompress(next(stream)), b'{')
+        self.assertEqual(decompressor.decompress(next(stream)), b'"a":1')
+        stream.close()
+
+    def test_compressed_responses(self):
+        import app
+        plain = self.client.get('/get-house-h1-chores')
+        self.assertNotIn('Content-Encoding', plain.headers)
+
+        # streamed from Firestore, then from the cache
+        app.cache.clear()
+        for _ in range(2):
+            response = self.client.get('/get-house-h1-chores', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response.headers['Vary'])
+            self.assertLess(len(response.get_data()), len(plain.get_data()))
+            self.assertEqual(json.loads(gzip.decompress(response.get_data())), plain.get_json())
+
+        # still matches the uncompressed response's ETag
+        self.assertTrue(response.headers['ETag'].startswith('W/'))
+        self.assertEqual(self.client.get('/get-house-h1-chores', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': plain.headers['ETag']}).status_code, 304)
+
+        # small bodies aren't compressed
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        self.flask_app.config['COMPRESSION'] = False
+        response = self.client.get('/get-house-h1-chores', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_compact_responses(self):
+        response = self.client.get('/get-house-h1-chores?compact=true')
+        self.assertEqual(response.get_json()['c0'], {'id': 'c0', 'name': 'Dishes'})
+        self.assertEqual(self.client.get('/get-house-h1-chores').get_json()['c0']['members'], [])
+
+    def test_async_compressed_responses(self):
+        import asgi
+        asgi.async_app.config['FIRESTORE_DB'] = self.db.async_client()
+        self.addCleanup(asgi.async_app.config.pop, 'FIRESTORE_DB')
+        client = asgi.async_app.test_client()
+
+        async def get(path):
+            response = await client.get(path, headers={'Accept-Encoding': 'gzip'})
+            return response.headers.get('Content-Encoding'), await response.get_data()
+
+        encoding, data = asyncio.run(get('/get-house-h1-chores?compact=true'))
+        self.assertEqual(encoding, 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(data))['c1'], {'id': 'c1', 'name': 'Dishes'})
+
+
+class TestScheduler(unittest.TestCase):
+    """
+    Unit tests for the background scheduler and its shard leases.
+    """
+
+    def setUp(self):
+        self.db = FakeFirestore()
+        self.now = datetime.now(timezone.utc)
+        self.house_ids = ['03f7', '5a1c', '9b20', 'c4e1', 'ff00', 'Zoiwern']
+        for house_id in self.house_ids:
+            house_ref = self.db.collection('houses').document(house_id)
+            house_ref.set({'id': house_id})
+            house_ref.collection('chores').document('ch1').set({
+                'id': 'ch1', 'assignees': ['a'], 'frequencyPattern': 'daily', 'startDate': self.now - timedelta(days=3)})
+            house_ref.collection('choreInstances').document('late').set({
+                'id': 'late', 'assignee': 'a', 'isDone': False, 'doneOnTime': False,
+                'dueDate': self.now - timedelta(days=1)})
+
+    def test_shards_cover_every_house_once(self):
+        self.assertEqual(shard_range(0, 4), (None, '40'))
+        self.assertEqual(shard_range(3, 4), ('c0', None))
+        houses = [house_id for shard in range(4) for house_id in houses_in_shard(self.db, shard, 4)]
+        self.assertEqual(sorted(houses), sorted(self.house_ids))
+
+    def test_leases(self):
+        self.assertTrue(claim_shard(self.db, 0, 4, 'w1', 300, 600, self.now))
+        # held by w1
+        self.assertFalse(claim_shard(self.db, 0, 4, 'w2', 300, 600, self.now))
+        self.assertTrue(claim_shard(self.db, 0, 4, 'w1', 300, 600, self.now, renew=True))
+        # ... until it expires
+        self.assertTrue(claim_shard(self.db, 0, 4, 'w2', 300, 600, self.now + timedelta(seconds=601)))
+
+        # a shard that was just run waits for the next interval
+        release_shard(self.db, 0, 4, 'w2', self.now)
+        self.assertFalse(claim_shard(self.db, 0, 4, 'w1', 300, 600, self.now + timedelta(seconds=10)))
+        self.assertTrue(claim_shard(self.db, 0, 4, 'w1', 300, 600, self.now + timedelta(seconds=301)))
+
+    def test_run_once(self):
+        first = Scheduler(lambda: self.db, shards=4, owner='w1')
+        second = Scheduler(lambda: self.db, shards=4, owner='w2')
+        claim_shard(self.db, 2, 4, 'w2', 300, 600, self.now)
+
+        totals = first.run_once(self.now)
+
+        self.assertEqual(totals['shards'], 3)
+        self.assertEqual(totals['houses'], 4)
+        self.assertEqual(totals['instancesOverdue'], 4)
+        self.assertGreater(totals['instancesCreated'], 0)
+        self.assertTrue(self.db.collection('houses').document('03f7').collection('choreInstances')
+                        .document('late').get().to_dict()['overdue'])
+        # the version counters change, and so do the ETags of chore instance reads
+        self.assertEqual(self.db.collection('houses').document('03f7').collection('stats')
+                         .document('versions').get().to_dict(), {'choreInstances': 1})
+
+        # the other worker only gets the shard it held
+        totals = second.run_once(self.now)
+        self.assertEqual((totals['shards'], totals['houses']), (1, 2))
+        self.assertEqual(first.run_once(self.now)['shards'], 0)
+
+    def test_rolls_over_once_a_day(self):
+        scheduler = Scheduler(lambda: self.db, shards=1, owner='w1')
+        self.assertGreater(scheduler.run_once(self.now)['instancesCreated'], 0)
+        with patch('utils.scheduler.roll_over_chores') as mock_roll_over:
+            later = self.now + timedelta(seconds=301)
+            self.assertEqual(scheduler.run_once(later)['houses'], 6)
+            mock_roll_over.assert_not_called()
+            mock_roll_over.return_value = 0
+            scheduler.run_once(self.now + timedelta(days=1))
+            self.assertEqual(mock_roll_over.call_count, 6)
+
+
+class TestWriteBuffer(unittest.TestCase):
+    """
+    Unit tests for the write-behind buffer in write_buffer.py and the
+    buffered upsert routes.
+    """
+
+    def setUp(self):
+        import app
+        app.cache.clear()
+        self.db = FakeFirestore()
+        self.db.collection('houses').document('h1').set({'id': 'h1', 'name': 'Home', 'joinCode': 'ABC'})
+        self.db.collection('joinCodes').document('ABC').set({'houseID': 'h1'})
+        self.flask_app = app.create_app({'FIRESTORE_DB': self.db, 'WRITE_BUFFER_SECONDS': 60})
+        self.buffer = self.flask_app.extensions['write_buffer']
+        self.client = self.flask_app.test_client()
+
+    def tearDown(self):
+        self.buffer.close()
+
+    def test_coalesces_writes(self):
+        flushed = []
+        buffer = WriteBuffer(flushed.extend, window_seconds=0.05)
+        key = ('members', 'h1', 'm1')
+        self.assertFalse(buffer.hold(key, {'name': 'a'}))   # the first write goes through
+        buffer.written(key, {'id': 'm1', 'name': 'a'})
+        self.assertTrue(buffer.hold(key, {'name': 'b'}))
+        self.assertTrue(buffer.hold(key, {'email': 'e'}))
+        self.assertEqual(buffer.last(key), {'id': 'm1', 'name': 'b', 'email': 'e'})
+        self.assertTrue(buffer.has_pending('h1'))
+        self.assertFalse(buffer.has_pending('h2'))
+
+        # flushed by the background thread once the window has passed
+        for _ in range(100):
+            if flushed:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(flushed, [(key, {'id': 'm1', 'name': 'b', 'email': 'e'})])
+        self.assertEqual(buffer.stats(), {'pending': 0, 'coalesced': 2, 'flushed': 1})
+        buffer.close()
+        self.assertFalse(buffer.hold(key, {'name': 'c'}))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    def test_flushes_in_forked_worker(self):
+        # like a gunicorn worker forked from a preloaded master, whose flush
+        # thread didn't survive the fork
+        flushed = []
+        buffer = WriteBuffer(flushed.extend, window_seconds=0.05)
+        key = ('members', 'h1', 'm1')
+        buffer.written(key, {'id': 'm1', 'name': 'a'})
+        self.assertTrue(buffer.hold(key, {'name': 'b'}))
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                self.assertEqual(buffer.stats()['pending'], 0)
+                before = len(flushed)
+                buffer.written(key, {'id': 'm1', 'name': 'c'})
+                self.assertTrue(buffer.hold(key, {'name': 'd'}))
+                for _ in range(100):
+                    if len(flushed) > before:
+                        break
+                    threading.Event().wait(0.01)
+                # only the worker's own write, not the one queued before the fork
+                if flushed[before:] == [(key, {'id': 'm1', 'name': 'd'})]:
+                    status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        buffer.close()
+        self.assertEqual(flushed, [(key, {'id': 'm1', 'name': 'b'})])
+
+    def test_buffered_member_upserts(self):
+        members = self.db.collection('houses').document('h1').collection('members')
+        for i in range(5):
+            response = self.client.post('/upsert-member-h1', json={'id': 'm1', 'name': f'name {i}'})
+            self.assertEqual(response.get_json(), {'id': 'm1'})
+        self.assertEqual(members.document('m1').get().to_dict()['name'], 'name 0')
+        self.assertTrue(self.buffer.has_pending('h1'))
+
+        # a read of the house flushes its queued writes first
+        response = self.client.get('/get-house-h1-members')
+        self.assertEqual(response.get_json()['m1']['name'], 'name 4')
+        self.assertFalse(self.buffer.has_pending())
+        self.assertEqual(self.buffer.stats()['coalesced'], 4)
+        # both writes were counted
+        self.assertEqual(self.db.collection('houses').document('h1').collection('stats')
+                         .document('versions').get().to_dict(), {'members': 2})
+
+    def test_other_writes_land_after_queued_writes(self):
+        for name in ['a', 'b']:
+            self.client.post('/upsert-member-h1', json={'id': 'm1', 'name': name})
+        self.client.post('/delete-member-h1', json={'id': 'm1'})
+        self.buffer.close()
+        members = self.db.collection('houses').document('h1').collection('members')
+        self.assertFalse(members.document('m1').get().exists)
+
+    def test_partial_updates_are_not_reverted(self):
+        members = self.db.collection('houses').document('h1').collection('members')
+        self.client.post('/upsert-member-h1', json={'id': 'm1', 'name': 'a', 'email': 'a@divvy.com'})
+        self.client.post('/upsert-member-h1', json={'id': 'm1', 'name': 'b', 'email': 'a@divvy.com'})
+        self.client.patch('/update-members-h1', json={'id': 'm1', 'email': 'b@divvy.com'})
+        self.assertEqual(members.document('m1').get().to_dict()['name'], 'b')
+        # the next upsert overwrites the member as usual, rather than being
+        # queued on top of what this worker wrote before the update
+        self.client.post('/upsert-member-h1', json={'id': 'm1', 'name': 'c'})
+        self.client.post('/upsert-member-h1', json={'id': 'm1', 'name': 'd'})
+        self.buffer.close()
+        member = members.document('m1').get().to_dict()
+        self.assertEqual((member['name'], member.get('email')), ('d', None))
+
+    def test_buffered_chore_instance_upserts(self):
+        instance = {'id': 'i1', 'choreID': 'c1', 'assignee': 'm1', 'dueDate': '2024-01-01T09:00:00Z',
+                    'isDone': False}
+        self.client.post('/upsert-chore-instance-h1', json=instance)
+        self.db.reset_stats()
+        for done in [True, False, True]:
+            response = self.client.post('/upsert-chore-instance-h1', json=dict(instance, isDone=done))
+            self.assertEqual(response.get_json(), {'id': 'i1'})
+        self.assertEqual(self.db.stats['writes'], 0)
+
+        self.buffer.close()
+        house_ref = self.db.collection('houses').document('h1')
+        self.assertTrue(house_ref.collection('choreInstances').document('i1').get().to_dict()['isDone'])
+        self.assertEqual(house_ref.collection('stats').document('versions').get().to_dict(),
+                         {'choreInstances': 2})
+
+    def test_buffered_house_upserts(self):
+        response = self.client.post('/upsert-house', json={'id': 'h1', 'name': 'One'})
+        self.assertEqual(response.get_json(), {'id': 'h1', 'joinCode': 'ABC'})
+        response = self.client.post('/upsert-house', json={'id': 'h1', 'name': 'Two', 'joinCode': 'ABC'})
+        self.assertEqual(response.get_json(), {'id': 'h1', 'joinCode': 'ABC'})
+        self.assertTrue(self.buffer.has_pending('h1'))
+
+        # a new join code is written (and checked) right away
+        self.db.collection('joinCodes').document('TAKEN').set({'houseID': 'h2'})
+        response = self.client.post('/upsert-house', json={'id': 'h1', 'name': 'Three', 'joinCode': 'TAKEN'})
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(self.buffer.has_pending())
+        house = self.db.collection('houses').document('h1').get().to_dict()
+        self.assertEqual((house['name'], house['joinCode']), ('Two', 'ABC'))
+
+
+if __name__ == '__main__':
+    unittest.main()
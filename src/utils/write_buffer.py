@@ -0,0 +1,181 @@
+import atexit
+import os
+import threading
+import time
+
+# /// Write-Behind Buffer /// #
+    # Optional (WRITE_BUFFER_SECONDS > 0) coalescing of the upserts a client
+    # fires while a user edits a document. The first write to a document
+    # goes straight to Firestore as usual; further writes to it within
+    # WRITE_BUFFER_SECONDS are merged into one pending write, flushed at
+    # most WRITE_BUFFER_SECONDS after the first of them. A burst of edits
+    # then costs two writes instead of one per keystroke.
+    #
+    # Pending writes only live in this worker's memory, so the buffer keeps
+    # them consistent for this worker: before handling any other request for
+    # a house (see flush_house_writes in app.py) the house's pending writes
+    # are flushed, so reads see them and other writes are applied after
+    # them. Everything pending is flushed when the process exits.
+    #
+    # gunicorn creates the app in the master (preload_app) and forks the
+    # workers from it, and a fork only keeps the thread that forked. So the
+    # flush thread is started by the first write queued in each process,
+    # and a forked worker starts with an empty buffer of its own.
+
+
+class WriteBuffer:
+    """
+    Thread-safe buffer of pending document writes, keyed by
+    (<kind>, <house ID>, <document ID>). flush(writes) is called with a list
+    of (key, data) to write, from a background thread or from flush().
+    """
+
+    def __init__(self, flush, window_seconds=1.0, max_pending=400):
+        self.window_seconds = window_seconds
+        self.max_pending = max_pending
+        self.coalesced = 0
+        self.flushed = 0
+        self._flush = flush
+        # key -> [merged data, time it is due to be flushed]
+        self._pending = {}
+        # key -> (time of the last write through, the data written), for
+        # the documents written within the window
+        self._recent = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flushing = threading.Lock()
+        self._closed = False
+        self._thread = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.close)
+
+    def hold(self, key, data):
+        """
+        Queues data to be merged into the document if it was written (or
+        queued) within the window, in which case the caller must not write
+        it.
+
+        Returns:
+            bool: Whether the write was queued.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._closed:
+                return False
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending[0].update(data)
+                self.coalesced += 1
+                return True
+            recent = self._recent.get(key)
+            if recent is None or now - recent[0] > self.window_seconds:
+                return False
+            self._pending[key] = [dict(data), now + self.window_seconds]
+            self.coalesced += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='write-buffer', daemon=True)
+                self._thread.start()
+            if len(self._pending) >= self.max_pending:
+                self._pending[key][1] = now
+            self._wakeup.notify()
+            return True
+
+    def written(self, key, data):
+        """
+        Records that data was just written to the document, so writes to it
+        within the window are queued.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._recent[key] = (now, dict(data))
+            if len(self._recent) > self.max_pending * 4:
+                self._recent = {k: v for k, v in self._recent.items() if now - v[0] <= self.window_seconds}
+
+    def last(self, key):
+        """
+        Returns the document as this worker last wrote or queued it, or None.
+        """
+        with self._lock:
+            recent = self._recent.get(key)
+            data = dict(recent[1]) if recent is not None else None
+            pending = self._pending.get(key)
+            if pending is not None:
+                data = dict(data or {}, **pending[0])
+            return data
+
+    def forget(self, house_id=None):
+        """
+        Forgets what this worker last wrote to a house's documents (or to
+        every house's), after another route wrote to them, so the queued
+        writes that follow only carry their own fields.
+        """
+        with self._lock:
+            self._recent = {key: value for key, value in self._recent.items()
+                            if house_id is not None and key[1] != house_id}
+
+    def has_pending(self, house_id=None):
+        with self._lock:
+            return any(house_id is None or key[1] == house_id for key in self._pending)
+
+    def flush(self, house_id=None, due_only=False):
+        """
+        Writes the pending writes of a house (or of every house) now, each
+        as the document was last written with the queued fields merged in.
+
+        Args:
+            house_id (str): Defaults to every house.
+            due_only (bool): Only write those due to be flushed.
+        """
+        with self._flushing:
+            now = time.monotonic()
+            with self._lock:
+                keys = [key for key, (_, due) in self._pending.items()
+                        if (house_id is None or key[1] == house_id) and (not due_only or due <= now)]
+                writes = []
+                for key in keys:
+                    recent = self._recent.get(key)
+                    data = dict(recent[1] if recent else {}, **self._pending.pop(key)[0])
+                    self._recent[key] = (now, data)
+                    writes.append((key, dict(data)))
+            if writes:
+                self.flushed += len(writes)
+                self._flush(writes)
+
+    def close(self):
+        """
+        Stops the background thread and flushes everything pending.
+        """
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'coalesced': self.coalesced, 'flushed': self.flushed}
+
+    def _after_fork(self):
+        # What was written or queued before the fork is the parent's to
+        # flush, and its locks may have been held by its threads
+        self._pending = {}
+        self._recent = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flushing = threading.Lock()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                due = min((due for _, due in self._pending.values()), default=None)
+                timeout = None if due is None else due - time.monotonic()
+                if timeout is None or timeout > 0:
+                    self._wakeup.wait(timeout)
+                    continue
+            try:
+                self.flush(due_only=True)
+            except Exception as e:
+                print(f"Error flushing buffered writes: {e}")
@@ -0,0 +1,8 @@
+from app import create_app
+
+# /// Production WSGI Entry Point /// #
+    # Run (from ./src):
+    #     gunicorn -c gunicorn.conf.py wsgi:app
+    # See gunicorn.conf.py for the worker/thread settings.
+
+app = create_app()